@@ -0,0 +1,109 @@
+"""Холодный старт воркера.
+
+Запускается свежим интерпретатором: python -X importtime -m
+benchmarks.boot. Импорты и django.setup() можно измерить только в
+процессе, где они ещё не выполнялись, поэтому модуль до замера не
+импортирует ничего, кроме стандартной библиотеки. На stdin получает
+JSON-список [имя, URL, cookie] запросов, в stdout пишет JSON: фазы
+старта, импорт моделей и ready() каждого приложения, первый и второй
+запрос к каждому URL и какие из тяжёлых модулей загружены после старта
+и после запросов. Импорты по модулям -X importtime пишет в stderr.
+"""
+import json
+import sys
+import time
+
+IMPORT_LINE = 'import time:'
+# не нужны веб-воркеру при старте
+HEAVY_MODULES = ('pkg_resources', 'setuptools', 'sorl', 'PIL')
+
+
+def parse_importtime(lines):
+    """Строки -X importtime: модуль -> (собственное, с вложенными) в мс."""
+    modules = {}
+    for line in lines:
+        if not line.startswith(IMPORT_LINE):
+            continue
+        own, cumulative, name = line[len(IMPORT_LINE):].split('|')
+        if not own.strip().isdigit():
+            continue
+        modules[name.strip()] = (int(own) / 1000, int(cumulative) / 1000)
+    return modules
+
+
+def timed_apps():
+    """Засекает импорт моделей и ready() каждого приложения во время
+    django.setup(); результат заполняется по мере загрузки."""
+    from django.apps import AppConfig
+
+    spent = {}
+    create = AppConfig.create.__func__
+    import_models = AppConfig.import_models
+
+    def timed_create(cls, entry):
+        started = time.perf_counter()
+        config = create(cls, entry)
+        spent[config.label] = {'config': time.perf_counter() - started}
+        ready = config.ready
+
+        def timed_ready():
+            started = time.perf_counter()
+            ready()
+            spent[config.label]['ready'] = time.perf_counter() - started
+
+        config.ready = timed_ready
+        return config
+
+    def timed_import_models(self):
+        started = time.perf_counter()
+        import_models(self)
+        spent[self.label]['models'] = time.perf_counter() - started
+
+    AppConfig.create = classmethod(timed_create)
+    AppConfig.import_models = timed_import_models
+    return spent
+
+
+def loaded():
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def profile(requests):
+    phases = {}
+    started = time.perf_counter()
+    # как yatube.wsgi: окружение готовится до импорта Django
+    from yatube.worker import prepare_environment
+    prepare_environment()
+    apps = timed_apps()
+    phases['framework'] = time.perf_counter() - started
+
+    mark = time.perf_counter()
+    import django
+    django.setup(set_prefix=False)
+    phases['setup'] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    from yatube.wsgi import application
+    phases['wsgi'] = time.perf_counter() - mark
+    phases['boot'] = time.perf_counter() - started
+    heavy = {'boot': loaded()}
+
+    from benchmarks.concurrency import wsgi_request
+    latency = {}
+    for attempt in ('first', 'second'):
+        for name, url, cookie in requests:
+            mark = time.perf_counter()
+            status = wsgi_request(application, 'GET', url, cookie=cookie)
+            latency.setdefault(name, {'status': status})[attempt] = (
+                time.perf_counter() - mark)
+    heavy['requests'] = loaded()
+    return {
+        'phases': phases,
+        'apps': apps,
+        'requests': latency,
+        'heavy': heavy,
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(profile(json.load(sys.stdin))))
@@ -0,0 +1,174 @@
+"""Медленные клиенты против WSGI-воркеров и ASGI-входа.
+
+Сервер моделируется в процессе: WSGI — пул из workers потоков, как
+воркеры gunicorn, ASGI — событийный цикл перед yatube.asgi. Медленные
+клиенты отправляют тело POST порциями с паузами, а быстрые в это же
+время запрашивают страницу; меряется задержка быстрых.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+HOST = 'localhost'
+CONTENT_TYPE = 'application/x-www-form-urlencoded'
+# одинаковые токен в cookie и в форме проходят проверку CSRF, и
+# middleware читает тело запроса, как у настоящей формы
+CSRF_TOKEN = 'a' * 64
+COOKIE = f'csrftoken={CSRF_TOKEN}'
+
+
+def split(body, chunks):
+    size = max(1, -(-len(body) // chunks))
+    return [body[start:start + size]
+            for start in range(0, len(body), size)] or [b'']
+
+
+class SlowInput:
+    """wsgi.input, которому каждая порция тела приходит через delay
+    секунд, как от клиента на медленном канале."""
+
+    def __init__(self, body, chunks, delay):
+        self.parts = split(body, chunks)
+        self.delay = delay
+        self.buffer = b''
+
+    def read(self, size=-1):
+        while self.parts and (size < 0 or len(self.buffer) < size):
+            time.sleep(self.delay)
+            self.buffer += self.parts.pop(0)
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+def wsgi_request(application, method, path, body=b'', chunks=1, delay=0,
+                 cookie=COOKIE):
+    # строки environ по PEP 3333 — байты URL в latin-1
+    path, _, query = path.encode().decode('iso-8859-1').partition('?')
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'HTTP_HOST': HOST,
+        'HTTP_COOKIE': cookie,
+        'CONTENT_TYPE': CONTENT_TYPE,
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': SlowInput(body, chunks, delay),
+    }
+    setup_testing_defaults(environ)
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    result = application(environ, start_response)
+    try:
+        b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return statuses[0]
+
+
+async def asgi_request(application, method, path, body=b'', chunks=1,
+                       delay=0):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'root_path': '',
+        'query_string': b'',
+        'headers': [(b'host', HOST.encode()),
+                    (b'cookie', COOKIE.encode()),
+                    (b'content-type', CONTENT_TYPE.encode()),
+                    (b'content-length', str(len(body)).encode())],
+        'client': ('127.0.0.1', 0),
+        'server': (HOST, 80),
+    }
+    parts = split(body, chunks)
+    statuses = []
+
+    async def receive():
+        if not parts:
+            return {'type': 'http.disconnect'}
+        if delay:
+            await asyncio.sleep(delay)
+        part = parts.pop(0)
+        return {'type': 'http.request', 'body': part,
+                'more_body': bool(parts)}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    await application(scope, receive, send)
+    return statuses[0]
+
+
+class Load:
+    """slow клиентов шлют body по chunks порций с паузой delay на
+    slow_path, fast клиентов одновременно запрашивают fast_path."""
+
+    def __init__(self, fast_path, slow_path, fast, slow, body, chunks,
+                 delay):
+        self.fast_path = fast_path
+        self.slow_path = slow_path
+        self.fast = fast
+        self.slow = slow
+        self.body = body
+        self.chunks = chunks
+        self.delay = delay
+
+
+def run_wsgi(application, load, workers):
+    """Задержки быстрых запросов в мс, их коды ответа и общее время."""
+    def fast():
+        status = wsgi_request(application, 'GET', load.fast_path)
+        return status, time.perf_counter()
+
+    with ThreadPoolExecutor(workers) as pool:
+        started = time.perf_counter()
+        slow = [pool.submit(wsgi_request, application, 'POST',
+                            load.slow_path, load.body, load.chunks,
+                            load.delay) for _ in range(load.slow)]
+        done = [future.result() for future in
+                [pool.submit(fast) for _ in range(load.fast)]]
+        for future in slow:
+            future.result()
+        total = time.perf_counter() - started
+    return summarize(done, started, total)
+
+
+def run_asgi(application, load):
+    async def fast(started):
+        status = await asgi_request(application, 'GET', load.fast_path)
+        return status, time.perf_counter()
+
+    async def main():
+        started = time.perf_counter()
+        slow = [asyncio.ensure_future(asgi_request(
+            application, 'POST', load.slow_path, load.body, load.chunks,
+            load.delay)) for _ in range(load.slow)]
+        done = await asyncio.gather(
+            *(fast(started) for _ in range(load.fast)))
+        await asyncio.gather(*slow)
+        return summarize(done, started, time.perf_counter() - started)
+
+    return asyncio.run(main())
+
+
+def summarize(done, started, total):
+    return {
+        'latencies': [(finished - started) * 1000 for _, finished in done],
+        'statuses': sorted({status for status, _ in done}),
+        'total': total,
+    }
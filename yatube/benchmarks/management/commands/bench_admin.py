@@ -0,0 +1,209 @@
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import partial
+from statistics import median
+
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from benchmarks.scenarios import SEARCH_QUERY
+from benchmarks.seed import Seeder, Volumes
+from posts.admin import DateRangeForm, PostAdmin
+from posts.models import Group, Post, User
+
+# список постов до PostAdmin с массовыми действиями: настройки Django,
+# а <select> группы в list_editable читает группы в каждой строке
+OLD_CHANGELIST = {
+    'paginator': Paginator,
+    'show_full_result_count': True,
+    'list_select_related': False,
+}
+DEEP_PAGE = 99
+
+
+@contextmanager
+def old_changelist(model_admin):
+    """Список админки в прежнем виде."""
+    old = dict(OLD_CHANGELIST, formfield_for_foreignkey=partial(
+        admin.ModelAdmin.formfield_for_foreignkey, model_admin))
+    model_admin.__dict__.update(old)
+    try:
+        yield
+    finally:
+        for name in old:
+            del model_admin.__dict__[name]
+
+
+@contextmanager
+def counted():
+    """Считает запросы блока; CaptureQueriesContext помнит только
+    последние 9000."""
+    result = {'queries': 0}
+
+    def count(execute, sql, params, many, context):
+        result['queries'] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        started = time.perf_counter()
+        yield result
+        result['ms'] = (time.perf_counter() - started) * 1000
+
+
+@contextmanager
+def measured():
+    """Время в мс и число запросов блока, данные затем откатываются."""
+    savepoint = transaction.savepoint()
+    try:
+        with counted() as result:
+            yield result
+    finally:
+        transaction.savepoint_rollback(savepoint)
+
+
+class Command(BaseCommand):
+    help = ('Меряет страницы списка постов в админке в прежнем виде '
+            '(COUNT(*), группы в каждой строке list_editable, без '
+            'list_select_related) '
+            'и с нынешним PostAdmin, а также массовые '
+            'действия модерации против удаления и сохранения по одному '
+            'посту. Данные создаются во временной транзакции и '
+            'откатываются после замера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--no-seed', action='store_true')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--author-rank', type=int, default=100,
+                            help='место автора по числу постов для '
+                                 'сравнения с обработкой по одному')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if not options['no_seed']:
+                started = time.perf_counter()
+                Seeder(Volumes(posts=options['posts']),
+                       options['seed']).seed()
+                self.stdout.write(f'Данные созданы за '
+                                  f'{time.perf_counter() - started:.1f} с')
+            if connection.vendor == 'sqlite':
+                # на сервере статистику обновляет optimize_sqlite
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE posts_post')
+            user = User.objects.create_superuser(
+                'bench_admin', 'bench_admin@example.com', 'bench-password')
+            self.client = Client()
+            self.client.force_login(user)
+            self.url = reverse('admin:posts_post_changelist')
+            total = Post.objects.count()
+            self.stdout.write(f'Постов: {total}')
+            self.pages(options['repeat'], total)
+            self.actions(options['author_rank'])
+            transaction.set_rollback(True)
+
+    def get(self, params):
+        response = self.client.get(self.url, params)
+        if response.status_code != 200:
+            raise CommandError(f'{self.url} {params}: '
+                               f'{response.status_code}')
+        return response
+
+    def pages(self, repeat, total):
+        # ?p= считается с нуля; на малой базе — последняя страница
+        last = max(min(DEEP_PAGE, (total - 1) // PostAdmin.list_per_page), 0)
+        today = timezone.now().replace(hour=0, minute=0, second=0,
+                                       microsecond=0)
+        pages = (
+            ('список', {}),
+            (f'страница {last + 1}', {'p': last}),
+            ('за 7 дней', {'pub_date__gte': str(today - timedelta(days=7)),
+                           'pub_date__lt': str(today + timedelta(days=1))}),
+            ('поиск', {'q': SEARCH_QUERY}),
+        )
+        model_admin = admin.site._registry[Post]
+        self.stdout.write(f'\n{"страница":<16}{"было, мс":>12}'
+                          f'{"запросов":>10}{"стало, мс":>15}'
+                          f'{"запросов":>10}')
+        for name, params in pages:
+            with old_changelist(model_admin):
+                before = self.page(params, repeat)
+            after = self.page(params, repeat)
+            self.stdout.write(f'{name:<16}{before[0]:>12.1f}{before[1]:>10}'
+                              f'{after[0]:>15.1f}{after[1]:>10}')
+
+    def page(self, params, repeat):
+        """Медиана времени страницы в мс и число её запросов."""
+        self.get(params)
+        timings = []
+        for _ in range(repeat):
+            with counted() as result:
+                self.get(params)
+            timings.append(result['ms'])
+        return median(timings), result['queries']
+
+    def act(self, action, post, params=None, select_across=False, **data):
+        """POST действия админки для выбранного поста или, с
+        select_across, для всего списка с фильтрами params."""
+        url = self.url
+        if params:
+            url += '?' + '&'.join(f'{key}={value}'
+                                  for key, value in params.items())
+        response = self.client.post(url, {
+            'action': action, '_selected_action': [post.pk],
+            'select_across': int(select_across), 'apply': '1', **data})
+        if response.status_code != 302:
+            raise CommandError(f'{action}: {response.status_code}')
+
+    def actions(self, rank):
+        author = User.objects.order_by('-profile__posts_count', 'id')[
+            rank - 1]
+        posts = Post.objects.filter(author=author)
+        group = Group.objects.order_by('posts_count', 'id').first()
+        start = Post.objects.order_by('pub_date').first().pub_date.date()
+        month = DateRangeForm({'start': start,
+                               'end': start + timedelta(days=29)})
+        month.full_clean()
+        first_day, last_day = month.bounds()
+        month_posts = Post.objects.filter(pub_date__gte=first_day,
+                                          pub_date__lt=last_day)
+        by_author = {'author__id__exact': author.pk}
+        selected, oldest = posts.first(), month_posts.first()
+        self.stdout.write(f'\n{"действие":<28}{"постов":>8}'
+                          f'{"по одному, мс":>15}{"запросов":>10}'
+                          f'{"массово, мс":>13}{"запросов":>10}')
+
+        with measured() as one_by_one:
+            for post in posts:
+                post.group = group
+                post.save()
+        with measured() as bulk:
+            self.act('move_to_group', selected, by_author,
+                     select_across=True, group=group.pk)
+        self.row('перенос постов автора', posts.count(), one_by_one, bulk)
+
+        with measured() as one_by_one:
+            posts.delete()
+        with measured() as bulk:
+            self.act('delete_by_author', selected)
+        self.row('удаление по автору', posts.count(), one_by_one, bulk)
+
+        with measured() as bulk:
+            self.act('purge_by_date', oldest, select_across=True,
+                     **month.cleaned_data)
+        self.row('чистка за 30 дней', month_posts.count(), None, bulk)
+
+    def row(self, name, count, one_by_one, bulk):
+        if one_by_one is None:
+            single = f'{"-":>15}{"-":>10}'
+        else:
+            single = (f'{one_by_one["ms"]:>15.1f}'
+                      f'{one_by_one["queries"]:>10}')
+        self.stdout.write(f'{name:<28}{count:>8}{single}'
+                          f'{bulk["ms"]:>13.1f}{bulk["queries"]:>10}')
@@ -0,0 +1,201 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from statistics import median
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from benchmarks import concurrency, scenarios
+from benchmarks.boot import parse_importtime
+
+# первый запрос — единичный замер, разброс между запусками в несколько мс
+MIN_REGRESSION_MS = 5
+# GET, которые пишут или разлогинивают, меняют следующие замеры
+SKIPPED = {'posts:profile_follow', 'posts:profile_unfollow', 'users:logout'}
+
+
+def medians(samples):
+    """Медианы вложенных словарей чисел из нескольких прогонов."""
+    first = samples[0]
+    if not isinstance(first, dict):
+        return median(samples) if isinstance(first, (int, float)) else first
+    return {key: medians([sample[key] for sample in samples
+                          if key in sample])
+            for key in first}
+
+
+class Command(BaseCommand):
+    help = ('Меряет холодный старт воркера в свежих процессах: импорт '
+            'Django, django.setup() с импортом моделей и ready() каждого '
+            'приложения, импорт yatube.wsgi, время импорта модулей по '
+            '-X importtime и задержку первого и второго запроса к '
+            'каждому URL, а также какие тяжёлые модули (pkg_resources, '
+            'sorl, PIL) загружены при старте. Берётся медиана --repeat '
+            'запусков. Работает на данных, которые уже есть в базе. С '
+            '--output сохраняет результат, с --baseline сравнивает с '
+            'прошлым и падает при регрессии.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--top', type=int, default=15,
+                            help='сколько самых долгих модулей показать')
+        parser.add_argument('--output')
+        parser.add_argument('--baseline')
+        parser.add_argument('--threshold', type=float, default=0.2)
+
+    def handle(self, *args, **options):
+        targets = scenarios.targets()
+        if None in targets.values():
+            raise CommandError('В базе нет постов, групп или пользователей')
+        pages = [scenario for scenario in scenarios.build(**targets)
+                 if scenario.method == 'get'
+                 and scenario.name not in SKIPPED]
+        clients = {}
+        for scenario in pages:
+            if scenario.user is not None and scenario.user not in clients:
+                clients[scenario.user] = Client()
+                clients[scenario.user].force_login(scenario.user)
+        requests = [
+            [scenario.name, scenario.url, self.cookie(clients, scenario)]
+            for scenario in pages]
+        try:
+            runs = [self.spawn(requests) for _ in range(options['repeat'])]
+        finally:
+            for client in clients.values():
+                client.logout()
+        results = {
+            'phases': medians([run['phases'] for run in runs]),
+            'apps': medians([run['apps'] for run in runs]),
+            'requests': medians([run['requests'] for run in runs]),
+            'modules': medians([run['modules'] for run in runs]),
+            'heavy': runs[-1]['heavy'],
+        }
+        self.report(results, options['top'])
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({'meta': self.meta(options), 'results': results},
+                          output, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            self.check_baseline(results, options['baseline'],
+                                options['threshold'])
+
+    @staticmethod
+    def cookie(clients, scenario):
+        if scenario.user is None:
+            return concurrency.COOKIE
+        session = clients[scenario.user].cookies[settings.SESSION_COOKIE_NAME]
+        return (f'{concurrency.COOKIE}; '
+                f'{settings.SESSION_COOKIE_NAME}={session.value}')
+
+    @staticmethod
+    def spawn(requests):
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-m', 'benchmarks.boot'],
+            input=json.dumps(requests), capture_output=True, text=True,
+            cwd=settings.BASE_DIR,
+            env=dict(os.environ,
+                     DJANGO_SETTINGS_MODULE=os.environ.get(
+                         'DJANGO_SETTINGS_MODULE', 'yatube.settings')))
+        if process.returncode:
+            raise CommandError(process.stderr[-2000:])
+        run = json.loads(process.stdout.strip().splitlines()[-1])
+        run['modules'] = {
+            name: {'own': own, 'total': total}
+            for name, (own, total) in parse_importtime(
+                process.stderr.splitlines()).items()}
+        return run
+
+    def report(self, results, top):
+        phases = results['phases']
+        self.stdout.write('Старт, мс: ' + ', '.join(
+            f'{name} {phases[name] * 1000:.1f}'
+            for name in ('framework', 'setup', 'wsgi', 'boot')))
+
+        self.stdout.write(f'\n{"приложение":<16}{"config":>9}'
+                          f'{"models":>9}{"ready":>9}')
+        for label, spent in results['apps'].items():
+            self.stdout.write(
+                f'{label:<16}' + ''.join(
+                    f'{spent.get(phase, 0) * 1000:>9.1f}'
+                    for phase in ('config', 'models', 'ready')))
+
+        modules = results['modules']
+        packages = defaultdict(float)
+        for name, spent in modules.items():
+            packages[name.split('.')[0]] += spent['own']
+        self.stdout.write('\nИмпорт по пакетам, мс (с -X importtime):')
+        for package, spent in sorted(packages.items(), key=lambda item:
+                                     item[1], reverse=True)[:top]:
+            self.stdout.write(f'  {package:<36}{spent:>9.1f}')
+        self.stdout.write(f'\n{"модуль":<38}{"свой":>9}{"всего":>9}')
+        for name, spent in sorted(modules.items(), key=lambda item:
+                                  item[1]['own'], reverse=True)[:top]:
+            self.stdout.write(f'{name:<38}{spent["own"]:>9.1f}'
+                              f'{spent["total"]:>9.1f}')
+
+        heavy = results['heavy']
+        self.stdout.write(
+            f'\nТяжёлые модули после старта: '
+            f'{", ".join(heavy["boot"]) or "нет"}; после запросов: '
+            f'{", ".join(heavy["requests"]) or "нет"}')
+        if 'setuptools' in heavy['boot']:
+            self.stdout.write('distutils подменён setuptools: задайте '
+                              'воркеру SETUPTOOLS_USE_DISTUTILS=stdlib')
+
+        self.stdout.write(f'\n{"URL":<34}{"код":>5}{"первый":>9}'
+                          f'{"второй":>9}')
+        for name, result in results['requests'].items():
+            self.stdout.write(
+                f'{name:<34}{result["status"]:>5}'
+                f'{result["first"] * 1000:>9.2f}'
+                f'{result["second"] * 1000:>9.2f}')
+
+    @staticmethod
+    def meta(options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True).stdout.strip()
+        except OSError:
+            commit = ''
+        return {
+            'commit': commit,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'settings': os.environ.get('DJANGO_SETTINGS_MODULE'),
+            'profile': os.environ.get('YATUBE_ENV', 'dev'),
+            'repeat': options['repeat'],
+        }
+
+    def check_baseline(self, results, path, threshold):
+        """Регрессия — рост времени старта или первого запроса к URL
+        больше чем в 1 + threshold раз и на MIN_REGRESSION_MS, а также
+        тяжёлый модуль, которого при старте раньше не было."""
+        with open(path) as source:
+            baseline = json.load(source)['results']
+        pairs = [('boot', results['phases']['boot'],
+                  baseline['phases']['boot'])]
+        pairs += [(name, result['first'], baseline['requests'][name]['first'])
+                  for name, result in results['requests'].items()
+                  if name in baseline['requests']]
+        regressions = [
+            f'{name}: {before * 1000:.1f} -> {after * 1000:.1f} мс'
+            for name, after, before in pairs
+            if after > before * (1 + threshold)
+            and (after - before) * 1000 > MIN_REGRESSION_MS]
+        if 'heavy' in baseline:
+            regressions += [
+                f'{name} загружается при старте'
+                for name in results['heavy']['boot']
+                if name not in baseline['heavy']['boot']]
+        if regressions:
+            raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+        self.stdout.write(f'Регрессий относительно {path} нет')
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from benchmarks import concurrency
+from benchmarks.runner import percentile
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает WSGI (пул потоков-воркеров) и ASGI-вход '
+            'yatube.asgi под нагрузкой из медленных клиентов, которые '
+            'долго отправляют тело POST: задержка быстрых GET в это '
+            'время. Обоим входам даётся одинаковое число потоков с '
+            'Django (ASGI_THREADS), так что разница — только в том, '
+            'кто ждёт тело запроса. Работает на данных, которые уже '
+            'есть в базе: воркерам в других потоках не видна '
+            'незакоммиченная транзакция.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=settings.ASGI_THREADS,
+                            help='потоков WSGI, как воркеров gunicorn; '
+                                 'у ASGI всегда ASGI_THREADS')
+        parser.add_argument('--slow', type=int, default=8)
+        parser.add_argument('--fast', type=int, default=100)
+        parser.add_argument('--chunks', type=int, default=10)
+        parser.add_argument('--delay', type=float, default=0.1,
+                            help='пауза между порциями тела, с')
+        parser.add_argument('--path', default=None,
+                            help='URL быстрых запросов, по умолчанию '
+                                 'posts:index')
+
+    def handle(self, *args, **options):
+        from yatube.asgi import application as asgi_application
+        from yatube.wsgi import application as wsgi_application
+
+        load = concurrency.Load(
+            fast_path=options['path'] or reverse('posts:index'),
+            slow_path=reverse('users:login'),
+            fast=options['fast'], slow=options['slow'],
+            body=(f'csrfmiddlewaretoken={concurrency.CSRF_TOKEN}'
+                  f'&username=slow&password={"x" * 4096}').encode(),
+            chunks=options['chunks'], delay=options['delay'])
+        results = {
+            f'WSGI, потоков: {options["workers"]}': concurrency.run_wsgi(
+                wsgi_application, load, options['workers']),
+            f'ASGI, потоков: {settings.ASGI_THREADS}': concurrency.run_asgi(
+                asgi_application, load),
+        }
+        self.stdout.write(f'{"вход":<20}{"p50":>9}{"p95":>9}{"max":>9}'
+                          f'{"всего, с":>10}  коды')
+        for name, result in results.items():
+            latencies = result['latencies']
+            self.stdout.write(
+                f'{name:<20}{percentile(latencies, 50):>9.1f}'
+                f'{percentile(latencies, 95):>9.1f}{max(latencies):>9.1f}'
+                f'{result["total"]:>10.2f}  '
+                f'{", ".join(map(str, result["statuses"]))}')
@@ -0,0 +1,79 @@
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+
+from benchmarks import runner, scenarios
+from benchmarks.seed import Seeder, Volumes
+
+
+class Command(BaseCommand):
+    help = ('Отрисовывает каждую HTML-страницу posts целиком с пустым '
+            'кэшем и показывает, сколько из времени шаблонов занимают '
+            'контекстные процессоры и какой из них дороже всех. Данные '
+            'откатываются после замера.')
+
+    def add_arguments(self, parser):
+        defaults = Volumes()
+        parser.add_argument('--posts', type=int, default=defaults.posts)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--no-seed', action='store_true')
+        parser.add_argument('--requests', type=int, default=30)
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), override_settings(
+                REQUEST_TIMING_SAMPLE_RATE=1):
+            if not options['no_seed']:
+                started = time.perf_counter()
+                Seeder(Volumes(posts=options['posts']),
+                       options['seed']).seed()
+                self.stdout.write(f'Данные созданы за '
+                                  f'{time.perf_counter() - started:.1f} с')
+            self.measure(options['requests'])
+            transaction.set_rollback(True)
+
+    def measure(self, requests):
+        targets = scenarios.targets()
+        if None in targets.values():
+            raise CommandError('В базе нет постов, групп или пользователей')
+        pages = [scenario for scenario in scenarios.build(**targets)
+                 if scenario.name.startswith('posts:')
+                 and 'api' not in scenario.name
+                 and scenario.method == 'get']
+        self.stdout.write(f'{"страница":<26}{"всего":>8}{"шаблоны":>9}'
+                          f'{"процессоры":>12}{"доля":>7}  дороже всех')
+        overall = Counter()
+        renders = 0
+        for scenario in pages:
+            total, templates, processors = self.render(scenario, requests)
+            overall.update(processors)
+            renders += requests
+            spent = sum(processors.values())
+            top = processors.most_common(1)[0][0] if processors else '-'
+            share = spent / templates * 100 if templates else 0
+            self.stdout.write(
+                f'{scenario.name:<26}{total / requests * 1000:>8.2f}'
+                f'{templates / requests * 1000:>9.2f}'
+                f'{spent / requests * 1000:>12.3f}{share:>6.1f}%  '
+                f'{top.rsplit(".", 1)[-1]}')
+        self.stdout.write('\nПроцессор, мкс на отрисовку страницы:')
+        for name, spent in overall.most_common():
+            self.stdout.write(f'  {name:<55}{spent / renders * 1e6:>8.1f}')
+
+    @staticmethod
+    def render(scenario, requests):
+        """Суммы общего времени, времени шаблонов и процессоров."""
+        client = Client()
+        total = templates = 0
+        processors = Counter()
+        for _ in range(requests):
+            cache.clear()
+            runner.login(client, scenario)
+            timings = runner.send(client, scenario).wsgi_request.timings
+            total += timings.total
+            templates += timings.template_time
+            processors.update(timings.context_processors)
+        return total, templates, processors
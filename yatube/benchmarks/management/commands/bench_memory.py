@@ -0,0 +1,147 @@
+import gc
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from benchmarks import concurrency, scenarios
+
+PROFILES = ('dev', 'prod', 'bench')
+CHECKPOINTS = 10
+# GET с записью меняют данные между замерами
+WRITING_PAGES = {'posts:profile_follow', 'posts:profile_unfollow'}
+# в prod нет приложения benchmarks и его команд, поэтому замер
+# запускается кодом после django.setup(), а не через manage.py
+MEASURE = '''
+import json
+import sys
+
+import django
+
+django.setup()
+from benchmarks.management.commands.bench_memory import Command
+
+print(json.dumps(Command().measure(int(sys.argv[1]))))
+'''
+
+
+def rss_kb():
+    """Текущий RSS процесса; без /proc — пиковый."""
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+class Command(BaseCommand):
+    help = ('Запускает по процессу на каждый профиль настроек '
+            '(YATUBE_ENV) и гоняет в нём через yatube.wsgi --requests '
+            'GET-запросов к страницам и API posts. Показывает RSS после '
+            'первых запросов, в конце и рост на 1000 запросов между '
+            'ними, а также сколько SQL держит connection.queries (с '
+            'DEBUG — все запросы текущего HTTP-запроса или команды). '
+            'Работает на данных, которые уже есть в базе: обработчик '
+            'закрывает соединение после запроса, и откатить '
+            'транзакцию с данными нельзя.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', choices=PROFILES,
+                            default=list(PROFILES))
+        parser.add_argument('--requests', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"профиль":<9}{"DEBUG":>6}{"старт, МБ":>11}'
+                          f'{"конец, МБ":>11}{"КБ/1000":>9}'
+                          f'{"SQL в логе":>12}{"запр/с":>9}{"ошибок":>8}')
+        for profile in options['profiles']:
+            result = self.spawn(profile, options)
+            rss = result['rss_kb']
+            measured = result['requests'] * (1 - 1 / len(rss))
+            growth = (rss[-1] - rss[0]) / measured * 1000 if measured else 0
+            self.stdout.write(
+                f'{profile:<9}{str(result["debug"]):>6}'
+                f'{rss[0] / 1024:>11.1f}{rss[-1] / 1024:>11.1f}'
+                f'{growth:>9.1f}{result["queries_log"]:>12}'
+                f'{result["requests"] / result["seconds"]:>9.0f}'
+                f'{result["errors"]:>8}')
+
+    def spawn(self, profile, options):
+        """Замер в отдельном процессе: профиль читается при импорте
+        настроек и в запущенном процессе не меняется."""
+        cache_dir = tempfile.mkdtemp()
+        env = dict(
+            os.environ,
+            YATUBE_ENV=profile,
+            DJANGO_SETTINGS_MODULE='yatube.settings',
+            YATUBE_ALLOWED_HOSTS=concurrency.HOST,
+            YATUBE_CACHE_DIR=cache_dir,
+        )
+        env.setdefault('YATUBE_SECRET_KEY', 'django-insecure-yatube-bench')
+        command = [sys.executable, '-c', MEASURE, str(options['requests'])]
+        try:
+            process = subprocess.run(command, env=env, capture_output=True,
+                                     text=True, cwd=settings.BASE_DIR)
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        if process.returncode:
+            raise CommandError(f'{profile}: {process.stderr[-2000:]}')
+        return json.loads(process.stdout.strip().splitlines()[-1])
+
+    def measure(self, requests):
+        targets = scenarios.targets()
+        if None in targets.values():
+            raise CommandError('В базе нет постов, групп или пользователей')
+        pages = [scenario for scenario in scenarios.build(**targets)
+                 if scenario.name.startswith('posts:')
+                 and scenario.method == 'get'
+                 and scenario.name not in WRITING_PAGES]
+        # тестовый Client на каждый запрос оставляет в weakref.finalize
+        # записи о подключённых сигналах и сам растил бы память, поэтому
+        # он только создаёт сессии, а запросы идут прямо в WSGI
+        from yatube.wsgi import application
+
+        clients = {}
+        for scenario in pages:
+            if scenario.user is not None and scenario.user not in clients:
+                clients[scenario.user] = Client()
+                clients[scenario.user].force_login(scenario.user)
+        cookies = {
+            user: f'{concurrency.COOKIE}; {settings.SESSION_COOKIE_NAME}='
+                  f'{client.cookies[settings.SESSION_COOKIE_NAME].value}'
+            for user, client in clients.items()}
+        step = max(requests // CHECKPOINTS, 1)
+        rss = []
+        errors = 0
+        started = time.perf_counter()
+        try:
+            for number in range(requests):
+                scenario = pages[number % len(pages)]
+                status = concurrency.wsgi_request(
+                    application, 'GET', scenario.url,
+                    cookie=cookies.get(scenario.user, concurrency.COOKIE))
+                errors += status >= 400
+                if (number + 1) % step == 0:
+                    gc.collect()
+                    rss.append(rss_kb())
+        finally:
+            for client in clients.values():
+                client.logout()
+        return {
+            'debug': settings.DEBUG,
+            'requests': requests,
+            'errors': errors,
+            'seconds': time.perf_counter() - started,
+            'rss_kb': rss,
+            'queries_log': len(connection.queries_log),
+        }
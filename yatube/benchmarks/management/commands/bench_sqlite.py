@@ -0,0 +1,117 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test import override_settings
+
+from benchmarks.runner import percentile
+from posts.models import Comment, Post, User
+
+# настройки по умолчанию до core.db.configure_sqlite
+ROLLBACK_JOURNAL = {'journal_mode': 'DELETE', 'synchronous': 'FULL',
+                    'busy_timeout': 5000}
+
+
+class Command(BaseCommand):
+    help = ('Читатели листают ленту, писатели в это время добавляют '
+            'комментарии: сравнение журнала отката по умолчанию и '
+            'SQLITE_PRAGMAS (WAL и остальные). Мерит копию базы во '
+            'временном файле, сама база не меняется.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Основная база не SQLite')
+        if not Post.objects.exists():
+            raise CommandError('В базе нет постов')
+        source = connection.settings_dict['NAME']
+        directory = tempfile.mkdtemp()
+        copy = os.path.join(directory, 'bench.sqlite3')
+        self.copy_database(source, copy)
+        connections.databases['default']['NAME'] = copy
+        connection.close()
+        try:
+            from django.conf import settings
+
+            profiles = {'журнал отката': ROLLBACK_JOURNAL,
+                        'SQLITE_PRAGMAS': settings.SQLITE_PRAGMAS}
+            self.stdout.write(f'{"профиль":<16}{"чтений/с":>10}'
+                              f'{"записей/с":>11}{"p95 чтения":>12}'
+                              f'{"p95 записи":>12}{"ошибок":>8}')
+            for name, pragmas in profiles.items():
+                with override_settings(SQLITE_PRAGMAS=pragmas):
+                    result = self.measure(options)
+                self.stdout.write(
+                    f'{name:<16}{result["reads"]:>10.0f}'
+                    f'{result["writes"]:>11.0f}{result["read_p95"]:>12.1f}'
+                    f'{result["write_p95"]:>12.1f}{result["errors"]:>8}')
+        finally:
+            connection.close()
+            connections.databases['default']['NAME'] = source
+            shutil.rmtree(directory, ignore_errors=True)
+
+    @staticmethod
+    def copy_database(source, target):
+        source, target = sqlite3.connect(source), sqlite3.connect(target)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+
+    def measure(self, options):
+        """Операции в секунду, p95 задержки в мс и число ошибок
+        database is locked за options['seconds'] секунд."""
+        post_ids = list(Post.objects.values_list('id', flat=True)[:100])
+        author = User.objects.order_by('id').first()
+        connection.close()
+        deadline = time.perf_counter() + options['seconds']
+        timings = {'read': [], 'write': []}
+        errors = []
+
+        def worker(kind):
+            number = 0
+            try:
+                while time.perf_counter() < deadline:
+                    number += 1
+                    started = time.perf_counter()
+                    try:
+                        if kind == 'read':
+                            list(Post.objects.for_feed()[:10])
+                        else:
+                            Comment.objects.create(
+                                post_id=post_ids[number % len(post_ids)],
+                                author=author, text='Комментарий')
+                    except OperationalError:
+                        errors.append(kind)
+                        continue
+                    timings[kind].append(
+                        (time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+
+        threads = (
+            [threading.Thread(target=worker, args=('read',))
+             for _ in range(options['readers'])]
+            + [threading.Thread(target=worker, args=('write',))
+               for _ in range(options['writers'])])
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {
+            'reads': len(timings['read']) / options['seconds'],
+            'writes': len(timings['write']) / options['seconds'],
+            'read_p95': percentile(timings['read'] or [0], 95),
+            'write_p95': percentile(timings['write'] or [0], 95),
+            'errors': len(errors),
+        }
@@ -0,0 +1,101 @@
+import copy
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+
+from benchmarks import runner, scenarios
+from benchmarks.seed import Seeder, Volumes
+from core.warmup import warm_templates
+
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+
+
+def templates_setting(cached):
+    """settings.TEMPLATES без debug, с cached loader или без него."""
+    templates = copy.deepcopy(settings.TEMPLATES)
+    options = templates[0]['OPTIONS']
+    options['debug'] = False
+    options['loaders'] = (
+        [(CACHED_LOADER, settings.TEMPLATE_LOADERS)] if cached
+        else settings.TEMPLATE_LOADERS)
+    return templates
+
+
+# название: cached loader, прогрев при старте
+MODES = (
+    ('без кэша', False, False),
+    ('cached', True, False),
+    ('cached + прогрев', True, True),
+)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает отрисовку HTML-страниц posts без кэша шаблонов, '
+            'с cached loader и с cached loader после прогрева: первый '
+            'запрос каждой страницы в свежем движке (холодный старт) и '
+            'среднее по последующим. Данные откатываются после замера.')
+
+    def add_arguments(self, parser):
+        defaults = Volumes()
+        parser.add_argument('--posts', type=int, default=defaults.posts)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--no-seed', action='store_true')
+        parser.add_argument('--requests', type=int, default=30)
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), override_settings(
+                REQUEST_TIMING_SAMPLE_RATE=1):
+            if not options['no_seed']:
+                started = time.perf_counter()
+                Seeder(Volumes(posts=options['posts']),
+                       options['seed']).seed()
+                self.stdout.write(f'Данные созданы за '
+                                  f'{time.perf_counter() - started:.1f} с')
+            self.measure(options['requests'])
+            transaction.set_rollback(True)
+
+    def measure(self, requests):
+        targets = scenarios.targets()
+        if None in targets.values():
+            raise CommandError('В базе нет постов, групп или пользователей')
+        pages = [scenario for scenario in scenarios.build(**targets)
+                 if scenario.name.startswith('posts:')
+                 and 'api' not in scenario.name
+                 and scenario.method == 'get']
+        # первый проход прогревает всё, кроме шаблонов: импорты, URL, SQL
+        self.render(pages, 1)
+        self.stdout.write(f'{"режим":<20}{"прогрев":>9}{"холодный":>10}'
+                          f'{"шаблоны":>9}{"прогретый":>11}{"шаблоны":>9}')
+        for title, cached, warm in MODES:
+            with override_settings(TEMPLATES=templates_setting(cached)):
+                started = time.perf_counter()
+                if warm:
+                    warm_templates()
+                warmup = time.perf_counter() - started
+                cold = self.render(pages, 1)
+                steady = self.render(pages, requests)
+            self.stdout.write(
+                f'{title:<20}{warmup * 1000:>9.1f}'
+                f'{cold[0] * 1000:>10.2f}{cold[1] * 1000:>9.2f}'
+                f'{steady[0] * 1000:>11.2f}{steady[1] * 1000:>9.2f}')
+        self.stdout.write('Прогрев — мс на весь каталог шаблонов, '
+                          'остальное — мс на страницу.')
+
+    @staticmethod
+    def render(pages, requests):
+        """Среднее общее время и время шаблонов страницы с пустым кэшем."""
+        client = Client()
+        total = templates = 0
+        for _ in range(requests):
+            for scenario in pages:
+                cache.clear()
+                runner.login(client, scenario)
+                timings = runner.send(client, scenario).wsgi_request.timings
+                total += timings.total
+                templates += timings.template_time
+        renders = requests * len(pages)
+        return total / renders, templates / renders
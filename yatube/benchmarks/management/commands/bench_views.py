@@ -0,0 +1,114 @@
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from benchmarks import runner, scenarios
+from benchmarks.seed import Seeder, Volumes
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу данными с перекосом и прогоняет все URL posts '
+            'и users через тестовый клиент: перцентили задержки, запросы '
+            'к базе и память на запрос. Данные откатываются после замера. '
+            'С --baseline сравнивает с прошлым прогоном и падает при '
+            'регрессии.')
+
+    def add_arguments(self, parser):
+        defaults = Volumes()
+        for volume in ('users', 'groups', 'posts', 'comments', 'follows'):
+            parser.add_argument(f'--{volume}', type=int,
+                                default=getattr(defaults, volume))
+        parser.add_argument('--skew', type=float, default=defaults.skew)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--no-seed', action='store_true',
+                            help='мерить на данных, которые уже есть в базе')
+        parser.add_argument('--requests', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--only', nargs='+', default=None,
+                            help='имена сценариев, например posts:index')
+        parser.add_argument('--output')
+        parser.add_argument('--baseline')
+        parser.add_argument('--threshold', type=float, default=0.2)
+
+    def handle(self, *args, **options):
+        volumes = Volumes(**{
+            name: options[name] for name in Volumes().as_dict()
+            if name in options})
+        with transaction.atomic():
+            if not options['no_seed']:
+                self.seed(volumes, options['seed'])
+            results = self.measure(options)
+            transaction.set_rollback(True)
+        report = {
+            'meta': self.meta(volumes, options),
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            self.check_baseline(results, options['baseline'],
+                                options['threshold'])
+
+    def seed(self, volumes, seed):
+        started = time.perf_counter()
+        Seeder(volumes, seed).seed()
+        self.stdout.write(f'Данные созданы за '
+                          f'{time.perf_counter() - started:.1f} с')
+
+    def measure(self, options):
+        targets = scenarios.targets()
+        if None in targets.values():
+            raise CommandError('В базе нет постов, групп или пользователей')
+        selected = scenarios.build(**targets)
+        missing = scenarios.uncovered(selected)
+        if missing:
+            self.stderr.write(f'Нет сценариев для: {", ".join(missing)}')
+        if options['only']:
+            selected = [scenario for scenario in selected
+                        if scenario.name in options['only']]
+        self.stdout.write(f'{"сценарий":<34}{"код":>5}{"p50":>9}{"p95":>9}'
+                          f'{"p99":>9}{"SQL":>5}{"КБ":>9}')
+        results = {}
+        for scenario in selected:
+            result = runner.run(scenario, options['requests'],
+                                options['warmup'])
+            results[scenario.name] = result
+            self.stdout.write(
+                f'{scenario.name:<34}{result["status"]:>5}'
+                f'{result["p50"]:>9.2f}{result["p95"]:>9.2f}'
+                f'{result["p99"]:>9.2f}{result["queries"]:>5}'
+                f'{result["allocated_kb"]:>9.1f}')
+        return results
+
+    @staticmethod
+    def meta(volumes, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True).stdout.strip()
+        except OSError:
+            commit = ''
+        return {
+            'commit': commit,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': settings.DATABASES['default']['ENGINE'],
+            'volumes': None if options['no_seed'] else volumes.as_dict(),
+            'requests': options['requests'],
+        }
+
+    def check_baseline(self, results, path, threshold):
+        with open(path) as source:
+            baseline = json.load(source)['results']
+        regressions = runner.compare(results, baseline, threshold)
+        if regressions:
+            raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+        self.stdout.write(f'Регрессий относительно {path} нет')
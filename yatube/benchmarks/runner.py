@@ -0,0 +1,83 @@
+import time
+import tracemalloc
+
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+PERCENTILES = (50, 95, 99)
+# меньшие изменения p95 — шум таймера, а не регрессия
+MIN_REGRESSION_MS = 1
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[rank - 1]
+
+
+def login(client, scenario):
+    """Вход выполняется заново перед каждым запросом, чтобы сценарий
+    logout не оставлял клиента анонимным."""
+    if scenario.user is not None:
+        client.force_login(scenario.user)
+
+
+def send(client, scenario):
+    return getattr(client, scenario.method)(scenario.url, scenario.data)
+
+
+def run(scenario, requests, warmup):
+    """Замеры сценария: перцентили задержки в миллисекундах, число
+    запросов к базе и пик выделенной памяти на прогретом запросе."""
+    client = Client()
+    for _ in range(warmup):
+        login(client, scenario)
+        send(client, scenario)
+    timings = []
+    for _ in range(requests):
+        login(client, scenario)
+        started = time.perf_counter()
+        send(client, scenario)
+        timings.append((time.perf_counter() - started) * 1000)
+    login(client, scenario)
+    # журнал запросов ограничен, заполненный он ничего не покажет
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        response = send(client, scenario)
+    login(client, scenario)
+    tracemalloc.start()
+    send(client, scenario)
+    allocated = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    result = {f'p{percent}': round(percentile(timings, percent), 3)
+              for percent in PERCENTILES}
+    result.update(
+        mean=round(sum(timings) / len(timings), 3),
+        status=response.status_code,
+        queries=len(queries),
+        allocated_kb=round(allocated / 1024, 1),
+    )
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Регрессии относительно baseline: рост p95 больше чем в
+    1 + threshold раз и на MIN_REGRESSION_MS, любой рост числа
+    запросов к базе."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        slower = result['p95'] - before['p95']
+        if (result['p95'] > before['p95'] * (1 + threshold)
+                and slower > MIN_REGRESSION_MS):
+            regressions.append(
+                f'{name}: p95 {before["p95"]} -> {result["p95"]} мс')
+        if result['queries'] > before['queries']:
+            regressions.append(
+                f'{name}: запросов {before["queries"]} -> '
+                f'{result["queries"]}')
+    return regressions
@@ -0,0 +1,119 @@
+from django.contrib.auth.tokens import default_token_generator
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from posts import urls as posts_urls
+from posts.models import Group, Post, User
+from users import urls as users_urls
+
+from .seed import PASSWORD
+
+SEARCH_QUERY = 'река'
+
+
+class Scenario:
+    """Запрос к одному URL: от имени user, если он задан."""
+
+    def __init__(self, name, url, user=None, method='get', data=None):
+        self.name = name
+        self.url = url
+        self.user = user
+        self.method = method
+        self.data = data or {}
+
+
+def url_names():
+    """Имена всех URL приложений posts и users."""
+    return {
+        f'{module.app_name}:{pattern.name}'
+        for module in (posts_urls, users_urls)
+        for pattern in module.urlpatterns
+    }
+
+
+def targets():
+    """Самые нагруженные объекты базы: популярный автор, самый
+    активный читатель, самая большая группа и самый обсуждаемый пост."""
+    users = User.objects.select_related('profile')
+    return {
+        'author': users.order_by('-profile__followers_count', 'id').first(),
+        'reader': users.order_by('-profile__following_count', 'id').first(),
+        'group': Group.objects.order_by('-posts_count', 'id').first(),
+        'post': Post.objects.select_related('author').order_by(
+            '-comments_count', '-id').first(),
+    }
+
+
+def build(author, reader, group, post):
+    """Сценарии для всех URL posts и users."""
+    profile = {'username': author.username}
+    reset = {'uidb64': urlsafe_base64_encode(force_bytes(author.pk)),
+             'token': default_token_generator.make_token(author)}
+    return [
+        Scenario('posts:index', reverse('posts:index')),
+        Scenario('posts:index?page=50', reverse('posts:index') + '?page=50'),
+        Scenario('posts:group_list',
+                 reverse('posts:group_list', args=[group.slug])),
+        Scenario('posts:profile', reverse('posts:profile', kwargs=profile)),
+        Scenario('posts:post_detail',
+                 reverse('posts:post_detail', args=[post.pk])),
+        Scenario('posts:post_comments',
+                 reverse('posts:post_comments', args=[post.pk])),
+        Scenario('posts:post_create', reverse('posts:post_create'),
+                 user=author),
+        Scenario('posts:post_create POST', reverse('posts:post_create'),
+                 user=author, method='post', data={'text': 'Новый пост'}),
+        Scenario('posts:post_edit',
+                 reverse('posts:post_edit', args=[post.pk]),
+                 user=post.author),
+        Scenario('posts:add_comment POST',
+                 reverse('posts:add_comment', args=[post.pk]),
+                 user=reader, method='post', data={'text': 'Комментарий'}),
+        Scenario('posts:follow_index', reverse('posts:follow_index'),
+                 user=reader),
+        Scenario('posts:profile_follow',
+                 reverse('posts:profile_follow', kwargs=profile),
+                 user=reader),
+        Scenario('posts:profile_unfollow',
+                 reverse('posts:profile_unfollow', kwargs=profile),
+                 user=reader),
+        Scenario('posts:api_index', reverse('posts:api_index')),
+        Scenario('posts:api_group_list',
+                 reverse('posts:api_group_list', args=[group.slug])),
+        Scenario('posts:api_profile',
+                 reverse('posts:api_profile', kwargs=profile)),
+        Scenario('posts:api_follow_index', reverse('posts:api_follow_index'),
+                 user=reader),
+        Scenario('posts:api_post_detail',
+                 reverse('posts:api_post_detail', args=[post.pk])),
+        Scenario('posts:api_post_comments',
+                 reverse('posts:api_post_comments', args=[post.pk])),
+        Scenario('posts:search',
+                 reverse('posts:search') + f'?q={SEARCH_QUERY}'),
+        Scenario('posts:search_api',
+                 reverse('posts:search_api') + f'?q={SEARCH_QUERY}'),
+        Scenario('users:login', reverse('users:login')),
+        Scenario('users:login POST', reverse('users:login'), method='post',
+                 data={'username': author.username, 'password': PASSWORD}),
+        Scenario('users:logout', reverse('users:logout'), user=reader),
+        Scenario('users:signup', reverse('users:signup')),
+        Scenario('users:password_change', reverse('users:password_change'),
+                 user=reader),
+        Scenario('users:password_change_done',
+                 reverse('users:password_change_done'), user=reader),
+        Scenario('users:password_reset_form',
+                 reverse('users:password_reset_form')),
+        Scenario('users:password_reset_done',
+                 reverse('users:password_reset_done')),
+        Scenario('users:password_reset_confirm',
+                 reverse('users:password_reset_confirm', kwargs=reset)),
+        Scenario('users:password_reset_complete',
+                 reverse('users:password_reset_complete')),
+    ]
+
+
+def uncovered(scenarios):
+    covered = {scenario.name.split()[0].split('?')[0]
+               for scenario in scenarios}
+    return url_names() - covered
@@ -0,0 +1,137 @@
+"""Наполнение базы данными с перекосом, как на живом сайте.
+
+Подписчики, посты и комментарии распределены по степенному закону:
+у немногих авторов почти все подписчики, немногие группы собирают
+почти все посты, обсуждают в основном немногие посты.
+"""
+import itertools
+import random
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.utils import timezone
+
+from posts import search
+from posts.counters import rebuild_counters
+from posts.models import Comment, Follow, Group, Post, User
+from posts.transfer import keep_dates
+
+PASSWORD = 'bench-password'
+USERNAME = 'bench_{}'
+WORDS = ('река', 'город', 'утро', 'дорога', 'лес', 'море', 'книга', 'дом',
+         'поезд', 'письмо', 'зима', 'сад', 'ночь', 'песня', 'окно', 'друг')
+BATCH_SIZE = 10000
+
+
+class Volumes:
+    def __init__(self, users=2000, groups=50, posts=50000, comments=100000,
+                 follows=20000, skew=1.1, days=365):
+        self.users = users
+        self.groups = groups
+        self.posts = posts
+        self.comments = comments
+        self.follows = follows
+        self.skew = skew
+        self.days = days
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class Seeder:
+    def __init__(self, volumes, seed=0):
+        self.volumes = volumes
+        self.random = random.Random(seed)
+
+    def weights(self, size):
+        """Накопленные веса закона Ципфа для random.choices."""
+        return list(itertools.accumulate(
+            1 / rank ** self.volumes.skew for rank in range(1, size + 1)))
+
+    def pick(self, population, weights, count):
+        return self.random.choices(population, cum_weights=weights, k=count)
+
+    def chunks(self, total):
+        for start in range(0, total, BATCH_SIZE):
+            yield min(BATCH_SIZE, total - start)
+
+    def seed(self):
+        self.create_users()
+        self.create_groups()
+        self.create_posts()
+        self.create_comments()
+        self.create_follows()
+        rebuild_counters()
+        search.rebuild()
+        if settings.FOLLOW_TIMELINE:
+            call_command('rebuild_timelines', stdout=StringIO())
+
+    def create_users(self):
+        first = User.objects.create_user(USERNAME.format(0), password=PASSWORD)
+        User.objects.bulk_create(
+            User(username=USERNAME.format(number), password=first.password,
+                 first_name='Имя', last_name=f'Фамилия {number}')
+            for number in range(1, self.volumes.users))
+        # по убыванию популярности
+        self.user_ids = list(User.objects.filter(
+            username__startswith='bench_').order_by('id').values_list(
+            'id', flat=True))
+        self.user_weights = self.weights(len(self.user_ids))
+
+    def create_groups(self):
+        Group.objects.bulk_create(
+            Group(title=f'Группа {number}', slug=f'bench-{number}',
+                  description='Описание группы')
+            for number in range(self.volumes.groups))
+        self.group_ids = list(Group.objects.filter(
+            slug__startswith='bench-').order_by('id').values_list(
+            'id', flat=True))
+        self.group_weights = self.weights(len(self.group_ids))
+
+    def text(self, length):
+        return ' '.join(self.random.choices(WORDS, k=length))
+
+    def moment(self):
+        return timezone.now() - timedelta(
+            seconds=self.random.uniform(0, self.volumes.days * 86400))
+
+    def create_posts(self):
+        for size in self.chunks(self.volumes.posts):
+            authors = self.pick(self.user_ids, self.user_weights, size)
+            groups = self.pick(self.group_ids, self.group_weights, size)
+            with keep_dates():
+                Post.objects.bulk_create(
+                    Post(author_id=author, text=self.text(30),
+                         pub_date=self.moment(),
+                         group_id=group if self.random.random() < 0.7
+                         else None)
+                    for author, group in zip(authors, groups))
+        self.post_ids = list(Post.objects.filter(
+            author__username__startswith='bench_').order_by(
+            '-pub_date').values_list('id', flat=True))
+
+    def create_comments(self):
+        # обсуждают в основном свежие посты
+        weights = self.weights(len(self.post_ids))
+        for size in self.chunks(self.volumes.comments):
+            with keep_dates():
+                Comment.objects.bulk_create(
+                    Comment(post_id=post, text=self.text(8),
+                            author_id=self.random.choice(self.user_ids),
+                            created=self.moment())
+                    for post in self.pick(self.post_ids, weights, size))
+
+    def create_follows(self):
+        pairs = set()
+        attempts = 0
+        while (len(pairs) < self.volumes.follows
+               and attempts < self.volumes.follows * 10):
+            attempts += 1
+            user = self.random.choice(self.user_ids)
+            author = self.pick(self.user_ids, self.user_weights, 1)[0]
+            if user != author:
+                pairs.add((user, author))
+        Follow.objects.bulk_create(
+            Follow(user_id=user, author_id=author) for user, author in pairs)
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from django.test import SimpleTestCase, TransactionTestCase
+from django.urls import reverse
+
+from yatube.asgi import ThreadPoolWsgiToAsgi
+from yatube.asgi import application as asgi_application
+from yatube.wsgi import application as wsgi_application
+
+from .. import concurrency
+
+
+class ConcurrencyTest(TransactionTestCase):
+    """Запросы идут через настоящие yatube.wsgi и yatube.asgi в других
+    потоках, поэтому данные должны быть закоммичены."""
+
+    def setUp(self):
+        self.load = concurrency.Load(
+            fast_path=reverse('about:author'),
+            slow_path=reverse('users:login'),
+            fast=3, slow=1,
+            body=f'csrfmiddlewaretoken={concurrency.CSRF_TOKEN}'.encode(),
+            chunks=3, delay=0.1)
+        self.slow_ms = self.load.chunks * self.load.delay * 1000
+
+    def test_slow_client_holds_wsgi_worker(self):
+        """Единственный WSGI-воркер занят медленным клиентом"""
+        result = concurrency.run_wsgi(wsgi_application, self.load, 1)
+        self.assertEqual(result['statuses'], [200])
+        self.assertGreaterEqual(min(result['latencies']), self.slow_ms)
+
+    def test_asgi_serves_during_slow_upload(self):
+        """ASGI отвечает быстрым клиентам, пока тело ещё передаётся"""
+        result = concurrency.run_asgi(asgi_application, self.load)
+        self.assertEqual(result['statuses'], [200])
+        self.assertLess(max(result['latencies']), self.slow_ms)
+        self.assertGreaterEqual(result['total'] * 1000, self.slow_ms)
+
+
+class ThreadPoolWsgiToAsgiTest(SimpleTestCase):
+    def test_requests_overlap(self):
+        """Запросы выполняются в пуле потоков одновременно, а не по
+        очереди в одном потоке, как у asgiref.WsgiToAsgi"""
+        delay, requests = 0.2, 4
+
+        def slow_view(environ, start_response):
+            time.sleep(delay)
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [b'ok']
+
+        application = ThreadPoolWsgiToAsgi(slow_view, requests)
+
+        async def main():
+            return await asyncio.gather(*(
+                concurrency.asgi_request(application, 'GET', '/')
+                for _ in range(requests)))
+
+        started = time.perf_counter()
+        self.assertEqual(asyncio.run(main()), [200] * requests)
+        self.assertLess(time.perf_counter() - started, delay * 2)
@@ -0,0 +1,62 @@
+from django.test import TestCase
+
+from posts.models import Follow, Group, Post, User
+
+from .. import runner, scenarios
+from ..boot import parse_importtime
+from ..management.commands.bench_memory import Command as BenchMemory
+from ..seed import Seeder, Volumes
+
+
+class BenchViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Seeder(Volumes(users=20, groups=3, posts=200, comments=300,
+                       follows=40)).seed()
+
+    def test_seed_is_skewed(self):
+        """Популярный автор собирает больше подписчиков, чем остальные"""
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Group.objects.count(), 3)
+        author = scenarios.targets()['author']
+        self.assertGreater(
+            Follow.objects.filter(author=author).count(),
+            Follow.objects.count() / User.objects.count())
+
+    def test_all_urls_answer(self):
+        """Сценарии покрывают все URL posts и users и отвечают без ошибок"""
+        selected = scenarios.build(**scenarios.targets())
+        self.assertEqual(scenarios.uncovered(selected), set())
+        for scenario in selected:
+            with self.subTest(scenario=scenario.name):
+                result = runner.run(scenario, requests=2, warmup=0)
+                self.assertLess(result['status'], 400)
+                self.assertLessEqual(result['p50'], result['p99'])
+
+    def test_compare(self):
+        """Регрессией считается заметный рост p95 или рост числа запросов"""
+        baseline = {'index': {'p95': 10, 'queries': 1}}
+        self.assertEqual(runner.compare(
+            {'index': {'p95': 11, 'queries': 1}}, baseline, 0.2), [])
+        self.assertEqual(len(runner.compare(
+            {'index': {'p95': 13, 'queries': 2}}, baseline, 0.2)), 2)
+
+    def test_memory_run(self):
+        """Замер памяти в процессе отдаёт RSS по контрольным точкам"""
+        result = BenchMemory().measure(20)
+        self.assertEqual(result['requests'], 20)
+        self.assertEqual(result['errors'], 0)
+        self.assertEqual(len(result['rss_kb']), 10)
+
+    def test_parse_importtime(self):
+        lines = [
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |   posts.stemmer',
+            'import time:      4000 |       4120 | posts.search',
+            'Traceback (most recent call last):',
+        ]
+        self.assertEqual(parse_importtime(lines), {
+            'posts.stemmer': (0.12, 0.12),
+            'posts.search': (4.0, 4.12),
+        })
@@ -3,3 +3,16 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.core.signals import request_started
+        from django.db.backends.signals import connection_created
+
+        from .db import check_connections, configure_sqlite
+        from .timing import (instrument_context_processors,
+                             instrument_templates)
+
+        instrument_templates()
+        instrument_context_processors()
+        request_started.connect(check_connections)
+        connection_created.connect(configure_sqlite)
@@ -0,0 +1,171 @@
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .timing import record_cache
+
+LOG_HEAD_KEY = 'tiered_cache_log'
+MISSING = object()
+
+# номер последней записи журнала удалений, которую видел локальный
+# уровень, и время сверки
+_seen_heads = {}
+
+
+def log_key(number):
+    return f'{LOG_HEAD_KEY}:{number}'
+
+
+class TieredCache(BaseCache):
+    """Двухуровневый кэш: LRU в памяти процесса перед общим хранилищем.
+
+    Чтение сначала идёт в локальный уровень, записи уходят в оба.
+    delete и delete_many дописывают удалённые ключи в журнал в общем
+    уровне; процесс сверяется с журналом не чаще раза в CHECK_INTERVAL
+    секунд и удаляет у себя только эти ключи. Весь локальный уровень
+    очищается после clear или если процесс отстал от журнала больше
+    чем на LOG_LENGTH записей. Перезапись ключа другим процессом
+    становится видна не позже чем через LOCAL_TIMEOUT секунд.
+
+    Номера записей журнала выдаёт incr общего уровня, поэтому общему
+    уровню нужен атомарный incr: memcached, Redis или LocMemCache.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.local_alias = options.get('LOCAL', 'local')
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.check_interval = options.get('CHECK_INTERVAL', 1)
+        self.log_length = options.get('LOG_LENGTH', 100)
+        self.log_timeout = options.get('LOG_TIMEOUT', 300)
+
+    @property
+    def local(self):
+        return caches[self.local_alias]
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.shared.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def _sync(self):
+        seen, checked_at = _seen_heads.get(self.local_alias, (None, 0))
+        now = time.monotonic()
+        if now - checked_at < self.check_interval:
+            return
+        head = self.shared.get(LOG_HEAD_KEY)
+        if seen is not None and head != seen:
+            self._replay(seen, head)
+        _seen_heads[self.local_alias] = (head, now)
+
+    def _replay(self, seen, head):
+        """Удаляет из локального уровня ключи записей журнала после
+        seen; если их уже не прочесть, очищает уровень целиком."""
+        if head is None or not 0 < head - seen <= self.log_length:
+            self.local.clear()
+            return
+        numbers = range(seen + 1, head + 1)
+        entries = self.shared.get_many(log_key(number) for number in numbers)
+        if len(entries) < len(numbers):
+            self.local.clear()
+            return
+        for version, keys in entries.values():
+            self.local.delete_many(keys, version=version)
+
+    def _log(self, keys, version):
+        try:
+            number = self.shared.incr(LOG_HEAD_KEY)
+        except ValueError:
+            # журнала ещё нет или его стёр clear: новое начало отличается
+            # от любого виденного, и отставшие процессы очистят уровень
+            self.shared.add(LOG_HEAD_KEY, time.time_ns(), None)
+            number = self.shared.incr(LOG_HEAD_KEY)
+        self.shared.set(log_key(number), (version, keys), self.log_timeout)
+
+    def get(self, key, default=None, version=None):
+        self._sync()
+        value = self.local.get(key, MISSING, version=version)
+        if value is not MISSING:
+            record_cache(1, 0)
+            return value
+        value = self.shared.get(key, MISSING, version=version)
+        if value is MISSING:
+            record_cache(0, 1)
+            return default
+        record_cache(1, 0)
+        self.local.set(key, value, self.local_timeout, version=version)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._sync()
+        keys = list(keys)
+        found = self.local.get_many(keys, version=version)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            fetched = self.shared.get_many(missing, version=version)
+            self.local.set_many(fetched, self.local_timeout, version=version)
+            found.update(fetched)
+        record_cache(len(found), len(keys) - len(found))
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self.local.set(key, value, self._local_timeout(timeout),
+                       version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        self.local.set_many(data, self._local_timeout(timeout),
+                            version=version)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self.local.set(key, value, self._local_timeout(timeout),
+                           version=version)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        self.local.delete(key, version=version)
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.shared.delete(key, version=version)
+        self.local.delete(key, version=version)
+        self._log([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return
+        self.shared.delete_many(keys, version=version)
+        self.local.delete_many(keys, version=version)
+        self._log(keys, version)
+
+    def clear(self):
+        self.shared.clear()
+        self.local.clear()
+        head = time.time_ns()
+        self.shared.set(LOG_HEAD_KEY, head, None)
+        _seen_heads[self.local_alias] = (head, time.monotonic())
+
+    def close(self, **kwargs):
+        # уровни — тоже кэши из CACHES, и close_caches закрывает их сам;
+        # обращение к ним отсюда создало бы кэш в новом потоке посреди
+        # обхода caches.all()
+        pass
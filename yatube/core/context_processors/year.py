@@ -1,6 +1,17 @@
-from datetime import date
+import time
+from datetime import date, datetime, timedelta
+
+# год не меняется до полуночи: словарь отдаётся готовым
+_context = {}
+_refresh_at = 0
 
 
 def year(request):
-    current_year = date.today()
-    return {'year': current_year.year}
+    global _context, _refresh_at
+    if time.time() >= _refresh_at:
+        today = date.today()
+        midnight = datetime.combine(today + timedelta(days=1),
+                                    datetime.min.time())
+        _context = {'year': today.year}
+        _refresh_at = midnight.timestamp()
+    return _context
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def check_connections(**kwargs):
+    """Проверка постоянных соединений перед запросом.
+
+    Django 2.2 проверяет соединение с CONN_MAX_AGE, только если на нём
+    уже была ошибка, и первый запрос после обрыва связи с базой
+    падает. Для баз с CONN_HEALTH_CHECKS (так же называется настройка
+    в Django 4.1+) открытое соединение проверяется заранее и при
+    необходимости закрывается: Django откроет новое.
+    """
+    for connection in connections.all():
+        if (connection.connection is not None
+                and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+                and not connection.is_usable()):
+            connection.close()
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """PRAGMA из settings.SQLITE_PRAGMAS для нового соединения SQLite.
+
+    WAL даёт читать во время записи, synchronous=NORMAL в режиме WAL
+    не теряет целостность, а busy_timeout заставляет писателя ждать
+    блокировку вместо ошибки database is locked.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def estimated_count(model, using=DEFAULT_DB_ALIAS):
+    """Число строк таблицы модели по статистике планировщика.
+
+    COUNT(*) читает таблицу или индекс целиком. PostgreSQL держит
+    оценку в pg_class.reltuples, SQLite — в sqlite_stat1 после ANALYZE
+    или PRAGMA optimize (optimize_sqlite). None, если статистики нет.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [connection.ops.quote_name(table)])
+        elif connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master "
+                           "WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            # первое число stat у каждого индекса — строк в таблице
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    # reltuples равен -1 или 0 у таблицы, которую ещё не анализировали
+    return estimate if estimate > 0 else None
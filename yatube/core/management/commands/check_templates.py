@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Engine, TemplateSyntaxError, engines
+
+from core.warmup import template_names
+
+
+def checking_engine():
+    """Копия движка проекта без кэша шаблонов и с debug: каждый шаблон
+    разбирается заново, а ошибка знает свою строку."""
+    engine = engines['django'].engine
+    return Engine(
+        dirs=engine.dirs,
+        debug=True,
+        loaders=settings.TEMPLATE_LOADERS,
+        libraries=engine.libraries,
+        builtins=engine.builtins[len(Engine.default_builtins):],
+        string_if_invalid=engine.string_if_invalid,
+        autoescape=engine.autoescape,
+    )
+
+
+class Command(BaseCommand):
+    help = ('Разбирает все шаблоны проекта и сообщает об ошибках с '
+            'файлом и строкой. Запускается перед деплоем: код выхода 1, '
+            'если хоть один шаблон не разбирается.')
+
+    def handle(self, *args, **options):
+        engine = checking_engine()
+        spent = {}
+        errors = []
+        for name in template_names(engine):
+            started = time.perf_counter()
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as error:
+                errors.append(self.describe(name, error))
+            spent[name] = time.perf_counter() - started
+        for message in errors:
+            self.stderr.write(message)
+        self.stdout.write(f'Шаблонов: {len(spent)}, разобраны за '
+                          f'{sum(spent.values()) * 1000:.1f} мс')
+        if options['verbosity'] > 1:
+            for name in sorted(spent, key=spent.get, reverse=True):
+                self.stdout.write(f'  {name:<40}{spent[name] * 1000:>8.2f}')
+        if errors:
+            raise CommandError(f'Ошибок в шаблонах: {len(errors)}')
+
+    @staticmethod
+    def describe(name, error):
+        debug = getattr(error, 'template_debug', None)
+        if debug is None:
+            return f'{name}: {error}'
+        return f'{debug["name"]}:{debug["line"]}: {error}'
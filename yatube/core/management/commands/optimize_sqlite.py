@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+
+
+class Command(BaseCommand):
+    help = ('Обслуживание баз SQLite: PRAGMA optimize обновляет '
+            'статистику планировщика, wal_checkpoint переносит журнал WAL '
+            'в файл базы и не даёт ему расти. Запускается по cron или '
+            'с --interval.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checkpoint', choices=CHECKPOINT_MODES,
+                            default='TRUNCATE')
+        parser.add_argument('--interval', type=float, default=0,
+                            help='секунд между запусками; 0 — один раз')
+
+    def handle(self, *args, **options):
+        while True:
+            for connection in connections.all():
+                if connection.vendor == 'sqlite':
+                    self.optimize(connection, options['checkpoint'])
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def optimize(self, connection, mode):
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA optimize')
+            cursor.execute('PRAGMA journal_mode')
+            if cursor.fetchone()[0] != 'wal':
+                self.stdout.write(f'{connection.alias}: optimize за '
+                                  f'{time.perf_counter() - started:.2f} с, '
+                                  f'журнал не WAL')
+                return
+            cursor.execute(f'PRAGMA wal_checkpoint({mode})')
+            busy, log_pages, moved = cursor.fetchone()
+        self.stdout.write(
+            f'{connection.alias}: optimize и checkpoint {mode} за '
+            f'{time.perf_counter() - started:.2f} с, страниц WAL '
+            f'{log_pages}, перенесено {moved}'
+            f'{", база была занята" if busy else ""}')
@@ -0,0 +1,51 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+SQLITE = 'django.db.backends.sqlite3'
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в файлы реплик из '
+            'DATABASE_REPLICAS через backup API SQLite. Заменяет '
+            'репликацию при локальной проверке чтения с реплик; '
+            'с --interval повторяет копирование, как отстающая реплика.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='секунд между копиями; 0 — один раз')
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены: задайте '
+                               'YATUBE_REPLICA_DB')
+        aliases = ['default'] + list(settings.DATABASE_REPLICAS)
+        for alias in aliases:
+            if connections[alias].settings_dict['ENGINE'] != SQLITE:
+                raise CommandError(f'{alias} не SQLite: реплики '
+                                   f'PostgreSQL наполняет репликация')
+        while True:
+            self.sync(aliases)
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def sync(self, aliases):
+        started = time.perf_counter()
+        source = sqlite3.connect(connections['default'].settings_dict['NAME'])
+        try:
+            for alias in aliases[1:]:
+                connections[alias].close()
+                target = sqlite3.connect(
+                    connections[alias].settings_dict['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+        finally:
+            source.close()
+        self.stdout.write(f'Реплики {", ".join(aliases[1:])} обновлены за '
+                          f'{time.perf_counter() - started:.2f} с')
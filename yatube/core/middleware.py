@@ -0,0 +1,84 @@
+import json
+import logging
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import routers, timing
+
+logger = logging.getLogger('yatube.slow_requests')
+
+
+class RequestTimingMiddleware:
+    """Замеряет долю REQUEST_TIMING_SAMPLE_RATE запросов.
+
+    В ответ добавляется заголовок Server-Timing, а запросы дольше
+    SLOW_REQUEST_MS, с числом SQL больше SLOW_REQUEST_QUERIES или
+    повторов одного SQL больше SLOW_REQUEST_DUPLICATES пишутся в журнал
+    yatube.slow_requests одной строкой JSON. Замеры доступны и как
+    request.timings. Ставится первым в MIDDLEWARE, чтобы total
+    покрывал остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.REQUEST_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        timings, token = timing.start()
+        request.timings = timings
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timings.execute))
+                response = self.get_response(request)
+        finally:
+            timing.stop(token)
+        timings.finish()
+        response['Server-Timing'] = timings.server_timing()
+        if self.is_slow(timings):
+            self.log(request, response, timings)
+        return response
+
+    @staticmethod
+    def is_slow(timings):
+        return (timings.total * 1000 > settings.SLOW_REQUEST_MS
+                or timings.queries > settings.SLOW_REQUEST_QUERIES
+                or timings.duplicates > settings.SLOW_REQUEST_DUPLICATES)
+
+    @staticmethod
+    def log(request, response, timings):
+        record = {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+        }
+        record.update(timings.as_dict())
+        logger.warning(json.dumps(record, ensure_ascii=False))
+
+
+class ReplicaMiddleware:
+    """Разрешает читать с реплик GET/HEAD-запросам клиентов без cookie
+    недавней записи и ставит эту cookie, если запрос что-то записал."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas = (bool(settings.DATABASE_REPLICAS)
+                    and request.method in ('GET', 'HEAD')
+                    and routers.STICKY_COOKIE not in request.COOKIES)
+        routing, token = routers.start(replicas)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.stop(token)
+        if routing.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                routers.STICKY_COOKIE, '1', httponly=True, samesite='Lax',
+                max_age=settings.REPLICA_STICKY_SECONDS)
+        return response
@@ -0,0 +1,107 @@
+"""Чтение с реплик, запись в основную базу.
+
+Реплики — псевдонимы из settings.DATABASE_REPLICAS. Реплика читается
+только внутри запроса, который ReplicaMiddleware разрешил читать с
+реплик: команды и фоновые задачи всегда работают с основной базой.
+Запрос, который что-то записал, ставит клиенту cookie, и следующие
+REPLICA_STICKY_SECONDS секунд его запросы читают из основной базы:
+пользователь сразу видит собственный пост или комментарий, даже если
+реплика отстаёт. Весь запрос читает с одной реплики, выбранной при
+первом чтении: реплики отстают по-разному, и запросы одной страницы
+иначе видели бы разные состояния базы. Данные, прочитанные с реплики,
+попадают в общий кэш, только если это разрешает settled.
+"""
+import contextvars
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+
+PRIMARY = 'default'
+STICKY_COOKIE = 'primary_db'
+
+_state = contextvars.ContextVar('replica_routing', default=None)
+
+
+class Routing:
+    def __init__(self, replicas):
+        self.replicas = replicas
+        self.wrote = False
+        # реплика, выбранная первым чтением запроса
+        self.replica = None
+
+    def pin(self):
+        self.replicas = False
+
+
+def start(replicas):
+    routing = Routing(replicas)
+    return routing, _state.set(routing)
+
+
+def stop(token):
+    _state.reset(token)
+
+
+def pin_primary():
+    """Остаток текущего запроса читает из основной базы."""
+    routing = _state.get()
+    if routing is not None:
+        routing.pin()
+
+
+def reads_replica():
+    """Читал или может читать текущий запрос с реплик."""
+    routing = _state.get()
+    return routing is not None and bool(routing.replicas
+                                        or routing.replica)
+
+
+def settled(stamp):
+    """Видны ли текущему запросу все записи, сделанные до stamp
+    (time.time_ns()).
+
+    Поколения лент и версии карточек создаются заново после записи,
+    поэтому данные под ними можно кэшировать, только если они
+    прочитаны из основной базы или с реплики, которая уже догнала эту
+    запись: реплика отстаёт не больше REPLICA_STICKY_SECONDS.
+    """
+    if not reads_replica():
+        return True
+    return time.time_ns() - stamp > settings.REPLICA_STICKY_SECONDS * 10 ** 9
+
+
+def use_primary(view):
+    """View, которая пишет или сразу читает своё, работает с основной
+    базой целиком, включая чтения до первой записи."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        pin_primary()
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _state.get()
+        if routing is None or not routing.replicas:
+            return PRIMARY
+        if routing.replica is None:
+            routing.replica = random.choice(settings.DATABASE_REPLICAS)
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _state.get()
+        if routing is not None:
+            # после записи запрос дочитывает своё из основной базы
+            routing.wrote = True
+            routing.pin()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Реплики получают схему вместе с данными от основной базы."""
+        return db not in settings.DATABASE_REPLICAS
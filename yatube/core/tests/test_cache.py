@@ -0,0 +1,88 @@
+import multiprocessing
+import shutil
+import tempfile
+
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, override_settings
+
+CACHE_DIR = tempfile.mkdtemp()
+TIERED_CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TieredCache',
+        'OPTIONS': {'LOCAL': 'local', 'SHARED': 'shared',
+                    'CHECK_INTERVAL': 0},
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tiered-test',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+    },
+}
+
+
+def run_in_worker(command, key, value=None):
+    """Выполняет операцию с кэшем в отдельном процессе-воркере."""
+    def worker(queue):
+        caches['local'].clear()
+        if command == 'set':
+            cache.set(key, value)
+        elif command == 'delete':
+            cache.delete(key)
+        elif command == 'clear':
+            cache.clear()
+        queue.put(cache.get(key))
+
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    process = context.Process(target=worker, args=(queue,))
+    process.start()
+    result = queue.get(timeout=10)
+    process.join()
+    return result
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class TieredCacheTest(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_local_tier_serves_reads(self):
+        """Прочитанное значение попадает в локальный уровень"""
+        caches['shared'].set('key', 'value')
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertEqual(caches['local'].get('key'), 'value')
+        self.assertEqual(cache.get_many(['key', 'missing']),
+                         {'key': 'value'})
+
+    def test_value_shared_between_processes(self):
+        """Запись одного процесса видна другому"""
+        cache.set('key', 'parent')
+        self.assertEqual(run_in_worker('get', 'key'), 'parent')
+        run_in_worker('set', 'other', 'child')
+        self.assertEqual(cache.get('other'), 'child')
+
+    def test_delete_invalidates_other_processes(self):
+        """Удаление в другом процессе сбрасывает у этого только ключ"""
+        cache.set_many({'key': 'value', 'other': 'value'})
+        cache.get('key')
+        self.assertEqual(caches['local'].get('key'), 'value')
+        self.assertIsNone(run_in_worker('delete', 'key'))
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(caches['local'].get('other'), 'value')
+
+    def test_clear_invalidates_other_processes(self):
+        """clear в другом процессе очищает весь локальный уровень"""
+        cache.set('key', 'value')
+        cache.get('key')
+        caches['local'].set('other', 'value')
+        self.assertIsNone(run_in_worker('clear', 'key'))
+        self.assertIsNone(cache.get('key'))
+        self.assertIsNone(caches['local'].get('other'))
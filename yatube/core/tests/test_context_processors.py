@@ -0,0 +1,19 @@
+from datetime import date
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ..context_processors import year
+
+
+class YearTest(SimpleTestCase):
+    def test_year_refreshed_after_midnight(self):
+        """Год берётся из памяти до полуночи и пересчитывается после"""
+        self.assertEqual(year.year(None), {'year': date.today().year})
+        with mock.patch.object(year, 'date') as fake_date:
+            fake_date.today.return_value = date(2030, 1, 1)
+            self.assertEqual(year.year(None)['year'], date.today().year)
+            with mock.patch.object(year.time, 'time',
+                                   return_value=year._refresh_at):
+                self.assertEqual(year.year(None), {'year': 2030})
+        year._refresh_at = 0
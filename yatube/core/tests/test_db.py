@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from ..db import check_connections
+
+
+class SqlitePragmasTest(TestCase):
+    def test_pragmas_applied(self):
+        """Новое соединение получает PRAGMA из SQLITE_PRAGMAS"""
+        with connection.cursor() as cursor:
+            for pragma, value in (('busy_timeout', 5000),
+                                  ('synchronous', 1),
+                                  ('temp_store', 2)):
+                cursor.execute(f'PRAGMA {pragma}')
+                self.assertEqual(cursor.fetchone()[0], value, pragma)
+
+    def test_file_database_uses_wal(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        wrapper = DatabaseWrapper(dict(
+            connection.settings_dict,
+            NAME=os.path.join(directory, 'wal.sqlite3')), 'wal_test')
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+
+
+class OptimizeSqliteTest(TransactionTestCase):
+    """PRAGMA optimize не выполняется внутри транзакции TestCase."""
+
+    def test_optimize_command(self):
+        output = StringIO()
+        call_command('optimize_sqlite', checkpoint='PASSIVE', stdout=output)
+        # тестовая база в памяти живёт без WAL
+        self.assertIn('default: optimize', output.getvalue())
+
+
+class HealthCheckTest(SimpleTestCase):
+    def connection(self, usable, checks=True):
+        return mock.Mock(connection=object(), is_usable=lambda: usable,
+                         settings_dict={'CONN_HEALTH_CHECKS': checks})
+
+    def test_broken_connection_closed(self):
+        """Оборванное постоянное соединение закрывается до запроса"""
+        broken = self.connection(usable=False)
+        alive = self.connection(usable=True)
+        unchecked = self.connection(usable=False, checks=False)
+        with mock.patch('core.db.connections') as connections:
+            connections.all.return_value = [broken, alive, unchecked]
+            check_connections()
+        broken.close.assert_called_once_with()
+        alive.close.assert_not_called()
+        unchecked.close.assert_not_called()
@@ -0,0 +1,97 @@
+import json
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import path, reverse
+
+from posts.models import Comment, Post, User
+from yatube.urls import urlpatterns as site_urlpatterns
+
+
+def comment_authors(request):
+    """Нарочно N+1: автор каждого комментария читается отдельно."""
+    names = [comment.author.username for comment in Comment.objects.all()]
+    return HttpResponse(', '.join(names))
+
+
+urlpatterns = site_urlpatterns + [
+    path('comment-authors/', comment_authors, name='comment_authors'),
+]
+
+
+class RequestTimingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=author, text='Пост')
+        for number in range(3):
+            commenter = User.objects.create_user(username=f'reader{number}')
+            Comment.objects.create(post=cls.post, author=commenter,
+                                   text='Комментарий')
+
+    def setUp(self):
+        cache.clear()
+
+    def timing(self, response):
+        """Метрики заголовка Server-Timing словарём имя -> параметры."""
+        metrics = {}
+        for metric in response['Server-Timing'].split(', '):
+            name, *params = metric.split(';')
+            metrics[name] = dict(param.split('=', 1) for param in params)
+        return metrics
+
+    def described(self, metric):
+        """Счётчики из desc метрики: 'hits=1 misses=2' -> словарь."""
+        return {name: int(value) for name, value in (
+            pair.split('=') for pair in metric['desc'].strip('"').split())}
+
+    def test_server_timing_header(self):
+        """Заголовок содержит общее время, базу, шаблоны и кэш."""
+        response = self.client.get(reverse('posts:index'))
+        metrics = self.timing(response)
+        self.assertEqual(set(metrics),
+                         {'total', 'db', 'tpl', 'ctx', 'cache'})
+        self.assertGreater(float(metrics['tpl']['dur']), 0)
+        self.assertGreater(self.described(metrics['cache'])['misses'], 0)
+        self.assertGreater(self.described(metrics['db'])['queries'], 0)
+        self.assertGreaterEqual(float(metrics['total']['dur']),
+                                float(metrics['db']['dur']))
+
+    def test_context_processors_timed(self):
+        """Время каждого контекстного процессора учитывается отдельно"""
+        response = self.client.get(reverse('about:author'))
+        processors = response.wsgi_request.timings.context_processors
+        self.assertIn('core.context_processors.year.year', processors)
+        self.assertIn('django.contrib.auth.context_processors.auth',
+                      processors)
+
+    def test_cache_hits_counted(self):
+        """Повторный запрос кэшированной ленты засчитывается попаданием."""
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('posts:index'))
+        cache_metric = self.timing(response)['cache']
+        self.assertGreater(self.described(cache_metric)['hits'], 0)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_request_has_no_header(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(SLOW_REQUEST_DUPLICATES=1,
+                       ROOT_URLCONF='core.tests.test_middleware')
+    def test_slow_request_logged(self):
+        """Повторы одного SQL попадают в журнал медленных запросов."""
+        url = reverse('comment_authors')
+        with self.assertLogs('yatube.slow_requests', 'WARNING') as logs:
+            response = self.client.get(url)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], url)
+        self.assertEqual(record['status'], response.status_code)
+        self.assertGreater(record['duplicates'], 1)
+        self.assertGreater(record['repeated'][0]['count'], 1)
+
+    def test_fast_request_not_logged(self):
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('yatube.slow_requests', 'WARNING'):
+                self.client.get(reverse('about:author'))
@@ -0,0 +1,90 @@
+import time
+
+from django.db import router
+from django.http import HttpResponse
+from django.test import SimpleTestCase, override_settings
+from django.urls import path
+
+from posts.models import Post
+
+from .. import routers
+
+
+def read_alias(request):
+    """База, из которой прочиталась бы модель; к базе не обращается."""
+    return HttpResponse(router.db_for_read(Post))
+
+
+def read_aliases(request):
+    return HttpResponse(' '.join(router.db_for_read(Post)
+                                 for _ in range(20)))
+
+
+def write_then_read(request):
+    router.db_for_write(Post)
+    return HttpResponse(router.db_for_read(Post))
+
+
+def settled(request):
+    """Можно ли кэшировать данные под поколением, созданным сейчас и
+    минуту назад."""
+    now = time.time_ns()
+    return HttpResponse(f'{routers.settled(now):d}'
+                        f'{routers.settled(now - 60 * 10 ** 9):d}')
+
+
+urlpatterns = [
+    path('read/', read_alias),
+    path('read-many/', read_aliases),
+    path('settled/', settled),
+    path('write/', write_then_read),
+    path('primary/', routers.use_primary(read_alias)),
+]
+
+
+@override_settings(DATABASE_REPLICAS=['replica'],
+                   ROOT_URLCONF='core.tests.test_routers')
+class ReplicaRouterTest(SimpleTestCase):
+    def test_reads_outside_requests_use_primary(self):
+        """Команды и фоновые задачи читают из основной базы"""
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_get_reads_from_replica(self):
+        response = self.client.get('/read/')
+        self.assertEqual(response.content, b'replica')
+        self.assertNotIn(routers.STICKY_COOKIE, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=['replica', 'other'])
+    def test_request_reads_one_replica(self):
+        """Все чтения запроса идут на одну реплику"""
+        for _ in range(5):
+            aliases = set(self.client.get('/read-many/').content.split())
+            self.assertEqual(len(aliases), 1)
+            self.assertLessEqual(aliases, {b'replica', b'other'})
+
+    def test_writing_requests_use_primary(self):
+        """POST и view с use_primary читают из основной базы"""
+        self.assertEqual(self.client.post('/read/').content, b'default')
+        self.assertEqual(self.client.get('/primary/').content, b'default')
+
+    def test_read_your_writes(self):
+        """После записи клиент какое-то время читает из основной базы"""
+        response = self.client.get('/write/')
+        self.assertEqual(response.content, b'default')
+        self.assertIn(routers.STICKY_COOKIE, response.cookies)
+        self.assertEqual(self.client.get('/read/').content, b'default')
+        del self.client.cookies[routers.STICKY_COOKIE]
+        self.assertEqual(self.client.get('/read/').content, b'replica')
+
+    def test_settled(self):
+        """С реплики кэшируется только то, что она успела получить"""
+        self.assertTrue(routers.settled(time.time_ns()))
+        self.assertEqual(self.client.get('/settled/').content, b'01')
+        self.assertEqual(self.client.post('/settled/').content, b'11')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        response = self.client.get('/write/')
+        self.assertEqual(self.client.get('/read/').content, b'default')
+        self.assertNotIn(routers.STICKY_COOKIE, response.cookies)
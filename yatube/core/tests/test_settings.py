@@ -0,0 +1,91 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+SHOW_SETTINGS = '''
+import json
+from django.conf import settings
+print(json.dumps({
+    'debug': settings.DEBUG,
+    'secret_key': settings.SECRET_KEY,
+    'cached_templates': settings.CACHED_TEMPLATES,
+    'loaders': settings.TEMPLATES[0]['OPTIONS']['loaders'],
+    'conn_max_age': settings.DATABASES['default']['CONN_MAX_AGE'],
+    'middleware': settings.MIDDLEWARE,
+    'apps': settings.INSTALLED_APPS,
+    'shared_cache': settings.CACHES['shared'],
+    'card_stats': settings.POST_CARD_STATS,
+    'secure_cookies': [settings.SESSION_COOKIE_SECURE,
+                       settings.CSRF_COOKIE_SECURE],
+}))
+'''
+
+
+class SettingsProfilesTest(SimpleTestCase):
+    def run_profile(self, **environ):
+        """Настройки профиля читаются в отдельном процессе: модуль
+        настроек исполняется один раз при импорте."""
+        env = {name: value for name, value in os.environ.items()
+               if not name.startswith('YATUBE_')}
+        env.update(environ, DJANGO_SETTINGS_MODULE='yatube.settings')
+        return subprocess.run(
+            [sys.executable, '-c', SHOW_SETTINGS], env=env,
+            cwd=settings.BASE_DIR, capture_output=True, text=True)
+
+    def load(self, **environ):
+        process = self.run_profile(**environ)
+        self.assertEqual(process.returncode, 0, process.stderr)
+        return json.loads(process.stdout)
+
+    def test_dev_is_default(self):
+        """По умолчанию dev: DEBUG и постоянный ключ разработки"""
+        loaded = self.load()
+        self.assertTrue(loaded['debug'])
+        self.assertFalse(loaded['cached_templates'])
+        self.assertEqual(self.load()['secret_key'], loaded['secret_key'])
+
+    def test_prod(self):
+        loaded = self.load(YATUBE_ENV='prod', YATUBE_SECRET_KEY='ключ')
+        self.assertFalse(loaded['debug'])
+        self.assertEqual(loaded['secret_key'], 'ключ')
+        self.assertTrue(loaded['cached_templates'])
+        self.assertEqual(loaded['loaders'][0][0],
+                         'django.template.loaders.cached.Loader')
+        self.assertEqual(loaded['conn_max_age'], 600)
+        self.assertNotIn('core.middleware.ReplicaMiddleware',
+                         loaded['middleware'])
+        self.assertIn('memcached', loaded['shared_cache']['BACKEND'])
+        self.assertEqual(loaded['secure_cookies'], [False, False])
+        loaded = self.load(YATUBE_ENV='prod', YATUBE_SECRET_KEY='ключ',
+                           YATUBE_HTTPS='1', YATUBE_CACHE_DIR='/tmp/cache')
+        self.assertEqual(loaded['secure_cookies'], [True, True])
+        self.assertIn('filebased', loaded['shared_cache']['BACKEND'])
+        self.assertGreaterEqual(
+            loaded['shared_cache']['OPTIONS']['MAX_ENTRIES'], 100000)
+        self.assertFalse(loaded['card_stats'])
+        self.assertNotIn('benchmarks.apps.BenchmarksConfig', loaded['apps'])
+
+    def test_benchmarks_only_in_dev_and_bench(self):
+        """Команды замеров есть в dev и bench, но не в prod"""
+        for profile in ('dev', 'bench'):
+            with self.subTest(profile=profile):
+                self.assertIn('benchmarks.apps.BenchmarksConfig',
+                              self.load(YATUBE_ENV=profile)['apps'])
+
+    def test_web_worker_without_sorl(self):
+        """yatube.wsgi стартует без sorl, manage.py — с ним"""
+        self.assertIn('sorl.thumbnail', self.load()['apps'])
+        self.assertNotIn('sorl.thumbnail',
+                         self.load(YATUBE_THUMBNAILS='0')['apps'])
+
+    def test_prod_requires_secret_key(self):
+        process = self.run_profile(YATUBE_ENV='prod')
+        self.assertIn('SECRET_KEY', process.stderr)
+
+    def test_unknown_profile(self):
+        process = self.run_profile(YATUBE_ENV='staging')
+        self.assertIn('YATUBE_ENV=staging', process.stderr)
@@ -0,0 +1,91 @@
+import copy
+import gc
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+from django.urls import clear_url_caches, get_resolver
+
+from ..warmup import template_names, warm_templates, warm_urls, warm_worker
+
+
+def cached_templates(directory=None):
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', settings.TEMPLATE_LOADERS)]
+    if directory:
+        templates[0]['DIRS'] = [directory]
+    return templates
+
+
+class TemplateWarmupTest(SimpleTestCase):
+    def make_templates(self, files):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        for name, source in files.items():
+            path = os.path.join(directory, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as file:
+                file.write(source)
+        return directory
+
+    def test_project_templates_warmed(self):
+        """Прогрев кладёт в cached loader все шаблоны проекта"""
+        with override_settings(TEMPLATES=cached_templates()):
+            engine = engines['django'].engine
+            names = template_names(engine)
+            self.assertIn('posts/includes/paginator.html', names)
+            loaded, errors = warm_templates()
+            self.assertEqual(errors, {})
+            self.assertEqual(loaded, len(names))
+            cached = engine.template_loaders[0].get_template_cache
+            self.assertLessEqual(set(names), set(cached))
+
+    def test_syntax_error_collected(self):
+        directory = self.make_templates({
+            'ok.html': '{{ value }}',
+            'broken/page.html': 'текст\n{% if %}',
+        })
+        with override_settings(TEMPLATES=cached_templates(directory)):
+            loaded, errors = warm_templates()
+        self.assertEqual(loaded, 1)
+        self.assertEqual(list(errors), ['broken/page.html'])
+
+    def test_check_templates_command(self):
+        out = StringIO()
+        call_command('check_templates', stdout=out)
+        self.assertIn('Шаблонов:', out.getvalue())
+
+    def test_check_templates_reports_line(self):
+        """Команда называет файл и строку ошибки и завершается с ошибкой"""
+        directory = self.make_templates({'broken.html': 'текст\n{% if %}'})
+        err = StringIO()
+        with override_settings(TEMPLATES=cached_templates(directory)):
+            with self.assertRaises(CommandError):
+                call_command('check_templates', stdout=StringIO(),
+                             stderr=err)
+        self.assertIn('broken.html:2:', err.getvalue())
+
+
+class UrlWarmupTest(SimpleTestCase):
+    def test_reverse_tables_built(self):
+        """После прогрева reverse() не строит таблицы ни в одном
+        пространстве имён"""
+        clear_url_caches()
+        warm_urls()
+        resolver = get_resolver()
+        self.assertTrue(resolver._populated)
+        for _, namespace in resolver.namespace_dict.values():
+            self.assertTrue(namespace._populated)
+
+    def test_worker_warms_reverse_resolver(self):
+        """reverse() берёт отдельный от resolve() экземпляр resolver"""
+        clear_url_caches()
+        self.addCleanup(gc.unfreeze)
+        warm_worker()
+        self.assertTrue(get_resolver(settings.ROOT_URLCONF)._populated)
@@ -0,0 +1,167 @@
+"""Замеры одного запроса: база, шаблоны и кэш.
+
+Счётчики текущего запроса лежат в contextvar; пока запрос не попал в
+выборку, переменная пуста и обёртки сводятся к одной проверке.
+"""
+import contextvars
+import time
+from collections import Counter
+from functools import wraps
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0
+        self.db_time = 0
+        self.queries = 0
+        # текст SQL без параметров: повтор одного текста — признак N+1
+        self.statements = Counter()
+        self.template_time = 0
+        self.template_depth = 0
+        # время каждого контекстного процессора, входит в template_time
+        self.context_processors = Counter()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values())
+
+    def execute(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing, длительности в мс."""
+        return ', '.join((
+            f'total;dur={self.total * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};'
+            f'desc="queries={self.queries} duplicates={self.duplicates}"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'ctx;dur={sum(self.context_processors.values()) * 1000:.1f}',
+            f'cache;desc="hits={self.cache_hits} misses={self.cache_misses}"',
+        ))
+
+    def as_dict(self):
+        repeated = [
+            {'sql': sql, 'count': count}
+            for sql, count in self.statements.most_common(3) if count > 1
+        ]
+        return {
+            'total_ms': round(self.total * 1000, 1),
+            'db_ms': round(self.db_time * 1000, 1),
+            'queries': self.queries,
+            'duplicates': self.duplicates,
+            'repeated': repeated,
+            'template_ms': round(self.template_time * 1000, 1),
+            'context_processors_ms': {
+                name: round(spent * 1000, 2)
+                for name, spent in self.context_processors.most_common()},
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def current():
+    return _current.get()
+
+
+def start():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def record_cache(hits, misses):
+    timings = _current.get()
+    if timings is not None:
+        timings.cache_hits += hits
+        timings.cache_misses += misses
+
+
+def instrument_templates():
+    """Считает время отрисовки шаблонов Django.
+
+    Оборачивается Template бэкенда: через него проходят render и
+    render_to_string, но не {% include %}, так что вложенная отрисовка
+    не учитывается дважды; глубина страхует от render_to_string внутри
+    шаблонных тегов.
+    """
+    from django.template.backends.django import Template
+
+    render = Template.render
+    if getattr(render, 'timed', False):
+        return
+
+    @wraps(render)
+    def timed_render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None:
+            return render(self, context, request)
+        timings.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            timings.template_depth -= 1
+            if not timings.template_depth:
+                timings.template_time += time.perf_counter() - started
+
+    timed_render.timed = True
+    Template.render = timed_render
+
+
+def timed_processor(processor):
+    name = f'{processor.__module__}.{processor.__name__}'
+
+    @wraps(processor)
+    def timed(request):
+        timings = _current.get()
+        if timings is None:
+            return processor(request)
+        started = time.perf_counter()
+        try:
+            return processor(request)
+        finally:
+            timings.context_processors[name] += (
+                time.perf_counter() - started)
+
+    return timed
+
+
+def instrument_context_processors():
+    """Считает время каждого контекстного процессора.
+
+    Движок один раз собирает список процессоров в cached_property
+    template_context_processors; обёртки подменяют её результат.
+    """
+    from django.template.engine import Engine
+    from django.utils.functional import cached_property
+
+    collect = Engine.template_context_processors.func
+    if getattr(collect, 'timed', False):
+        return
+
+    def timed_processors(self):
+        return tuple(timed_processor(processor)
+                     for processor in collect(self))
+
+    timed_processors.timed = True
+    prop = cached_property(timed_processors)
+    prop.__set_name__(Engine, 'template_context_processors')
+    Engine.template_context_processors = prop
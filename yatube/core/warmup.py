@@ -0,0 +1,69 @@
+"""Прогрев воркера до первого запроса.
+
+С cached loader шаблон разбирается при первом обращении к нему в
+каждом процессе, а URLconf импортируется, таблицы reverse() строятся,
+context processors и бэкенды кэша загружаются при первом запросе: без
+прогрева за это платят первые запросы после деплоя. yatube.wsgi и
+yatube.asgi вызывают warm_worker при старте.
+"""
+import gc
+import os
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver
+
+
+def template_names(engine):
+    """Имена всех файлов в каталогах DIRS движка."""
+    names = set()
+    for directory in engine.dirs:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.relpath(os.path.join(root, name), directory)
+                names.add(path.replace(os.sep, '/'))
+    return sorted(names)
+
+
+def warm_templates(engine=None):
+    """Загружает шаблоны проекта; возвращает число загруженных и
+    ошибки разбора по именам шаблонов."""
+    engine = engine or engines['django'].engine
+    loaded = 0
+    errors = {}
+    for name in template_names(engine):
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError as error:
+            errors[name] = error
+        else:
+            loaded += 1
+    return loaded, errors
+
+
+def warm_urls(resolver=None):
+    """Импортирует URLconf со всеми view и строит таблицы reverse()
+    корня и каждого пространства имён."""
+    resolver = resolver or get_resolver()
+    # таблица строится при первом обращении
+    resolver.reverse_dict
+    for _, namespace in resolver.namespace_dict.values():
+        warm_urls(namespace)
+
+
+def warm_worker():
+    # в Django 2.2 get_resolver кэширует по аргументу: resolve() берёт
+    # get_resolver(), а reverse() — get_resolver(ROOT_URLCONF)
+    warm_urls()
+    warm_urls(get_resolver(settings.ROOT_URLCONF))
+    # context processors и бэкенды кэша импортируются при первом обращении
+    engines['django'].engine.template_context_processors
+    for alias in settings.CACHES:
+        caches[alias]
+    if settings.CACHED_TEMPLATES:
+        warm_templates()
+    # объекты старта живут всё время процесса: без freeze() первая
+    # полная сборка мусора на первом запросе обходит их все
+    gc.collect()
+    gc.freeze()
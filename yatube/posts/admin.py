@@ -1,6 +1,44 @@
-from django.contrib import admin
+from datetime import datetime, time, timedelta
 
-from .models import Group, Post, Comment, Follow
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+from django.utils import timezone
+
+from .models import Comment, Follow, Group, Post, Profile, User
+from .moderation import delete_posts, move_posts
+from .search import filter_posts
+from .utils import EstimatedCountPaginator
+
+MODERATION_TEMPLATE = 'admin/posts/post/moderation.html'
+AUTHORS_SHOWN = 20
+
+
+class MoveToGroupForm(forms.Form):
+    group = forms.ModelChoiceField(
+        Group.objects.all(), required=False, label='Группа',
+        empty_label='Без группы')
+
+
+class DateRangeForm(forms.Form):
+    start = forms.DateField(label='С даты')
+    end = forms.DateField(label='По дату включительно')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get('start'), cleaned_data.get('end')
+        if start and end and start > end:
+            raise forms.ValidationError('Начало диапазона позже конца')
+        return cleaned_data
+
+    def bounds(self):
+        """Полуинтервал [начало первого дня, начало следующего за
+        последним) в текущем часовом поясе."""
+        return tuple(
+            timezone.make_aware(datetime.combine(day, time.min))
+            for day in (self.cleaned_data['start'],
+                        self.cleaned_data['end'] + timedelta(days=1)))
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -13,12 +51,109 @@ class PostAdmin(admin.ModelAdmin):
         'image'
     )
     list_editable = ('group', 'image')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    readonly_fields = Post.counter_fields
     empty_value_display = '-пусто-'
+    actions = ('move_to_group', 'delete_by_author', 'purge_by_date')
+    paginator = EstimatedCountPaginator
+    # второй COUNT(*) — по всей таблице без фильтров
+    show_full_result_count = False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs)
+        if db_field.name == 'group':
+            # группы читаются один раз на страницу, а не в каждой
+            # строке list_editable
+            formfield.choices = list(formfield.choices)
+        return formfield
+
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по индексу posts.search, а не через LIKE по тексту."""
+        found = filter_posts(queryset, search_term)
+        return (queryset if found is None else found), False
+
+    def confirm(self, request, form, title, description=''):
+        """Страница подтверждения с формой параметров действия или
+        None, если форма отправлена и заполнена верно."""
+        if form.is_bound and form.is_valid():
+            return None
+        return TemplateResponse(request, MODERATION_TEMPLATE, {
+            **self.admin_site.each_context(request),
+            'title': title,
+            'description': description,
+            'opts': self.model._meta,
+            'form': form,
+            'action': request.POST['action'],
+            'select_across': request.POST.get('select_across', '0'),
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        })
+
+    @staticmethod
+    def bound(request, form_class):
+        return form_class(request.POST if 'apply' in request.POST else None)
+
+    def move_to_group(self, request, queryset):
+        form = self.bound(request, MoveToGroupForm)
+        response = self.confirm(request, form, 'Перенести посты в группу')
+        if response is not None:
+            return response
+        moved = move_posts(queryset, form.cleaned_data['group'])
+        self.message_user(request, f'Перенесено постов: {moved}',
+                          messages.SUCCESS)
+
+    move_to_group.short_description = 'Перенести в группу'
+    move_to_group.allowed_permissions = ('change',)
+
+    def delete_by_author(self, request, queryset):
+        authors = queryset.order_by().values('author').distinct()
+        names = User.objects.filter(pk__in=authors).order_by(
+            'username').values_list('username', flat=True)
+        response = self.confirm(
+            request, self.bound(request, forms.Form),
+            'Удалить все посты авторов',
+            'Будут удалены все посты, комментарии к ним и записи лент '
+            'подписок авторов: ' + ', '.join(names[:AUTHORS_SHOWN])
+            + (' и другие' if names[AUTHORS_SHOWN:].exists() else ''))
+        if response is not None:
+            return response
+        deleted = delete_posts(Post.objects.filter(author__in=authors))
+        self.message_user(request, f'Удалено постов: {deleted}',
+                          messages.SUCCESS)
+
+    delete_by_author.short_description = 'Удалить все посты их авторов'
+    delete_by_author.allowed_permissions = ('delete',)
+
+    def purge_by_date(self, request, queryset):
+        form = self.bound(request, DateRangeForm)
+        response = self.confirm(request, form, 'Удалить посты за период')
+        if response is not None:
+            return response
+        start, end = form.bounds()
+        deleted = delete_posts(queryset.filter(pub_date__gte=start,
+                                               pub_date__lt=end))
+        self.message_user(request, f'Удалено постов: {deleted}',
+                          messages.SUCCESS)
+
+    purge_by_date.short_description = 'Удалить выбранные посты за период'
+    purge_by_date.allowed_permissions = ('delete',)
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('title', 'slug', 'posts_count')
+    readonly_fields = Group.counter_fields
+
+
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = ('user',) + Profile.counter_fields
+    readonly_fields = Profile.counter_fields
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment)
 admin.site.register(Follow)
+admin.site.register(Profile, ProfileAdmin)
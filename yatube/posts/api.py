@@ -0,0 +1,181 @@
+"""Read API лент, поста и комментариев.
+
+Ответ собирается прямо из values_list, без экземпляров моделей и
+шаблонов. Списки отдаются столбцами: имена полей один раз в "fields",
+записи — массивами в "results", курсор следующей страницы в "next".
+?fields=id,text выбирает поля, ?limit= размер страницы, ?after= курсор.
+"""
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import conditional_page
+
+from .decorators import conditional_feed
+from .models import Comment, Post
+from .timeline import followed_posts
+from .utils import (COMMENT_ORDERINGS, FEED_ORDERING, SEARCH_POSTS,
+                    decode_cursor, keyset_after, make_cursor)
+from .views import (group_feed_names, index_feed_names, page_author,
+                    page_group, page_post, post_feed_names,
+                    profile_feed_names)
+
+MAX_LIMIT = 100
+# имя поля в API: поле для values_list
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'comments_count': 'comments_count',
+    'image': 'image',
+    'thumbnail': 'thumbnail',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+}
+FILE_FIELDS = ('image', 'thumbnail')
+JSON_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def api_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params=JSON_PARAMS)
+
+
+def api_view(view):
+    """Оборачивает результат view в JSON, ошибки отдаёт JSON-ом."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return api_response(view(request, *args, **kwargs))
+        except Http404:
+            return api_response({'error': 'not found'}, status=404)
+        except ApiError as error:
+            return api_response({'error': str(error)}, status=error.status)
+    return wrapper
+
+
+def selected_fields(request, available):
+    names = request.GET.get('fields')
+    if not names:
+        return list(available)
+    names = names.split(',')
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ApiError(f'unknown fields: {", ".join(unknown)}')
+    return names
+
+
+def page_limit(request):
+    try:
+        limit = int(request.GET.get('limit', SEARCH_POSTS))
+    except ValueError:
+        raise ApiError('limit must be an integer')
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def serialize(fields, row):
+    """Строка values_list в список значений: файлы превращаются в URL."""
+    row = list(row)
+    for index, name in enumerate(fields):
+        if name in FILE_FIELDS and row[index]:
+            row[index] = default_storage.url(row[index])
+        elif name in FILE_FIELDS:
+            row[index] = None
+    return row
+
+
+def rows_page(request, queryset, available, date_field, ordering):
+    """Страница строк после курсора в порядке ordering по (date_field, id).
+
+    Дата и id выбираются первыми столбцами ради курсора и в ответ не
+    попадают, если их не запросили.
+    """
+    fields = selected_fields(request, available)
+    limit = page_limit(request)
+    queryset = queryset.order_by(*ordering)
+    cursor = decode_cursor(request.GET.get('after'))
+    if cursor:
+        queryset = keyset_after(queryset, date_field, cursor,
+                                descending=ordering[0].startswith('-'))
+    rows = list(queryset.values_list(
+        date_field, 'id', *(available[name] for name in fields))[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = make_cursor(*rows[-1][:2])
+    return {
+        'fields': fields,
+        'results': [serialize(fields, row[2:]) for row in rows],
+        'next': next_cursor,
+    }
+
+
+def posts_page(request, posts):
+    return rows_page(request, posts, POST_FIELDS, 'pub_date', FEED_ORDERING)
+
+
+@conditional_feed(index_feed_names)
+@api_view
+def index(request):
+    return posts_page(request, Post.objects.all())
+
+
+@conditional_feed(group_feed_names)
+@api_view
+def group_posts(request, slug):
+    group = page_group(request, slug)
+    if group is None:
+        raise Http404
+    return posts_page(request, Post.objects.filter(group_id=group.id))
+
+
+@conditional_feed(profile_feed_names)
+@api_view
+def profile(request, username):
+    author = page_author(request, username)
+    if author is None:
+        raise Http404
+    return posts_page(request, Post.objects.filter(author_id=author.id))
+
+
+@conditional_page
+@api_view
+def follow_index(request):
+    """Лента подписок своя у каждого читателя, поэтому ETag считается
+    по телу ответа: экономится трафик, а не запросы к базе."""
+    if not request.user.is_authenticated:
+        raise ApiError('authentication required', status=401)
+    return posts_page(request, followed_posts(request.user))
+
+
+@conditional_feed(post_feed_names)
+@api_view
+def post_detail(request, post_id):
+    fields = selected_fields(request, POST_FIELDS)
+    row = Post.objects.filter(id=post_id).values_list(
+        *(POST_FIELDS[name] for name in fields)).first()
+    if row is None:
+        raise Http404
+    return dict(zip(fields, serialize(fields, row)))
+
+
+@conditional_feed(post_feed_names)
+@api_view
+def post_comments(request, post_id):
+    if page_post(request, post_id) is None:
+        raise Http404
+    order = request.GET.get('comments')
+    ordering = COMMENT_ORDERINGS.get(order, COMMENT_ORDERINGS['new'])
+    return rows_page(request, Comment.objects.filter(post_id=post_id),
+                     COMMENT_FIELDS, 'created', ordering)
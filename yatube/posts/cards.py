@@ -0,0 +1,104 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core.routers import settled
+
+from .decorators import invalidate_feeds, post_feeds
+from .utils import encode_cursor
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+HITS_KEY = 'post_card_hits'
+MISSES_KEY = 'post_card_misses'
+BATCH_SIZE = 1000
+
+
+def version_key(post_id):
+    return f'post_card_version:{post_id}'
+
+
+def card_versions(post_ids):
+    """Версии карточек; отсутствующая версия создаётся заново,
+    так что вытеснение версии из кэша не вернёт старую карточку."""
+    keys = {post_id: version_key(post_id) for post_id in post_ids}
+    versions = cache.get_many(keys.values())
+    missing = {key: time.time_ns() for key in keys.values()
+               if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return {post_id: versions[key] for post_id, key in keys.items()}
+
+
+def attach_cards(posts):
+    """Кладёт в post.card HTML карточки: из кэша или свежеотрисованный."""
+    posts = list(posts)
+    versions = card_versions(post.id for post in posts)
+    keys = {
+        post.id: f'post_card:{encode_cursor(post)}:{versions[post.id]}'
+        for post in posts
+    }
+    cached = cache.get_many(keys.values())
+    rendered = {}
+    stale = set()
+    for post in posts:
+        html = cached.get(keys[post.id])
+        if html is None:
+            html = render_to_string(CARD_TEMPLATE, {'post': post})
+            rendered[keys[post.id]] = html
+            if not settled(versions[post.id]):
+                # пост мог быть прочитан с отстающей реплики
+                stale.add(keys[post.id])
+        post.card = mark_safe(html)
+    fresh = {key: html for key, html in rendered.items() if key not in stale}
+    if fresh:
+        cache.set_many(fresh, settings.POST_CARD_TIMEOUT)
+    count(HITS_KEY, len(posts) - len(rendered))
+    count(MISSES_KEY, len(rendered))
+
+
+def count(key, amount):
+    if not amount or not settings.POST_CARD_STATS:
+        return
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # счётчика ещё нет: add не затрёт его, если другой процесс успел
+        cache.add(key, 0, None)
+        cache.incr(key, amount)
+
+
+def invalidate(post_ids):
+    post_ids = iter(post_ids)
+    while True:
+        batch = [version_key(post_id)
+                 for _, post_id in zip(range(BATCH_SIZE), post_ids)]
+        if not batch:
+            return
+        cache.delete_many(batch)
+
+
+def invalidate_posts(posts):
+    """Сбрасывает карточки постов и все ленты, на которых они видны.
+
+    Посты читаются сразу, а кэш сбрасывается после коммита: иначе
+    конкурентный запрос успел бы положить старые строки под новую версию.
+    """
+    rows = list(posts.values_list('id', 'author_id', 'group_id'))
+
+    def forget():
+        invalidate(post_id for post_id, _, _ in rows)
+        invalidate_feeds({feed for row in rows for feed in post_feeds(*row)})
+
+    transaction.on_commit(forget)
+
+
+def hit_ratio():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return hits, misses, hits / total if total else 0
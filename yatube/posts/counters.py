@@ -0,0 +1,50 @@
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# модель со счётчиком, поле счётчика, считаемая модель,
+# её ссылка на объект со счётчиком и ключ объекта со счётчиком
+COUNTERS = (
+    ('Profile', 'posts_count', 'Post', 'author', 'user'),
+    ('Profile', 'followers_count', 'Follow', 'author', 'user'),
+    ('Profile', 'following_count', 'Follow', 'user', 'user'),
+    ('Group', 'posts_count', 'Post', 'group', 'pk'),
+    ('Post', 'comments_count', 'Comment', 'post', 'pk'),
+)
+
+
+def actual_count(related, field, key):
+    rows = related.objects.filter(**{field: OuterRef(key)}).order_by()
+    return Coalesce(Subquery(
+        rows.values(field).annotate(total=Count('pk')).values('total')), 0)
+
+
+def create_missing_profiles(apps=django_apps):
+    Profile = apps.get_model('posts', 'Profile')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    missing = User.objects.filter(profile__isnull=True).values_list(
+        'pk', flat=True)
+    Profile.objects.bulk_create(
+        Profile(user_id=pk) for pk in missing.iterator())
+
+
+def rebuild_counters(apps=django_apps):
+    """Пересчитывает все счётчики одним UPDATE на каждый счётчик."""
+    create_missing_profiles(apps)
+    for model, counter, related, field, key in COUNTERS:
+        model = apps.get_model('posts', model)
+        related = apps.get_model('posts', related)
+        model.objects.update(**{counter: actual_count(related, field, key)})
+
+
+def find_mismatches(apps=django_apps):
+    """Объекты, у которых сохранённый счётчик расходится с данными."""
+    for model, counter, related, field, key in COUNTERS:
+        model = apps.get_model('posts', model)
+        related = apps.get_model('posts', related)
+        wrong = model.objects.annotate(
+            actual=actual_count(related, field, key)
+        ).exclude(**{counter: F('actual')})
+        for obj in wrong.iterator():
+            yield obj, counter, getattr(obj, counter), obj.actual
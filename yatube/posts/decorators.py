@@ -0,0 +1,115 @@
+import time
+from datetime import datetime
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition
+
+from core.routers import settled
+
+INDEX_FEED = 'index_page'
+BATCH_SIZE = 1000
+
+
+def generation_key(name):
+    return f'feed_generation:{name}'
+
+
+def feed_generations(names):
+    """Поколения лент; пропавшее из кэша поколение создаётся заново."""
+    keys = {name: generation_key(name) for name in names}
+    generations = cache.get_many(keys.values())
+    for key in keys.values():
+        if key not in generations:
+            generation = time.time_ns()
+            if not cache.add(key, generation, None):
+                generation = cache.get(key, generation)
+            generations[key] = generation
+    return [generations[keys[name]] for name in names]
+
+
+def feed_generation(name):
+    return feed_generations([name])[0]
+
+
+def invalidate_feeds(names):
+    names = iter(names)
+    while True:
+        batch = [generation_key(name)
+                 for _, name in zip(range(BATCH_SIZE), names)]
+        if not batch:
+            return
+        cache.delete_many(batch)
+
+
+def post_feeds(post_id, author_id, group_id):
+    """Ленты, на которых виден пост."""
+    feeds = [INDEX_FEED, f'post:{post_id}', f'profile:{author_id}']
+    if group_id is not None:
+        feeds.append(f'group:{group_id}')
+    return feeds
+
+
+def cache_feed(timeout, name):
+    """cache_page, в ключ которого входит поколение ленты name.
+
+    Поколение меняется сигналами при записи, поэтому страницу можно
+    хранить долго и при этом сразу показывать изменения. Страница,
+    собранная с реплики, которая могла ещё не получить смену
+    поколения, не кэшируется.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            generation = feed_generation(name)
+
+            def settled_view(request, *args, **kwargs):
+                response = view(request, *args, **kwargs)
+                if not settled(generation):
+                    # max-age=0 не даёт cache_page сохранить ответ
+                    patch_cache_control(response, max_age=0)
+                return response
+
+            cached_view = cache_page(
+                timeout, key_prefix=f'{name}:{generation}')(settled_view)
+            return cached_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def conditional_feed(feeds):
+    """Отвечает 304 на If-None-Match/If-Modified-Since, не вызывая view.
+
+    feeds(request, **kwargs) возвращает имена лент, из которых собрана
+    страница, или None, если страницы нет. ETag строится из поколений
+    этих лент и пользователя, Last-Modified отдаётся только анонимам:
+    страница авторизованного пользователя зависит от него самого.
+    Пока реплика может не знать о смене поколения, страница отдаётся
+    без них, чтобы клиент не закрепил старую версию под новым ETag.
+    """
+    def generations(request, *args, **kwargs):
+        if not hasattr(request, '_feed_generations'):
+            names = feeds(request, *args, **kwargs)
+            values = None if names is None else feed_generations(names)
+            if values is not None and not all(map(settled, values)):
+                values = None
+            request._feed_generations = values
+        return request._feed_generations
+
+    def etag(request, *args, **kwargs):
+        values = generations(request, *args, **kwargs)
+        if values is None:
+            return None
+        user = request.user.pk or 0
+        return '-'.join(map(str, values + [user]))
+
+    def last_modified(request, *args, **kwargs):
+        values = generations(request, *args, **kwargs)
+        if values is None or request.user.is_authenticated:
+            return None
+        return datetime.fromtimestamp(max(values) / 10 ** 9, timezone.utc)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,61 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает одну и ту же страницу в HTML и в JSON API: время '
+            'ответа с пустым кэшем и размер тела. Данные создаются во '
+            'временной транзакции и откатываются после замера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            author = User.objects.create(username='bench_api')
+            group = Group.objects.create(title='bench', slug='bench-api')
+            Post.objects.bulk_create(
+                Post(author=author, group=group, text=f'Пост {number}')
+                for number in range(options['posts']))
+            post = Post.objects.filter(author=author).latest('id')
+            Comment.objects.bulk_create(
+                Comment(post=post, author=author, text=f'Комментарий {number}')
+                for number in range(options['comments']))
+            pages = (
+                ('index', {}),
+                ('group_list', {'slug': group.slug}),
+                ('profile', {'username': author.username}),
+                ('post_detail', {'post_id': post.id}),
+            )
+            client = Client()
+            for name, kwargs in pages:
+                html = reverse(f'posts:{name}', kwargs=kwargs)
+                api = reverse(f'posts:api_{name}', kwargs=kwargs)
+                html_ms, html_bytes = self.measure(client, html,
+                                                   options['repeat'])
+                api_ms, api_bytes = self.measure(client, api,
+                                                 options['repeat'])
+                self.stdout.write(
+                    f'{name}: HTML {html_ms:.2f} мс, {html_bytes} Б; '
+                    f'API {api_ms:.2f} мс, {api_bytes} Б')
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def measure(client, url, repeat):
+        """Среднее время ответа с пустым кэшем и размер тела."""
+        total = 0
+        for _ in range(repeat):
+            cache.clear()
+            started = time.perf_counter()
+            response = client.get(url)
+            total += time.perf_counter() - started
+        return total / repeat * 1000, len(response.content)
@@ -0,0 +1,52 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает полный GET с пустым кэшем и условный GET с '
+            'If-None-Match для лент и страницы поста. Данные создаются '
+            'во временной транзакции и откатываются после замера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            author = User.objects.create(username='bench_conditional')
+            group = Group.objects.create(title='bench', slug='bench-cond')
+            for number in range(options['posts']):
+                post = Post.objects.create(author=author, group=group,
+                                           text=f'Пост {number}')
+            urls = (
+                reverse('posts:index'),
+                reverse('posts:group_list', kwargs={'slug': group.slug}),
+                reverse('posts:profile', kwargs={'username': author}),
+                reverse('posts:post_detail', kwargs={'post_id': post.id}),
+            )
+            client = Client()
+            for url in urls:
+                full = self.measure(
+                    lambda: (cache.clear(), client.get(url)),
+                    options['repeat'])
+                etag = client.get(url)['ETag']
+                conditional = self.measure(
+                    lambda: client.get(url, HTTP_IF_NONE_MATCH=etag),
+                    options['repeat'])
+                self.stdout.write(f'{url}: 200 за {full:.2f} мс, '
+                                  f'304 за {conditional:.2f} мс')
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def measure(func, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) / repeat * 1000
@@ -0,0 +1,94 @@
+import io
+import json
+import shutil
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from PIL import Image
+
+from posts.models import Post, User
+from posts.thumbnails import pending, process_batch
+from posts.utils import SEARCH_POSTS
+
+CARD_WIDTH = 960
+KILOBYTE = 1024
+
+
+class Command(BaseCommand):
+    help = ('Считает байты картинок на странице ленты: оригиналы, одна '
+            'миниатюра 960px и вариант из srcset для разных экранов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', default='2400x1600')
+        parser.add_argument('--clients', nargs='+',
+                            default=['360@2', '390@3', '768@2', '1280@1'],
+                            help='ширина экрана в CSS-пикселях@плотность')
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp()
+        try:
+            with override_settings(MEDIA_ROOT=media_root), \
+                    transaction.atomic():
+                self.seed(options['size'])
+                self.report(options['clients'])
+                transaction.set_rollback(True)
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+
+    @staticmethod
+    def make_image(size):
+        """Картинка, которая сжимается примерно как фотография."""
+        width, height = map(int, size.split('x'))
+        gradient = Image.linear_gradient('L').resize((width, height))
+        noise = Image.effect_noise((width, height), 24).convert('L')
+        buffer = io.BytesIO()
+        Image.merge('RGB', (
+            gradient, noise, gradient.transpose(Image.FLIP_LEFT_RIGHT)
+        )).save(buffer, 'JPEG', quality=90)
+        return buffer.getvalue()
+
+    def seed(self, size):
+        author = User.objects.create(username='bench_image_bytes')
+        image = self.make_image(size)
+        for number in range(SEARCH_POSTS):
+            Post.objects.create(author=author, text='Пост', image=(
+                SimpleUploadedFile(f'bench{number}.jpg', image,
+                                   content_type='image/jpeg')))
+        while pending().exists():
+            process_batch(SEARCH_POSTS, 1)
+
+    def report(self, clients):
+        posts = Post.objects.filter(author__username='bench_image_bytes')
+        originals = sum(default_storage.size(post.image.name)
+                        for post in posts)
+        thumbnails = sum(default_storage.size(post.thumbnail)
+                         for post in posts)
+        self.stdout.write(
+            f'Страница из {len(posts)} постов: оригиналы '
+            f'{originals / KILOBYTE:.0f} КБ, миниатюры 960px '
+            f'{thumbnails / KILOBYTE:.0f} КБ')
+        for client in clients:
+            css_width, density = client.split('@')
+            needed = min(int(css_width), CARD_WIDTH) * float(density)
+            webp = sum(self.chosen_size(post, 'WEBP', needed)
+                       for post in posts)
+            jpeg = sum(self.chosen_size(post, 'JPEG', needed)
+                       for post in posts)
+            self.stdout.write(
+                f'Экран {client}: srcset WebP {webp / KILOBYTE:.0f} КБ '
+                f'({webp / thumbnails:.0%}), JPEG {jpeg / KILOBYTE:.0f} КБ '
+                f'({jpeg / thumbnails:.0%})')
+
+    @staticmethod
+    def chosen_size(post, image_format, needed):
+        """Размер варианта, который браузер выберет по srcset: самого
+        узкого из тех, что не уже нужного, или самого широкого."""
+        variants = json.loads(post.image_variants)[image_format]
+        suitable = [name for width, height, name in variants
+                    if width >= needed]
+        name = suitable[0] if suitable else variants[-1][2]
+        return default_storage.size(name)
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import transaction
+
+from posts.models import Post, User
+from posts.utils import SEARCH_POSTS, CursorPaginator, encode_cursor
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает OFFSET- и keyset-пагинацию ленты на первой '
+            'и глубокой странице. Данные создаются во временной '
+            'транзакции и откатываются после замера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--page', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['posts'])
+            for number in (1, options['page']):
+                self.compare(number, options['repeat'])
+            transaction.set_rollback(True)
+
+    def seed(self, total):
+        author = User.objects.create(username='bench_pagination')
+        started = time.perf_counter()
+        for offset in range(0, total, BATCH_SIZE):
+            Post.objects.bulk_create(
+                Post(author=author, text=f'Пост {number}')
+                for number in range(offset, min(offset + BATCH_SIZE, total)))
+        self.stdout.write(f'Создано постов: {total} '
+                          f'за {time.perf_counter() - started:.1f} с')
+
+    def compare(self, number, repeat):
+        posts = Post.objects.all()
+        cursor = None
+        if number > 1:
+            last = posts.order_by('-pub_date', '-id')[
+                (number - 1) * SEARCH_POSTS - 1]
+            cursor = encode_cursor(last)
+        offset_ms = self.measure(
+            lambda: list(Paginator(posts, SEARCH_POSTS).get_page(number)),
+            repeat)
+        cursor_ms = self.measure(
+            lambda: list(CursorPaginator(posts, SEARCH_POSTS).get_page(
+                number, after=cursor)),
+            repeat)
+        self.stdout.write(f'Страница {number}: OFFSET {offset_ms:.2f} мс, '
+                          f'курсор {cursor_ms:.2f} мс')
+
+    @staticmethod
+    def measure(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings) * 1000
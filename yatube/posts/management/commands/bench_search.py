@@ -0,0 +1,93 @@
+import itertools
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+from posts.models import Post, User
+from posts.utils import SEARCH_POSTS
+
+BATCH_SIZE = 10000
+SYLLABLES = ('ка', 'ло', 'ми', 'ра', 'ну', 'те', 'во', 'ст', 'ри', 'зо',
+             'па', 'ле', 'ды', 'шу', 'че', 'бо', 'гра', 'про', 'сне', 'кто')
+CONSONANTS = 'нтрлкмдв'
+ENDINGS = ('', 'а', 'ы', 'ом', 'ами', 'ах', 'у', 'е')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает поиск через LIKE с поисковым индексом на '
+            'сгенерированных постах с распределением слов по Ципфу. '
+            'Данные создаются во временной транзакции и откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--words', type=int, default=20000)
+        parser.add_argument('--length', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(0)
+        vocabulary = self.vocabulary(options['words'])
+        with transaction.atomic():
+            self.seed(vocabulary, options['posts'], options['length'])
+            started = time.perf_counter()
+            search.rebuild()
+            self.stdout.write(f'Индекс построен за '
+                              f'{time.perf_counter() - started:.1f} с')
+            queries = [vocabulary[rank] for rank in (10, 1000, 10000)
+                       if rank < len(vocabulary)]
+            queries.append(f'{vocabulary[5]} {vocabulary[50]}')
+            for query in queries:
+                self.compare(query, options['repeat'])
+            transaction.set_rollback(True)
+
+    def vocabulary(self, size):
+        words = set()
+        while len(words) < size:
+            words.add(''.join(self.random.choices(
+                SYLLABLES, k=self.random.randint(2, 4)
+            )) + self.random.choice(CONSONANTS))
+        return sorted(words, key=lambda word: self.random.random())
+
+    def seed(self, vocabulary, total, length):
+        author = User.objects.create(username='bench_search')
+        weights = list(itertools.accumulate(
+            1 / rank for rank in range(1, len(vocabulary) + 1)))
+        started = time.perf_counter()
+        for offset in range(0, total, BATCH_SIZE):
+            Post.objects.bulk_create(
+                Post(author=author, text=' '.join(
+                    word + self.random.choice(ENDINGS)
+                    for word in self.random.choices(
+                        vocabulary, cum_weights=weights, k=length)))
+                for _ in range(offset, min(offset + BATCH_SIZE, total)))
+        self.stdout.write(f'Создано постов: {total} '
+                          f'за {time.perf_counter() - started:.1f} с')
+
+    def compare(self, query, repeat):
+        words = query.split()
+        like = Post.objects.all()
+        for word in words:
+            like = like.filter(text__icontains=word)
+        like_ms = self.measure(
+            lambda: list(like.order_by('-pub_date')[:SEARCH_POSTS]), repeat)
+        count_ms = self.measure(like.count, repeat)
+        index_ms = self.measure(
+            lambda: search.search_posts(query, SEARCH_POSTS), repeat)
+        matching = search.filter_posts(Post.objects.all(), query)
+        admin_ms = self.measure(matching.count, repeat)
+        self.stdout.write(
+            f'«{query}»: LIKE {like_ms:.1f} мс (COUNT {count_ms:.1f} мс), '
+            f'индекс {index_ms:.1f} мс (COUNT {admin_ms:.1f} мс), '
+            f'найдено {matching.count()}')
+
+    @staticmethod
+    def measure(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings) * 1000
@@ -0,0 +1,63 @@
+import io
+import shutil
+import tempfile
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from PIL import Image
+
+from posts.models import Post, User
+from posts.thumbnails import pending, process_batch
+
+
+class Command(BaseCommand):
+    help = ('Замеряет пропускную способность воркера миниатюр на пачке '
+            'загруженных картинок при разном числе потоков.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=int, default=200)
+        parser.add_argument('--size', default='1600x1200')
+        parser.add_argument('--workers', type=int, nargs='+',
+                            default=[1, 2, 4])
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp()
+        author = User.objects.create(username='bench_thumbnails')
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                image = self.make_image(options['size'])
+                for workers in options['workers']:
+                    self.upload(author, image, options['images'])
+                    self.run(workers)
+        finally:
+            author.delete()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+    @staticmethod
+    def make_image(size):
+        width, height = map(int, size.split('x'))
+        buffer = io.BytesIO()
+        Image.effect_noise((width, height), 64).convert('RGB').save(
+            buffer, 'JPEG')
+        return buffer.getvalue()
+
+    def upload(self, author, image, count):
+        started = time.perf_counter()
+        for number in range(count):
+            Post.objects.create(author=author, text='Пост', image=(
+                SimpleUploadedFile(f'bench{number}.jpg', image,
+                                   content_type='image/jpeg')))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'Загрузка {count} постов с картинками: '
+                          f'{count / elapsed:.1f} в секунду')
+
+    def run(self, workers):
+        started = time.perf_counter()
+        total = 0
+        while pending().exists():
+            total += process_batch(100, workers)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'Потоков {workers}: {total} миниатюр, '
+                          f'{total / elapsed:.1f} в секунду')
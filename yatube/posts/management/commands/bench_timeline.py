@@ -0,0 +1,69 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from posts.models import Follow, Post, User
+from posts.timeline import followed_posts
+from posts.utils import SEARCH_POSTS, CursorPaginator
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает ленту подписок через JOIN с Follow и '
+            'материализованную ленту. Данные создаются во временной '
+            'транзакции и откатываются после замера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=200000)
+        parser.add_argument('--follows', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), override_settings(FOLLOW_TIMELINE=True):
+            reader = self.seed(options)
+            for enabled in (False, True):
+                with override_settings(FOLLOW_TIMELINE=enabled):
+                    elapsed = self.measure(reader, options['repeat'])
+                name = 'материализованная' if enabled else 'JOIN'
+                self.stdout.write(f'Лента {name}: {elapsed:.2f} мс')
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        User.objects.bulk_create(
+            User(username=f'bench_timeline_{number}')
+            for number in range(options['authors']))
+        authors = list(User.objects.filter(
+            username__startswith='bench_timeline_').values_list(
+            'pk', flat=True))
+        reader = User.objects.create(username='bench_timeline_reader')
+        for author_id in random.sample(authors, options['follows']):
+            Follow.objects.create(user=reader, author_id=author_id)
+        started = time.perf_counter()
+        posts = 0
+        while posts < options['posts']:
+            batch = Post.objects.bulk_create(
+                Post(author_id=random.choice(authors), text='Пост')
+                for _ in range(min(BATCH_SIZE, options['posts'] - posts)))
+            posts += len(batch)
+        # bulk_create не шлёт сигналов, поэтому ленту заполняем заново
+        for follow in Follow.objects.filter(user=reader):
+            Follow.objects.filter(pk=follow.pk).delete()
+            Follow.objects.create(user=reader, author_id=follow.author_id)
+        self.stdout.write(f'Данные созданы за '
+                          f'{time.perf_counter() - started:.1f} с')
+        return reader
+
+    @staticmethod
+    def measure(reader, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(CursorPaginator(followed_posts(reader).for_feed(),
+                                 SEARCH_POSTS).get_page(1))
+            timings.append(time.perf_counter() - started)
+        return min(timings) * 1000
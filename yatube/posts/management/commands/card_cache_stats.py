@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.cards import hit_ratio
+
+
+class Command(BaseCommand):
+    help = 'Показывает долю попаданий в кэш карточек постов.'
+
+    def handle(self, *args, **options):
+        if not settings.POST_CARD_STATS:
+            self.stdout.write('Счётчики выключены: POST_CARD_STATS = False')
+            return
+        hits, misses, ratio = hit_ratio()
+        self.stdout.write(f'Попаданий: {hits}, промахов: {misses}, '
+                          f'доля попаданий: {ratio:.1%}')
@@ -0,0 +1,43 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import (FORMATS, REPORT_EVERY, TABLES, export_rows,
+                            file_name, write_rows)
+
+
+class Command(BaseCommand):
+    help = ('Выгружает группы, посты, комментарии и подписки в каталог: '
+            'по файлу JSON Lines или CSV на таблицу. Строки читаются '
+            'из базы потоком, память не растёт с объёмом данных.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--tables', nargs='+', choices=list(TABLES),
+                            default=list(TABLES))
+
+    def handle(self, *args, **options):
+        os.makedirs(options['directory'], exist_ok=True)
+        for table in options['tables']:
+            path = os.path.join(options['directory'],
+                                file_name(table, options['format']))
+            started = time.perf_counter()
+            with open(path, 'w', encoding='utf-8', newline='') as output:
+                count = write_rows(self.progress(table, export_rows(table)),
+                                   output, table, options['format'])
+            self.report(table, count, started)
+
+    def progress(self, table, rows):
+        started = time.perf_counter()
+        for count, row in enumerate(rows, 1):
+            yield row
+            if count % REPORT_EVERY == 0:
+                self.report(table, count, started)
+
+    def report(self, table, count, started):
+        elapsed = time.perf_counter() - started
+        speed = count / elapsed if elapsed else 0
+        self.stdout.write(f'{table}: {count} строк за {elapsed:.1f} с '
+                          f'({speed:.0f} в секунду)')
@@ -0,0 +1,46 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import (FORMATS, REPORT_EVERY, TABLES, Importer,
+                            file_name, read_rows)
+
+
+class Command(BaseCommand):
+    help = ('Загружает выгрузку export_data пачками через bulk_create. '
+            'Таблицы без файла пропускаются; уже существующие строки '
+            'остаются как есть, строки с занятым ключом получают новый.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--tables', nargs='+', choices=list(TABLES),
+                            default=list(TABLES))
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(options['directory']):
+            raise CommandError(f'Нет каталога {options["directory"]}')
+        importer = Importer()
+        for table in TABLES:
+            path = os.path.join(options['directory'],
+                                file_name(table, options['format']))
+            if table not in options['tables'] or not os.path.exists(path):
+                continue
+            started = time.perf_counter()
+            count = 0
+            with open(path, encoding='utf-8', newline='') as source:
+                rows = read_rows(source, options['format'], table)
+                for loaded in importer.load(table, rows):
+                    count += loaded
+                    if count % REPORT_EVERY == 0:
+                        self.report(table, count, started)
+            self.report(table, count, started)
+        importer.finish()
+        self.stdout.write('Счётчики пересчитаны, ленты сброшены')
+
+    def report(self, table, count, started):
+        elapsed = time.perf_counter() - started
+        speed = count / elapsed if elapsed else 0
+        self.stdout.write(f'{table}: {count} строк за {elapsed:.1f} с '
+                          f'({speed:.0f} в секунду)')
@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.thumbnails import process_batch
+
+
+class Command(BaseCommand):
+    help = ('Воркер миниатюр: делает их для новых картинок постов вне '
+            'запроса. С --once обрабатывает текущую очередь и выходит.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=settings.THUMBNAIL_WORKERS)
+        parser.add_argument('--batch', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=2)
+        parser.add_argument('--once', action='store_true')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            started = time.perf_counter()
+            done = process_batch(options['batch'], options['workers'])
+            elapsed = time.perf_counter() - started
+            if done:
+                total += done
+                self.stdout.write(f'Миниатюр: {done} за {elapsed:.2f} с '
+                                  f'({done / elapsed:.1f} в секунду)')
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['interval'])
+        self.stdout.write(f'Всего миниатюр: {total}')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.counters import find_mismatches, rebuild_counters
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает денормализованные счётчики постов, комментариев '
+            'и подписок. С --check только проверяет их согласованность.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true')
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            rebuild_counters()
+            self.stdout.write('Счётчики пересчитаны')
+            return
+        mismatches = 0
+        for obj, counter, stored, actual in find_mismatches():
+            mismatches += 1
+            self.stdout.write(f'{obj._meta.label} {obj.pk} {counter}: '
+                              f'сохранено {stored}, на самом деле {actual}')
+        if mismatches:
+            raise CommandError(f'Расхождений в счётчиках: {mismatches}')
+        self.stdout.write('Счётчики согласованы')
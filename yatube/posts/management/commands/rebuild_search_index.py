@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = ('Строит поисковый индекс постов заново: FTS5 на SQLite, '
+            'иначе обратный индекс в таблице SearchTerm.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        search.rebuild()
+        backend = 'FTS5' if search.fts5_available() else 'SearchTerm'
+        self.stdout.write(f'Индекс {backend} построен за '
+                          f'{time.perf_counter() - started:.1f} с')
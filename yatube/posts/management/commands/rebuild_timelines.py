@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+from posts.models import Follow, TimelineEntry
+
+
+class Command(BaseCommand):
+    help = ('Заполняет материализованные ленты подписок заново. '
+            'С --trim только обрезает их до FOLLOW_TIMELINE_LENGTH.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trim', action='store_true')
+
+    def handle(self, *args, **options):
+        readers = Follow.objects.values_list(
+            'user_id', flat=True).distinct().order_by()
+        if not options['trim']:
+            with transaction.atomic():
+                TimelineEntry.objects.all().delete()
+                for follow in Follow.objects.only(
+                        'user_id', 'author_id').iterator():
+                    timeline.backfill(follow)
+        timeline.trim(readers)
+        self.stdout.write(
+            f'Записей в лентах: {TimelineEntry.objects.count()}')
@@ -0,0 +1,76 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:55
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+# копия posts.counters на момент миграции: живой модуль может
+# измениться вместе со схемой, а миграция работает со старой
+COUNTERS = (
+    ('Profile', 'posts_count', 'Post', 'author', 'user'),
+    ('Profile', 'followers_count', 'Follow', 'author', 'user'),
+    ('Profile', 'following_count', 'Follow', 'user', 'user'),
+    ('Group', 'posts_count', 'Post', 'group', 'pk'),
+    ('Post', 'comments_count', 'Comment', 'post', 'pk'),
+)
+
+
+def actual_count(related, field, key):
+    rows = related.objects.filter(**{field: OuterRef(key)}).order_by()
+    return Coalesce(Subquery(
+        rows.values(field).annotate(total=Count('pk')).values('total')), 0)
+
+
+def rebuild_counters(apps):
+    Profile = apps.get_model('posts', 'Profile')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    missing = User.objects.filter(profile__isnull=True).values_list(
+        'pk', flat=True)
+    Profile.objects.bulk_create(
+        Profile(user_id=pk) for pk in missing.iterator())
+    for model, counter, related, field, key in COUNTERS:
+        model = apps.get_model('posts', model)
+        related = apps.get_model('posts', related)
+        model.objects.update(**{counter: actual_count(related, field, key)})
+
+
+def fill_counters(apps, schema_editor):
+    rebuild_counters(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0011_auto_20261018_0352'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.IntegerField(default=0, verbose_name='Количество постов'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.IntegerField(default=0, verbose_name='Количество комментариев'),
+        ),
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.IntegerField(default=0, verbose_name='Количество постов')),
+                ('followers_count', models.IntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.IntegerField(default=0, verbose_name='Подписок')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Профиль',
+                'verbose_name_plural': 'Профили',
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
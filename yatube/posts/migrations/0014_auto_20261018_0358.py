@@ -0,0 +1,73 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:58
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# копия posts.counters на момент миграции: живой модуль может
+# измениться вместе со схемой, а миграция работает со старой
+COUNTERS = (
+    ('Profile', 'posts_count', 'Post', 'author', 'user'),
+    ('Profile', 'followers_count', 'Follow', 'author', 'user'),
+    ('Profile', 'following_count', 'Follow', 'user', 'user'),
+    ('Group', 'posts_count', 'Post', 'group', 'pk'),
+    ('Post', 'comments_count', 'Comment', 'post', 'pk'),
+)
+
+
+def actual_count(related, field, key):
+    rows = related.objects.filter(**{field: OuterRef(key)}).order_by()
+    return Coalesce(Subquery(
+        rows.values(field).annotate(total=Count('pk')).values('total')), 0)
+
+
+def rebuild_counters(apps):
+    Profile = apps.get_model('posts', 'Profile')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    missing = User.objects.filter(profile__isnull=True).values_list(
+        'pk', flat=True)
+    Profile.objects.bulk_create(
+        Profile(user_id=pk) for pk in missing.iterator())
+    for model, counter, related, field, key in COUNTERS:
+        model = apps.get_model('posts', model)
+        related = apps.get_model('posts', related)
+        model.objects.update(**{counter: actual_count(related, field, key)})
+
+
+def delete_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    duplicates = Follow.objects.values('user', 'author').annotate(
+        first=Min('pk'), total=Count('pk')).filter(total__gt=1)
+    for row in list(duplicates):
+        Follow.objects.filter(user=row['user'], author=row['author']).exclude(
+            pk=row['first']).delete()
+    rebuild_counters(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_timelineentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_follows,
+                             migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='post_author_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='post_group_feed_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
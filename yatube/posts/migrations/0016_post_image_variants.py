@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:09
+
+from django.db import migrations, models
+
+
+def requeue_images(apps, schema_editor):
+    """Ставит готовые картинки в очередь миниатюр ради вариантов."""
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.exclude(image='').update(thumbnail='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.TextField(blank=True, editable=False, verbose_name='Варианты картинки'),
+        ),
+        migrations.RunPython(requeue_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,163 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:12
+
+from collections import Counter
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# копия posts.search и posts.stemmer на момент миграции: живые модули
+# могут измениться вместе со схемой, а миграция работает со старой.
+# Индекс после правок стеммера перестраивает rebuild_search_index
+FTS_TABLE = 'posts_post_fts'
+WORD = re.compile(r'\w+')
+TERM_LENGTH = 64
+BATCH_SIZE = 1000
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = re.compile(
+    r'((?<=[ая])(в|вши|вшись)|(ив|ивши|ившись|ыв|ывши|ывшись))$')
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVAL = re.compile(
+    r'(((?<=[ая])(ем|нн|вш|ющ|щ)|(ивш|ывш|ующ))?'
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею))$')
+VERB = re.compile(
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)|'
+    r'(ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|'
+    r'ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю))$')
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|'
+    r'ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$')
+I_ENDING = re.compile(r'и$')
+DERIVATIONAL = re.compile(r'(ость|ост)$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+DOUBLE_N = re.compile(r'(?<=н)н$')
+SOFT_SIGN = re.compile(r'ь$')
+
+
+def region(word, start=0):
+    """Начало области после первой согласной, идущей за гласной."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def cut(pattern, word):
+    """Отрезает окончание pattern; возвращает слово и признак успеха."""
+    stripped = pattern.sub('', word, count=1)
+    return stripped, stripped != word
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    vowel = next((index for index, letter in enumerate(word)
+                  if letter in VOWELS), None)
+    if vowel is None:
+        return word
+    prefix, rv = word[:vowel + 1], word[vowel + 1:]
+    r2 = region(word, region(word)) - len(prefix)
+
+    rv, found = cut(PERFECTIVE_GERUND, rv)
+    if not found:
+        rv, _ = cut(REFLEXIVE, rv)
+        for pattern in (ADJECTIVAL, VERB, NOUN):
+            rv, found = cut(pattern, rv)
+            if found:
+                break
+    rv, _ = cut(I_ENDING, rv)
+    match = DERIVATIONAL.search(rv)
+    if match and match.start() >= r2:
+        rv = rv[:match.start()]
+    rv, found = cut(DOUBLE_N, rv)
+    if not found:
+        rv, found = cut(SUPERLATIVE, rv)
+        if found:
+            rv, _ = cut(DOUBLE_N, rv)
+        else:
+            rv, _ = cut(SOFT_SIGN, rv)
+    return prefix + rv
+
+
+def tokenize(text):
+    return [stem(word)[:TERM_LENGTH] for word in WORD.findall(text.lower())]
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def index_posts(apps, connection, rows):
+    if fts5_available(connection):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                [(post_id, ' '.join(tokenize(text)))
+                 for post_id, text in rows])
+        return
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    terms = []
+    for post_id, text in rows:
+        words = tokenize(text)
+        terms.append(SearchTerm(term='', post_id=post_id,
+                                frequency=len(words)))
+        terms.extend(SearchTerm(term=term, post_id=post_id, frequency=count)
+                     for term, count in Counter(words).items())
+    SearchTerm.objects.using(connection.alias).bulk_create(terms)
+
+
+def build_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if fts5_available(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+                           f'USING fts5(body)')
+    Post = apps.get_model('posts', 'Post')
+    rows = Post.objects.using(connection.alias).values_list(
+        'id', 'text').order_by()
+    batch = []
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            index_posts(apps, connection, batch)
+            batch = []
+    index_posts(apps, connection, batch)
+
+
+def drop_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Основа слова')),
+                ('frequency', models.IntegerField(verbose_name='Число вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Слово поиска',
+                'verbose_name_plural': 'Поисковый индекс',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['term', 'post'], name='search_term_idx'),
+        ),
+        migrations.RunPython(build_search_index, drop_search_index),
+    ]
@@ -1,20 +1,65 @@
+import json
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 
 User = get_user_model()
 POST_STR = 15
+FEED_FIELDS = (
+    'id', 'text', 'pub_date', 'image', 'thumbnail', 'image_variants',
+    'comments_count', 'author', 'group',
+    'author__username', 'author__first_name', 'author__last_name',
+    'group__slug', 'group__title',
+)
+# Посты в очереди posts.thumbnails: условие частичного индекса очереди
+THUMBNAIL_PENDING = models.Q(thumbnail='') & ~models.Q(image='')
+
+
+class CountedModel(models.Model):
+    """Модель, сохранение которой меняет счётчики из posts.signals.
+
+    Сохранение идёт в одной транзакции с F()-обновлением счётчиков,
+    а при изменении объекта поля-счётчики не перезаписываются
+    значениями, прочитанными до изменения.
+    """
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
 
+    def save(self, *args, **kwargs):
+        if (self.counter_fields and not self._state.adding
+                and kwargs.get('update_fields') is None):
+            skipped = self.get_deferred_fields().union(self.counter_fields)
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+                and field.name not in skipped
+            ]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
-class Group(models.Model):
+
+class Group(CountedModel):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.IntegerField('Количество постов', default=0)
+
+    counter_fields = ('posts_count',)
 
     def __str__(self):
         return self.title
 
 
-class Post(models.Model):
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для карточек ленты: автор и группа одним JOIN,
+        только поля, которые выводят шаблоны."""
+        return self.select_related('author', 'group').only(*FEED_FIELDS)
+
+
+class Post(CountedModel):
     text = models.TextField('Текст поста', help_text='Введите текст поста')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
     author = models.ForeignKey(
@@ -37,17 +82,59 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    thumbnail = models.CharField('Миниатюра', max_length=255, blank=True,
+                                 editable=False)
+    image_variants = models.TextField('Варианты картинки', blank=True,
+                                      editable=False)
+
+    comments_count = models.IntegerField('Количество комментариев',
+                                         default=0)
+
+    objects = PostQuerySet.as_manager()
+    counter_fields = ('comments_count',)
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('-pub_date', '-id'), name='post_feed_idx'),
+            models.Index(fields=('author', '-pub_date', '-id'),
+                         name='post_author_feed_idx'),
+            models.Index(fields=('group', '-pub_date', '-id'),
+                         name='post_group_feed_idx'),
+            models.Index(fields=('id',), name='post_thumbnail_queue_idx',
+                         condition=THUMBNAIL_PENDING),
+        )
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
     def __str__(self):
         return self.text[:POST_STR]
 
+    @property
+    def thumbnail_url(self):
+        """Миниатюра, а пока её нет — оригинал картинки."""
+        name = self.thumbnail or self.image.name
+        return self.image.storage.url(name) if name else ''
+
+    def srcset(self, image_format):
+        """srcset из вариантов картинки в формате image_format."""
+        if not self.image_variants:
+            return ''
+        variants = json.loads(self.image_variants).get(image_format, ())
+        url = self.image.storage.url
+        return ', '.join(f'{url(name)} {width}w'
+                         for width, height, name in variants)
+
+    @property
+    def webp_srcset(self):
+        return self.srcset('WEBP')
+
+    @property
+    def jpeg_srcset(self):
+        return self.srcset('JPEG')
+
 
-class Comment(models.Model):
+class Comment(CountedModel):
     post = models.ForeignKey(Post, on_delete=models.CASCADE,
                              related_name='comments')
     author = models.ForeignKey(
@@ -60,8 +147,14 @@ class Comment(models.Model):
     created = models.DateTimeField('Дата и время публикации',
                                    auto_now_add=True)
 
+    class Meta:
+        indexes = (
+            models.Index(fields=('post', 'created'),
+                         name='comment_post_created_idx'),
+        )
+
 
-class Follow(models.Model):
+class Follow(CountedModel):
     user = models.ForeignKey(User,
                              verbose_name='Подписчик',
                              related_name='follower',
@@ -69,3 +162,64 @@ class Follow(models.Model):
     author = models.ForeignKey(User, verbose_name='Автор',
                                related_name='following',
                                on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(fields=('user', 'author'),
+                                    name='unique_follow'),
+        )
+
+
+class Profile(CountedModel):
+    user = models.OneToOneField(User,
+                                verbose_name='Пользователь',
+                                related_name='profile',
+                                on_delete=models.CASCADE)
+    posts_count = models.IntegerField('Количество постов', default=0)
+    followers_count = models.IntegerField('Подписчиков', default=0)
+    following_count = models.IntegerField('Подписок', default=0)
+
+    counter_fields = ('posts_count', 'followers_count', 'following_count')
+
+    class Meta:
+        verbose_name = 'Профиль'
+        verbose_name_plural = 'Профили'
+
+    def __str__(self):
+        return str(self.user)
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(User,
+                             verbose_name='Подписчик',
+                             related_name='timeline',
+                             on_delete=models.CASCADE)
+    post = models.ForeignKey(Post,
+                             verbose_name='Пост',
+                             related_name='timeline_entries',
+                             on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = ('user', 'post')
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Лента подписок'
+
+
+class SearchTerm(models.Model):
+    """Постинг обратного индекса posts.search для баз без FTS5.
+
+    Строка с пустым term хранит в frequency длину поста в словах.
+    """
+    term = models.CharField('Основа слова', max_length=64)
+    post = models.ForeignKey(Post,
+                             verbose_name='Пост',
+                             related_name='search_terms',
+                             on_delete=models.CASCADE)
+    frequency = models.IntegerField('Число вхождений')
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('term', 'post'), name='search_term_idx'),
+        )
+        verbose_name = 'Слово поиска'
+        verbose_name_plural = 'Поисковый индекс'
@@ -0,0 +1,128 @@
+"""Массовая модерация постов запросами над множеством.
+
+QuerySet.delete() читает в память все посты и каскадные строки и для
+каждого объекта шлёт сигналы, каждый со своими запросами, а сохранение
+из list_editable обновляет посты по одному. Здесь посты меняются одним
+UPDATE или DELETE, каскадные строки удаляются пачками по id постов, а
+то, что делали бы сигналы posts.signals, — счётчики, поисковый индекс
+и сброс карточек и лент — делается для пачки целиком. Кэш сбрасывается
+после коммита: иначе читатель успел бы закэшировать прежние данные
+заново, пока транзакция не завершена.
+"""
+from itertools import chain
+
+from django.db import transaction
+
+from . import cards, search
+from .counters import actual_count
+from .decorators import INDEX_FEED, invalidate_feeds
+from .models import Group, Post, Profile
+from .utils import keyset_after
+
+BATCH_SIZE = 1000
+
+
+def post_batches(posts):
+    """Пачки (id, id автора, id группы) постов от старых к новым.
+
+    Пачки выбираются по ключу (pub_date, id), как курсор ленты: запрос
+    идёт по тем же индексам, а не OFFSET, и цена пачки не растёт к
+    концу выборки.
+    """
+    rows = posts.order_by('pub_date', 'id').values_list(
+        'pub_date', 'id', 'author_id', 'group_id')
+    cursor = None
+    while True:
+        page = rows if cursor is None else keyset_after(
+            rows, 'pub_date', cursor, descending=False)
+        batch = list(page[:BATCH_SIZE])
+        if not batch:
+            return
+        cursor = batch[-1][:2]
+        yield [row[1:] for row in batch]
+
+
+def chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def recount(author_ids=(), group_ids=()):
+    """Пересчитывает счётчики постов авторов и групп по данным."""
+    for chunk in chunks(author_ids):
+        Profile.objects.filter(user_id__in=chunk).update(
+            posts_count=actual_count(Post, 'author', 'user'))
+    for chunk in chunks(group_ids):
+        Group.objects.filter(pk__in=chunk).update(
+            posts_count=actual_count(Post, 'group', 'pk'))
+
+
+def forget(post_ids, authors, groups):
+    """Сбрасывает страницы постов и общие ленты, на которых они были:
+    каждую ленту один раз на действие, а не на каждую пачку."""
+    invalidate_feeds(chain(
+        (f'post:{post_id}' for post_id in post_ids), [INDEX_FEED],
+        (f'profile:{author_id}' for author_id in authors),
+        (f'group:{group_id}' for group_id in groups)))
+
+
+def dependents(post_ids):
+    """Строки, которые on_delete=CASCADE удалил бы вместе с постами.
+
+    На эти модели самих никто не ссылается, поэтому их можно удалять
+    без Collector одним DELETE на модель.
+    """
+    for relation in Post._meta.related_objects:
+        yield relation.related_model._base_manager.filter(
+            **{f'{relation.field.name}__in': post_ids})
+
+
+def move_posts(posts, group):
+    """Переносит посты в группу (None — убирает из групп) одним UPDATE
+    и возвращает число перенесённых."""
+    posts = posts.exclude(group=group)
+    post_ids, authors, groups = [], set(), set()
+    with transaction.atomic():
+        for batch in post_batches(posts):
+            post_ids.extend(post_id for post_id, _, _ in batch)
+            authors.update(author_id for _, author_id, _ in batch)
+            groups.update(group_id for _, _, group_id in batch
+                          if group_id is not None)
+        moved = posts.update(group=group)
+        if group is not None:
+            groups.add(group.pk)
+        recount(group_ids=groups)
+
+        def invalidate():
+            cards.invalidate(post_ids)
+            forget(post_ids, authors, groups)
+
+        transaction.on_commit(invalidate)
+    return moved
+
+
+def delete_posts(posts):
+    """Удаляет посты одним DELETE, а каскадные строки и поисковый
+    индекс — пачками; возвращает число удалённых постов."""
+    post_ids, authors, groups = [], set(), set()
+    with transaction.atomic():
+        for batch in post_batches(posts):
+            ids = [post_id for post_id, _, _ in batch]
+            for rows in dependents(ids):
+                rows._raw_delete(rows.db)
+            search.remove_posts(ids)
+            post_ids.extend(ids)
+            authors.update(author_id for _, author_id, _ in batch)
+            groups.update(group_id for _, _, group_id in batch
+                          if group_id is not None)
+        if not post_ids:
+            return 0
+        # посты, добавленные после обхода, остаются вместе с их строками
+        deleted = posts.filter(pk__lte=max(post_ids)).order_by()
+        deleted = deleted._raw_delete(deleted.db)
+        recount(authors, groups)
+        # карточки удалённых постов больше не показываются, а страница
+        # поста закэширована под своей лентой
+        transaction.on_commit(lambda: forget(post_ids, authors, groups))
+    return deleted
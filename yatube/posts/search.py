@@ -0,0 +1,231 @@
+import math
+import re
+import time
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Avg, Count
+
+from .stemmer import stem
+
+FTS_TABLE = 'posts_post_fts'
+WORD = re.compile(r'\w+')
+TERM_LENGTH = 64
+BATCH_SIZE = 1000
+BM25_K1 = 1.2
+BM25_B = 0.75
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+SECONDS_IN_DAY = 86400
+
+FTS_SEARCH = f'''
+    SELECT id, score FROM (
+        SELECT post.id AS id, -bm25({FTS_TABLE}) * (
+            1 + %s / (1 + (%s - julianday(post.pub_date)) / %s)
+        ) AS score
+        FROM {FTS_TABLE} JOIN posts_post post ON post.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s
+    )
+    WHERE %s IS NULL OR score < %s OR (score = %s AND id < %s)
+    ORDER BY score DESC, id DESC
+    LIMIT %s
+'''
+
+
+def tokenize(text):
+    """Основы слов текста в порядке появления."""
+    return [stem(word)[:TERM_LENGTH] for word in WORD.findall(text.lower())]
+
+
+def query_terms(query):
+    return sorted(set(tokenize(query)))
+
+
+@lru_cache(maxsize=None)
+def fts5_available(using=DEFAULT_DB_ALIAS):
+    """SQLite с FTS5; иначе работает обратный индекс в SearchTerm."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def create_fts_table(using=DEFAULT_DB_ALIAS):
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(body)')
+
+
+def drop_fts_table(using=DEFAULT_DB_ALIAS):
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def remove_posts(post_ids, apps=django_apps, using=DEFAULT_DB_ALIAS):
+    # FTS5 заметно быстрее удаляет записи по возрастанию rowid
+    post_ids = sorted(post_ids)
+    if fts5_available(using):
+        with connections[using].cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                               [(post_id,) for post_id in post_ids])
+    else:
+        SearchTerm = apps.get_model('posts', 'SearchTerm')
+        SearchTerm.objects.using(using).filter(post__in=post_ids).delete()
+
+
+def index_posts(rows, apps=django_apps, using=DEFAULT_DB_ALIAS):
+    """Заменяет записи индекса для пар (id поста, текст)."""
+    with transaction.atomic(using):
+        replace_posts(list(rows), apps, using)
+
+
+def replace_posts(rows, apps, using):
+    remove_posts((post_id for post_id, _ in rows), apps, using)
+    if fts5_available(using):
+        with connections[using].cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                [(post_id, ' '.join(tokenize(text)))
+                 for post_id, text in rows])
+        return
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    terms = []
+    for post_id, text in rows:
+        words = tokenize(text)
+        terms.append(SearchTerm(term='', post_id=post_id,
+                                frequency=len(words)))
+        terms.extend(SearchTerm(term=term, post_id=post_id, frequency=count)
+                     for term, count in Counter(words).items())
+    SearchTerm.objects.using(using).bulk_create(terms)
+
+
+def rebuild(apps=django_apps, using=DEFAULT_DB_ALIAS):
+    """Строит индекс всех постов заново пачками по BATCH_SIZE."""
+    if fts5_available(using):
+        create_fts_table(using)
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    else:
+        apps.get_model('posts', 'SearchTerm').objects.using(using).delete()
+    Post = apps.get_model('posts', 'Post')
+    rows = Post.objects.using(using).values_list('id', 'text').order_by()
+    batch = []
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            index_posts(batch, apps, using)
+            batch = []
+    index_posts(batch, apps, using)
+
+
+def match_expression(terms):
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def filter_posts(posts, query):
+    """Оставляет в posts посты со всеми словами запроса; пустой запрос
+    возвращает None."""
+    terms = query_terms(query)
+    if not terms:
+        return None
+    if not fts5_available(posts.db):
+        return posts.filter(pk__in=matching_terms(terms).values('post'))
+    return posts.extra(
+        where=[f'"posts_post"."id" IN (SELECT rowid FROM {FTS_TABLE} '
+               f'WHERE {FTS_TABLE} MATCH %s)'],
+        params=[match_expression(terms)])
+
+
+def matching_terms(terms):
+    SearchTerm = django_apps.get_model('posts', 'SearchTerm')
+    return SearchTerm.objects.filter(term__in=terms).values('post').annotate(
+        matched=Count('term')).filter(matched=len(terms)).order_by()
+
+
+def julian_day(moment):
+    return moment.timestamp() / SECONDS_IN_DAY + UNIX_EPOCH_JULIAN_DAY
+
+
+def julian_day_now():
+    return time.time() / SECONDS_IN_DAY + UNIX_EPOCH_JULIAN_DAY
+
+
+def recency(now, published):
+    """Множитель свежести: 1 + boost для нового поста, вдвое меньше
+    прибавка через SEARCH_RECENCY_DAYS дней."""
+    age = now - published
+    return 1 + settings.SEARCH_RECENCY_BOOST / (
+        1 + age / settings.SEARCH_RECENCY_DAYS)
+
+
+def decode_cursor(cursor):
+    try:
+        now, score, post_id = cursor.split('_')
+        return float(now), float(score), int(post_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def search_posts(query, limit, after=None):
+    """Страница поиска: пары (id поста, релевантность) по убыванию
+    BM25 с поправкой на свежесть и курсор следующей страницы.
+
+    Курсор хранит момент первого запроса, чтобы поправка на свежесть
+    и порядок не менялись при листании.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return [], None
+    now, score, post_id = decode_cursor(after) or (
+        julian_day_now(), None, None)
+    fetch = fts_search if fts5_available() else index_search
+    rows = fetch(terms, now, score, post_id, limit + 1)
+    if len(rows) <= limit:
+        return rows, None
+    last_id, last_score = rows[limit - 1]
+    return rows[:limit], f'{now!r}_{last_score!r}_{last_id}'
+
+
+def fts_search(terms, now, score, post_id, limit):
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(FTS_SEARCH, [
+            settings.SEARCH_RECENCY_BOOST, now, settings.SEARCH_RECENCY_DAYS,
+            match_expression(terms), score, score, score, post_id, limit])
+        return cursor.fetchall()
+
+
+def index_search(terms, now, score, post_id, limit):
+    """BM25 по постингам SearchTerm; считается в Python для всех
+    постов, где встречаются все слова запроса."""
+    SearchTerm = django_apps.get_model('posts', 'SearchTerm')
+    Post = django_apps.get_model('posts', 'Post')
+    stats = SearchTerm.objects.filter(term='').aggregate(
+        total=Count('id'), average=Avg('frequency'))
+    frequencies = dict(SearchTerm.objects.filter(term__in=terms).values_list(
+        'term').annotate(Count('id')).order_by())
+    candidates = matching_terms(terms).values('post')
+    lengths = dict(SearchTerm.objects.filter(
+        term='', post__in=candidates).values_list('post', 'frequency'))
+    scores = defaultdict(float)
+    postings = SearchTerm.objects.filter(term__in=terms, post__in=candidates)
+    for term, candidate, frequency in postings.values_list(
+            'term', 'post', 'frequency'):
+        documents = frequencies[term]
+        idf = math.log(
+            1 + (stats['total'] - documents + 0.5) / (documents + 0.5))
+        norm = 1 - BM25_B + BM25_B * lengths[candidate] / stats['average']
+        scores[candidate] += idf * frequency * (BM25_K1 + 1) / (
+            frequency + BM25_K1 * norm)
+    ranked = sorted((
+        (scores[candidate] * recency(now, julian_day(published)), candidate)
+        for candidate, published in Post.objects.filter(
+            pk__in=list(scores)).values_list('id', 'pub_date')
+    ), reverse=True)
+    if score is not None:
+        ranked = [(value, candidate) for value, candidate in ranked
+                  if (value, candidate) < (score, post_id)]
+    return [(candidate, value) for value, candidate in ranked[:limit]]
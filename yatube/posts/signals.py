@@ -0,0 +1,195 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import cards, search, timeline
+from .cards import invalidate_posts
+from .decorators import INDEX_FEED, invalidate_feeds, post_feeds
+from .models import Comment, Follow, Group, Post, Profile, User
+
+
+def shift(queryset, counter, delta):
+    queryset.update(**{counter: F(counter) + delta})
+
+
+def shift_group(group_id, delta):
+    if group_id is not None:
+        shift(Group.objects.filter(pk=group_id), 'posts_count', delta)
+
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Profile.objects.create(user=instance)
+
+
+def image_name(value):
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    instance._saved_group_id = instance.__dict__.get('group_id')
+    instance._previous_group_id = instance._saved_group_id
+    instance._saved_image = image_name(instance.__dict__.get('image'))
+    instance._saved_text = instance.__dict__.get('text')
+    instance._text_changed = False
+
+
+@receiver(pre_save, sender=Post)
+def remember_changes(sender, instance, raw=False, **kwargs):
+    """Запоминает группу до сохранения для счётчиков и лент, а новая
+    картинка снова ставит пост в очередь posts.thumbnails, а по изменению
+    текста index_post решает, нужно ли переиндексировать пост.
+
+    Сохранённое состояние обновляется здесь, а не в post_save, чтобы
+    обработчики post_save не зависели от порядка регистрации.
+    """
+    instance._previous_group_id = instance._saved_group_id
+    if not raw and image_name(instance.image) != instance._saved_image:
+        instance.thumbnail = ''
+        instance.image_variants = ''
+    instance._saved_group_id = instance.group_id
+    instance._saved_image = image_name(instance.image)
+    # отложенный текст не загружен и не сохраняется
+    text = instance.__dict__.get('text', instance._saved_text)
+    instance._text_changed = text != instance._saved_text
+    instance._saved_text = text
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        shift(Profile.objects.filter(user_id=instance.author_id),
+              'posts_count', 1)
+        shift_group(instance.group_id, 1)
+    elif instance._previous_group_id != instance.group_id:
+        shift_group(instance._previous_group_id, -1)
+        shift_group(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    shift(Profile.objects.filter(user_id=instance.author_id),
+          'posts_count', -1)
+    shift_group(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        shift(Post.objects.filter(pk=instance.post_id), 'comments_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    shift(Post.objects.filter(pk=instance.post_id), 'comments_count', -1)
+
+
+def shift_follow(follow, delta):
+    shift(Profile.objects.filter(user_id=follow.author_id),
+          'followers_count', delta)
+    shift(Profile.objects.filter(user_id=follow.user_id),
+          'following_count', delta)
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        shift_follow(instance, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    shift_follow(instance, -1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if settings.FOLLOW_TIMELINE and created and not raw:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if settings.FOLLOW_TIMELINE and created and not raw:
+        timeline.backfill(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    if settings.FOLLOW_TIMELINE:
+        timeline.prune(instance)
+
+
+def after_commit(func, *args):
+    """Сбрасывает кэш после коммита: до него конкурентный запрос прочитал
+    бы старые строки и сохранил их под новой версией."""
+    transaction.on_commit(partial(func, *args))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if not created:
+        after_commit(cards.invalidate, [instance.id])
+    feeds = post_feeds(instance.id, instance.author_id, instance.group_id)
+    if instance._previous_group_id not in (None, instance.group_id):
+        feeds.append(f'group:{instance._previous_group_id}')
+    after_commit(invalidate_feeds, feeds)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_posts(Post.objects.filter(pk=instance.post_id))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    after_commit(invalidate_feeds, [INDEX_FEED, f'group:{instance.id}'])
+    if not created:
+        invalidate_posts(instance.posts.all())
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(sender, instance, created, update_fields=None,
+                      raw=False, **kwargs):
+    if created or raw or (update_fields is not None
+                          and not {'first_name', 'last_name'}
+                          & update_fields):
+        return
+    after_commit(invalidate_feeds, [f'profile:{instance.id}'])
+    invalidate_posts(instance.posts.all())
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow(sender, instance, raw=False, **kwargs):
+    if not raw:
+        after_commit(invalidate_feeds, [f'profile:{instance.author_id}',
+                                        f'profile:{instance.user_id}'])
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, created, raw=False, **kwargs):
+    if not raw and (created or instance._text_changed):
+        search.index_posts([(instance.id, instance.text)])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.remove_posts([instance.id])
@@ -0,0 +1,72 @@
+"""Стеммер Snowball для русского языка.
+
+Повторяет алгоритм https://snowballstem.org/algorithms/russian/stemmer.html:
+окончания ищутся в области RV, словообразовательный суффикс — в R2.
+"""
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = re.compile(
+    r'((?<=[ая])(в|вши|вшись)|(ив|ивши|ившись|ыв|ывши|ывшись))$')
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVAL = re.compile(
+    r'(((?<=[ая])(ем|нн|вш|ющ|щ)|(ивш|ывш|ующ))?'
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею))$')
+VERB = re.compile(
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)|'
+    r'(ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|'
+    r'ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю))$')
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|'
+    r'ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$')
+I_ENDING = re.compile(r'и$')
+DERIVATIONAL = re.compile(r'(ость|ост)$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+DOUBLE_N = re.compile(r'(?<=н)н$')
+SOFT_SIGN = re.compile(r'ь$')
+
+
+def region(word, start=0):
+    """Начало области после первой согласной, идущей за гласной."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def cut(pattern, word):
+    """Отрезает окончание pattern; возвращает слово и признак успеха."""
+    stripped = pattern.sub('', word, count=1)
+    return stripped, stripped != word
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    vowel = next((index for index, letter in enumerate(word)
+                  if letter in VOWELS), None)
+    if vowel is None:
+        return word
+    prefix, rv = word[:vowel + 1], word[vowel + 1:]
+    r2 = region(word, region(word)) - len(prefix)
+
+    rv, found = cut(PERFECTIVE_GERUND, rv)
+    if not found:
+        rv, _ = cut(REFLEXIVE, rv)
+        for pattern in (ADJECTIVAL, VERB, NOUN):
+            rv, found = cut(pattern, rv)
+            if found:
+                break
+    rv, _ = cut(I_ENDING, rv)
+    match = DERIVATIONAL.search(rv)
+    if match and match.start() >= r2:
+        rv = rv[:match.start()]
+    rv, found = cut(DOUBLE_N, rv)
+    if not found:
+        rv, found = cut(SUPERLATIVE, rv)
+        if found:
+            rv, _ = cut(DOUBLE_N, rv)
+        else:
+            rv, _ = cut(SOFT_SIGN, rv)
+    return prefix + rv
@@ -1,12 +1,16 @@
+import json
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..models import Comment, Group, Post, User
+from ..thumbnails import process_batch
 
 TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -56,7 +60,7 @@ class PostCreateFormTests(TestCase):
         self.assertTrue(
             Post.objects.filter(text='Тестовый пост',
                                 author=self.user.id,
-                                image=self.post.image).exists()
+                                image='posts/small.gif').exists()
         )
 
     def test_post_edit_form(self):
@@ -135,3 +139,58 @@ class CommentCreateFormTests(TestCase):
         self.assertEqual(comments.count(), comments_count + 1)
         self.assertTrue(Comment.objects.filter(
             text=form_data['text']).exists())
+
+
+@override_settings(MEDIA_ROOT=TEMP_DIR)
+class ThumbnailTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='AnnaAkhmatova')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    @staticmethod
+    def get_image(name):
+        buffer = BytesIO()
+        Image.new('RGB', (100, 50), 'red').save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(),
+                                  content_type='image/png')
+
+    def test_thumbnail_made_off_request(self):
+        """Миниатюра делается воркером, до этого показывается оригинал"""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с картинкой', 'image': self.get_image('a.png')})
+        post = Post.objects.get()
+        self.assertEqual(post.thumbnail, '')
+        url = reverse('posts:post_detail', kwargs={'post_id': post.id})
+        self.assertContains(self.client.get(url), post.image.url)
+        self.assertEqual(process_batch(10, 1), 1)
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail.startswith('cache/'))
+        self.assertContains(self.client.get(url), post.thumbnail_url)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            {'text': 'Пост с картинкой', 'image': self.get_image('b.png')})
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail, '')
+        self.assertEqual(post.image_variants, '')
+
+    @override_settings(IMAGE_VARIANT_WIDTHS=(40, 80))
+    def test_image_variants_in_srcset(self):
+        """Варианты картинки всех форматов попадают в srcset"""
+        post = Post.objects.create(author=self.user, text='Пост',
+                                   image=self.get_image('c.png'))
+        process_batch(10, 1)
+        post.refresh_from_db()
+        variants = json.loads(post.image_variants)
+        self.assertEqual(set(variants), set(settings.IMAGE_VARIANT_FORMATS))
+        self.assertEqual([width for width, _, _ in variants['WEBP']],
+                         [40, 80])
+        self.assertTrue(variants['WEBP'][0][2].endswith('.webp'))
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, post.webp_srcset)
+        self.assertContains(response, post.jpeg_srcset)
+        self.assertIn(' 80w', post.jpeg_srcset)
@@ -1,6 +1,17 @@
+import shutil
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError
 from django.test import TestCase
+from django.utils import timezone
 
-from ..models import Group, Post, User
+from ..counters import find_mismatches, rebuild_counters
+from ..search import search_posts
+from ..thumbnails import pending
+from ..models import Comment, Follow, Group, Post, User
 
 POST_LENGTH = 15
 
@@ -61,3 +72,199 @@ class GroupModelTest(TestCase):
         """Проверяем, что у модели Group корректно работает __str__."""
         error_message = 'У модели Group неправильно работает метод __str__'
         self.assertEqual(str(self.group), self.group.title, error_message)
+
+
+class CountersTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='auth')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.group2 = Group.objects.create(title='Группа 2', slug='group2')
+
+    def assertCounters(self, obj, **counters):
+        obj.refresh_from_db()
+        for counter, expected in counters.items():
+            with self.subTest(counter=counter):
+                self.assertEqual(getattr(obj, counter), expected)
+
+    def test_post_counters(self):
+        """Счётчики постов автора и группы меняются вместе с постами"""
+        post = Post.objects.create(author=self.author, text='Пост',
+                                   group=self.group)
+        self.assertCounters(self.author.profile, posts_count=1)
+        self.assertCounters(self.group, posts_count=1)
+        post.group = self.group2
+        post.save()
+        self.assertCounters(self.group, posts_count=0)
+        self.assertCounters(self.group2, posts_count=1)
+        post.delete()
+        self.assertCounters(self.author.profile, posts_count=0)
+        self.assertCounters(self.group2, posts_count=0)
+
+    def test_comment_counter_survives_post_save(self):
+        """Сохранение поста не затирает счётчик комментариев"""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.reader, text='Текст')
+        post.text = 'Новый текст'
+        post.save()
+        self.assertCounters(post, comments_count=1)
+        post.comments.get().delete()
+        self.assertCounters(post, comments_count=0)
+
+    def test_follow_counters(self):
+        """Подписка меняет счётчики подписчиков и подписок"""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertCounters(self.author.profile, followers_count=1)
+        self.assertCounters(self.reader.profile, following_count=1)
+        follow.delete()
+        self.assertCounters(self.author.profile, followers_count=0)
+        self.assertCounters(self.reader.profile, following_count=0)
+
+    def test_rebuild_counters(self):
+        """Пересчёт исправляет счётчики после bulk_create"""
+        Post.objects.bulk_create(
+            [Post(author=self.author, text='Пост', group=self.group)
+             for _ in range(3)])
+        self.assertEqual(len(list(find_mismatches())), 2)
+        rebuild_counters()
+        self.assertEqual(list(find_mismatches()), [])
+        self.assertCounters(self.author.profile, posts_count=3)
+        self.assertCounters(self.group, posts_count=3)
+
+
+class IndexesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(author=cls.user, text='Пост',
+                                       group=cls.group)
+
+    def test_hot_lookups_use_indexes(self):
+        """Ленты автора и группы, комментарии, подписки и очередь миниатюр
+        идут по индексам"""
+        queries = {
+            'post_author_feed_idx': self.user.posts.order_by(
+                '-pub_date', '-id'),
+            'post_group_feed_idx': self.group.posts.order_by(
+                '-pub_date', '-id'),
+            'comment_post_created_idx': Comment.objects.filter(
+                post=self.post).order_by('created'),
+            # SQLite хранит уникальное ограничение как autoindex
+            ('INDEX sqlite_autoindex_posts_follow_1 '
+             '(user_id=? AND author_id=?)'):
+            Follow.objects.filter(
+                user=self.user, author=self.user),
+            'post_thumbnail_queue_idx': pending(),
+        }
+        for index, queryset in queries.items():
+            with self.subTest(index=index):
+                self.assertIn(index, queryset.explain())
+
+    def test_follow_is_unique(self):
+        """Нельзя подписаться на автора дважды"""
+        Follow.objects.create(user=self.user, author=self.user)
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=self.user, author=self.user)
+
+
+class TransferTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        author = User.objects.create_user(username='auth')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(title='Группа', slug='group',
+                                     description='Описание')
+        self.post = Post.objects.create(author=author, group=group,
+                                        text='Пост о реках, "кавычки"')
+        self.pub_date = datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        Post.objects.filter(pk=self.post.pk).update(pub_date=self.pub_date)
+        Post.objects.create(author=reader, text='Пост\nв две строки')
+        Comment.objects.create(post=self.post, author=reader, text='Да')
+        Follow.objects.create(user=reader, author=author)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def snapshot(self):
+        return (
+            list(Group.objects.values_list('id', 'slug', 'description')),
+            list(Post.objects.order_by('id').values_list(
+                'id', 'text', 'pub_date', 'author__username', 'group__slug')),
+            list(Comment.objects.values_list(
+                'id', 'post_id', 'author__username', 'text')),
+            list(Follow.objects.values_list(
+                'user__username', 'author__username')),
+        )
+
+    def test_round_trip(self):
+        """Выгрузка и загрузка сохраняют данные, даты и авторов"""
+        expected = self.snapshot()
+        for file_format in ('jsonl', 'csv'):
+            with self.subTest(file_format=file_format):
+                call_command('export_data', self.directory,
+                             format=file_format, stdout=StringIO())
+                Group.objects.all().delete()
+                User.objects.filter(username='auth').delete()
+                User.objects.filter(username='reader').delete()
+                call_command('import_data', self.directory,
+                             format=file_format, stdout=StringIO())
+                self.assertEqual(self.snapshot(), expected)
+                self.assertEqual(list(find_mismatches()), [])
+                self.assertEqual(search_posts('река', 10)[0][0][0],
+                                 self.post.id)
+                call_command('import_data', self.directory,
+                             format=file_format, stdout=StringIO())
+                self.assertEqual(self.snapshot(), expected)
+
+    def test_csv_keeps_empty_strings(self):
+        """CSV сохраняет пустое описание группы и пост без группы"""
+        group = Group.objects.create(title='Пустая', slug='empty',
+                                     description='')
+        Post.objects.create(author=self.post.author, group=group,
+                            text='Пост в группе без описания')
+        expected = self.snapshot()
+        call_command('export_data', self.directory, format='csv',
+                     stdout=StringIO())
+        Group.objects.all().delete()
+        User.objects.all().delete()
+        call_command('import_data', self.directory, format='csv',
+                     stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+        self.assertEqual(Group.objects.get(slug='empty').description, '')
+
+    def test_existing_rows_skipped(self):
+        """Строки с уже занятым ключом или slug пропускаются, а посты
+        ссылаются на группу, которая есть в базе"""
+        call_command('export_data', self.directory, stdout=StringIO())
+        Post.objects.all().delete()
+        group = Group.objects.get()
+        Group.objects.filter(pk=group.pk).update(id=group.pk + 100)
+        call_command('import_data', self.directory, stdout=StringIO())
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).group_id,
+                         group.pk + 100)
+
+    def test_import_into_non_empty_database(self):
+        """Пост, чей ключ занят другим постом, получает новый ключ, а его
+        комментарии — ссылку на него; повторная загрузка ничего не
+        дублирует"""
+        call_command('export_data', self.directory, stdout=StringIO())
+        post_ids = list(Post.objects.order_by('id').values_list(
+            'id', flat=True))
+        Post.objects.all().delete()
+        other = User.objects.create_user(username='other')
+        for post_id in post_ids:
+            Post.objects.create(id=post_id, author=other, text='Чужой пост')
+        for _ in range(2):
+            call_command('import_data', self.directory, stdout=StringIO())
+            self.assertEqual(Post.objects.count(), 4)
+            self.assertEqual(
+                Post.objects.filter(pk__in=post_ids, author=other).count(), 2)
+            comment = Comment.objects.get()
+            self.assertEqual(comment.post.text, self.post.text)
+            self.assertNotIn(comment.post_id, post_ids)
+            self.assertEqual(search_posts('река', 10)[0][0][0],
+                             comment.post_id)
+            self.assertEqual(list(find_mismatches()), [])
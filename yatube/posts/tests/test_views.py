@@ -1,19 +1,43 @@
 import shutil
 import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
 from http import HTTPStatus
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Comment, Follow, Group, Post, User
+from .. import timeline
+from ..cards import hit_ratio, version_key
+from ..counters import find_mismatches
+from ..decorators import generation_key
+from ..models import (Comment, Follow, Group, Post, SearchTerm,
+                      TimelineEntry, User)
+from ..search import fts5_available, search_posts
+from ..utils import COMMENTS_PER_PAGE
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
+@contextmanager
+def committed():
+    """Внутри TestCase транзакция не коммитится: колбэки on_commit
+    копятся и выполняются при выходе из блока."""
+    callbacks = []
+    with mock.patch('django.db.transaction.on_commit',
+                    lambda func, using=None: callbacks.append(func)):
+        yield
+    for callback in callbacks:
+        callback()
+
+
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostPagesTest(TestCase):
     @classmethod
@@ -229,6 +253,23 @@ class PostPaginatorTest(TestCase):
                 response = self.authorized_client.get(url + '?page=2')
                 self.assertEqual(len(response.context['page_obj']), 3)
 
+    def test_cursor_paginator(self):
+        """Проверка: переход по курсорам без подсчёта всех постов"""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        first_page = self.authorized_client.get(url).context['page_obj']
+        self.assertTrue(first_page.has_next())
+        response = self.authorized_client.get(
+            url, {'page': 2, 'after': first_page.next_cursor})
+        second_page = response.context['page_obj']
+        self.assertEqual(len(second_page), 3)
+        self.assertFalse(second_page.has_next())
+        self.assertTrue(second_page.has_previous())
+        response = self.authorized_client.get(
+            url, {'page': 1, 'before': second_page.previous_cursor})
+        self.assertEqual(list(response.context['page_obj']),
+                         list(first_page))
+        self.assertFalse(response.context['page_obj'].has_previous())
+
 
 class CommentTest(TestCase):
     @classmethod
@@ -284,6 +325,59 @@ class CommentTest(TestCase):
                          'В контексте шаблона нет комментариев')
 
 
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = Post.objects.create(
+            author=User.objects.create_user(username='author'), text='Пост')
+        readers = [User.objects.create_user(username=f'reader{number}')
+                   for number in range(5)]
+        for number in range(COMMENTS_PER_PAGE * 2 + 5):
+            Comment.objects.create(post=cls.post, text=f'Комментарий {number}',
+                                   author=readers[number % len(readers)])
+        cls.comments = list(cls.post.comments.order_by('created', 'id'))
+
+    def setUp(self):
+        cache.clear()
+
+    def comments_on_pages(self, url, order):
+        """Проходит все порции через «Показать ещё»."""
+        response = self.client.get(url, {'comments': order})
+        seen = list(response.context['comments'])
+        while response.context['next_cursor']:
+            response = self.client.get(
+                reverse('posts:post_comments', args=[self.post.pk]),
+                {'comments': order,
+                 'after': response.context['next_cursor']})
+            self.assertTemplateUsed(response, 'posts/includes/comments.html')
+            seen.extend(response.context['comments'])
+        return seen
+
+    def test_comment_pages(self):
+        """Порции покрывают все комментарии без повторов в обоих порядках"""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.assertEqual(self.comments_on_pages(url, 'old'), self.comments)
+        self.assertEqual(self.comments_on_pages(url, 'new'),
+                         self.comments[::-1])
+
+    def test_detail_cost_does_not_grow(self):
+        """Число запросов страницы поста не зависит от числа комментариев"""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.client.get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as before:
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['comments']), COMMENTS_PER_PAGE)
+        Comment.objects.create(post=self.post, author=self.post.author,
+                               text='Ещё один')
+        cache.clear()
+        self.assertNumQueries(len(before), self.client.get, url)
+
+    def test_fragment_for_missing_post(self):
+        response = self.client.get(reverse('posts:post_comments', args=[0]))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
 class CacheViewsTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -308,30 +402,40 @@ class CacheViewsTest(TestCase):
         cls.group.delete()
         cls.post.delete()
 
+    def setUp(self):
+        cache.clear()
+
+    def get_index(self):
+        return self.authorized_client.get(reverse('posts:index')).content
+
     def test_cache_index(self):
         """Проверка хранения и очищения кэша для index."""
-        response = self.authorized_client.get(reverse('posts:index'))
-        posts_before_cache = response.content
-        created_post = Post.objects.get(
-            text='test_post',
-            group=self.group,
-            author=self.author,
-        )
-        created_post.delete()
-        response_old = self.authorized_client.get(
-            reverse('posts:index')
-        )
-        posts_after_cache = response_old.content
-        self.assertEqual(
-            posts_after_cache,
-            posts_before_cache,
-            'Не возвращает кэшированную страницу.'
-        )
+        posts_before_cache = self.get_index()
+        Post.objects.filter(pk=self.post.pk).update(text='обход сигналов')
+        self.assertEqual(self.get_index(), posts_before_cache,
+                         'Не возвращает кэшированную страницу.')
         cache.clear()
-        response_new = self.authorized_client.get(reverse('posts:index'))
-        new_posts = response_new.content
-        self.assertNotEqual(posts_after_cache,
-                            new_posts, 'Сброс кэша не происходит.')
+        self.assertNotEqual(self.get_index(), posts_before_cache,
+                            'Сброс кэша не происходит.')
+
+    def test_index_invalidated_on_write(self):
+        """Создание, правка, удаление поста и переименование группы
+        сразу видны на главной странице"""
+        with committed():
+            new_post = Post.objects.create(text='новый пост',
+                                           author=self.author)
+        self.assertIn('новый пост'.encode(), self.get_index())
+        new_post.text = 'исправленный пост'
+        with committed():
+            new_post.save()
+        self.assertIn('исправленный пост'.encode(), self.get_index())
+        with committed():
+            new_post.delete()
+        self.assertNotIn('исправленный пост'.encode(), self.get_index())
+        self.group.slug = 'renamed-slug'
+        with committed():
+            self.group.save()
+        self.assertIn(b'renamed-slug', self.get_index())
 
 
 class FollowViewsTest(TestCase):
@@ -387,3 +491,567 @@ class FollowViewsTest(TestCase):
         self.assertNotEqual(self.post,
                             post_in_page_new,
                             'Пост есть на странице неподписчика')
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='LevTolstoy')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        User.objects.bulk_create(
+            [User(username=f'author{number}') for number in range(12)])
+        cls.authors = list(User.objects.filter(username__startswith='author'))
+        Post.objects.bulk_create(
+            [Post(author=author, text='Тестовый пост', group=cls.group)
+             for author in cls.authors])
+        Follow.objects.bulk_create(
+            [Follow(user=cls.reader, author=author)
+             for author in cls.authors])
+
+    @classmethod
+    def tearDownClass(cls):
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        cls.group.delete()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        cache.clear()
+
+    def test_feed_query_budget(self):
+        """Число запросов ленты не зависит от числа авторов на странице"""
+        budgets = {
+            reverse('posts:index'): 1,
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}): 2,
+            reverse('posts:profile',
+                    kwargs={'username': self.authors[0].username}): 2,
+        }
+        for url, queries in budgets.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    self.client.get(url)
+        # сессия и пользователь + страница ленты
+        with self.assertNumQueries(3):
+            self.authorized_client.get(reverse('posts:follow_index'))
+        # автор читается вместе с признаком подписки одним запросом
+        with self.assertNumQueries(4):
+            response = self.authorized_client.get(reverse(
+                'posts:profile',
+                kwargs={'username': self.authors[0].username}))
+        self.assertTrue(response.context['following'])
+
+
+@override_settings(FOLLOW_TIMELINE=True)
+class TimelineTest(TestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username='AntonChekhov')
+        self.author = User.objects.create_user(username='IvanBunin')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        self.old_post = Post.objects.create(author=self.author,
+                                            text='Старый пост')
+
+    def get_follow_page(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_timeline_follow_and_unfollow(self):
+        """Подписка дополняет ленту, новый пост попадает в неё при записи"""
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}))
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(self.reader.timeline.count(), 2)
+        self.assertEqual(self.get_follow_page(), [new_post, self.old_post])
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}))
+        self.assertFalse(self.reader.timeline.exists())
+        self.assertEqual(self.get_follow_page(), [])
+
+    @override_settings(FOLLOW_TIMELINE_LENGTH=2, FOLLOW_TIMELINE_TRIM_EVERY=1)
+    def test_fan_out_trims_timeline(self):
+        """Раскладка нового поста обрезает ленту до предела"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [Post.objects.create(author=self.author, text=f'Пост {i}')
+                 for i in range(3)]
+        self.assertEqual(
+            set(self.reader.timeline.values_list('post_id', flat=True)),
+            {posts[1].pk, posts[2].pk})
+
+    @override_settings(FOLLOW_TIMELINE_LENGTH=2)
+    def test_trim_keeps_feed_order(self):
+        """Обрезка оставляет новые по дате посты, а не по id"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        with mock.patch('posts.timeline.random.random', return_value=1):
+            posts = [Post.objects.create(author=self.author, text=f'Пост {i}')
+                     for i in range(2)]
+        self.assertEqual(self.reader.timeline.count(), 3)
+        Post.objects.filter(pk=posts[1].pk).update(
+            pub_date=self.old_post.pub_date - timedelta(days=1))
+        timeline.trim([self.reader.pk])
+        self.assertEqual(
+            set(self.reader.timeline.values_list('post_id', flat=True)),
+            {self.old_post.pk, posts[0].pk})
+
+    @override_settings(FOLLOW_TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_read_on_request(self):
+        """Посты популярных авторов подмешиваются при чтении ленты"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(self.reader.timeline.exists())
+        self.assertEqual(self.get_follow_page(), [new_post, self.old_post])
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='MarinaTsvetaeva')
+        cls.post = Post.objects.create(author=cls.user, text='Старый текст')
+        cls.url = reverse('posts:profile', kwargs={'username': cls.user})
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_card_is_cached(self):
+        """Повторный показ карточки берётся из кэша"""
+        self.client.get(self.url)
+        self.assertEqual(hit_ratio(), (0, 1, 0))
+        response = self.client.get(self.url)
+        self.assertEqual(hit_ratio(), (1, 1, 0.5))
+        self.assertContains(response, 'Старый текст')
+
+    def test_card_invalidated_on_write(self):
+        """Правка поста и комментарий сбрасывают только его карточку"""
+        with committed():
+            other = Post.objects.create(author=self.user, text='Другой пост')
+        self.client.get(self.url)
+        with committed():
+            self.authorized_client.post(
+                reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+                {'text': 'Новый текст'})
+            self.authorized_client.post(
+                reverse('posts:add_comment', kwargs={'post_id': other.id}),
+                {'text': 'Комментарий'})
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Новый текст')
+        self.assertContains(response, 'Комментариев: 1')
+        self.assertEqual(hit_ratio()[:2], (0, 4))
+        self.client.get(self.url)
+        self.assertEqual(hit_ratio()[:2], (2, 4))
+
+    def test_card_from_lagging_replica_not_cached(self):
+        """Карточка, прочитанная до того, как реплика догнала запись,
+        не попадает в кэш"""
+        with mock.patch('posts.cards.settled', return_value=False):
+            self.client.get(self.url)
+        self.client.get(self.url)
+        self.assertEqual(hit_ratio()[:2], (0, 2))
+
+    def test_card_invalidated_once(self):
+        """Правка поста и комментарий сбрасывают карточку один раз"""
+        with mock.patch('posts.cards.invalidate') as invalidate:
+            with committed():
+                self.post.save()
+                Comment.objects.create(post=self.post, author=self.user,
+                                       text='Комментарий')
+        self.assertEqual(invalidate.call_count, 2)
+
+    def test_card_invalidated_after_commit(self):
+        """Версия карточки и поколение ленты меняются только после
+        коммита"""
+        self.client.get(self.url)
+        keys = [version_key(self.post.id),
+                generation_key(f'profile:{self.user.id}')]
+        versions = cache.get_many(keys)
+        with committed():
+            self.post.text = 'Новый текст'
+            self.post.save()
+            self.assertEqual(cache.get_many(keys), versions)
+        self.assertNotEqual(cache.get_many(keys), versions)
+        self.assertContains(self.client.get(self.url), 'Новый текст')
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='BorisPasternak')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(author=cls.user, text='Пост',
+                                       group=cls.group)
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.id}),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_not_modified(self):
+        """Неизменившаяся страница отдаётся как 304 без загрузки постов"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                etag = response['ETag']
+                with self.assertNumQueries(0 if url == '/' else 1):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+                response = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+
+    def test_modified_after_write(self):
+        """Новый комментарий меняет ETag всех страниц с постом"""
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        with committed():
+            Comment.objects.create(post=self.post, author=self.user,
+                                   text='Да')
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_etag_depends_on_user(self):
+        """ETag анонима не подходит авторизованному пользователю"""
+        url = self.urls[2]
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_lagging_replica_page_not_cached(self):
+        """Страница с отстающей реплики не кэшируется и отдаётся без
+        ETag и Last-Modified"""
+        with mock.patch('posts.decorators.settled', return_value=False):
+            for url in self.urls:
+                with self.subTest(url=url):
+                    response = self.client.get(url)
+                    self.assertFalse(response.has_header('ETag'))
+                    self.assertFalse(response.has_header('Last-Modified'))
+        # bulk_create не шлёт сигналов и не меняет поколение ленты
+        Post.objects.bulk_create([Post(author=self.user, text='Новый пост')])
+        self.assertContains(self.client.get(self.urls[0]), 'Новый пост')
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_superuser(
+            username='ZhukovskyVA', email='zh@example.com', password='pass')
+
+    def create_posts(self):
+        self.old = Post.objects.create(
+            author=self.user, text='Путешествие по большим рекам')
+        Post.objects.filter(pk=self.old.pk).update(
+            pub_date=self.old.pub_date.replace(year=2000))
+        self.new = Post.objects.create(
+            author=self.user, text='Путешествия по рекам и озёрам')
+        Post.objects.create(author=self.user, text='Стихи о море')
+
+    def assert_search_works(self):
+        self.create_posts()
+        rows, _ = search_posts('путешествиям по реке', 10)
+        self.assertEqual([post_id for post_id, _ in rows],
+                         [self.new.id, self.old.id])
+        first, after = search_posts('рекам', 1)
+        second, last = search_posts('рекам', 1, after)
+        self.assertEqual([first[0][0], second[0][0]],
+                         [self.new.id, self.old.id])
+        self.assertIsNone(last)
+        self.new.text = 'Стихи'
+        self.new.save()
+        rows, _ = search_posts('река', 10)
+        self.assertEqual([post_id for post_id, _ in rows], [self.old.id])
+        self.old.delete()
+        self.assertEqual(search_posts('рекам', 10), ([], None))
+
+    def test_fts5_search(self):
+        """FTS5: поиск по словоформам, свежесть, курсор и переиндексация"""
+        self.assertTrue(fts5_available())
+        self.assert_search_works()
+        self.assertFalse(SearchTerm.objects.exists())
+
+    def test_inverted_index_search(self):
+        """Обратный индекс в SearchTerm работает так же, как FTS5"""
+        with mock.patch('posts.search.fts5_available', return_value=False):
+            self.assert_search_works()
+            self.assertTrue(SearchTerm.objects.exists())
+
+    def test_reindex_only_changed_text(self):
+        """Сохранение поста без правки текста не трогает индекс"""
+        self.create_posts()
+        post = Post.objects.get(pk=self.new.pk)
+        with mock.patch('posts.search.index_posts') as index_posts:
+            post.save()
+            Post.objects.only('id', 'group').get(pk=self.old.pk).save()
+            post.text = 'Стихи'
+            post.save()
+        index_posts.assert_called_once_with([(post.id, 'Стихи')])
+
+    def test_search_pages(self):
+        """Страница поиска, JSON и поиск в админке используют индекс"""
+        self.create_posts()
+        response = self.client.get(reverse('posts:search'), {'q': 'река'})
+        self.assertContains(response, 'по большим рекам')
+        self.assertNotContains(response, 'Стихи о море')
+        response = self.client.get(reverse('posts:search_api'),
+                                   {'q': 'река'})
+        self.assertEqual([post['id'] for post in response.json()['results']],
+                         [self.new.id, self.old.id])
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'реки'})
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TolstoyLN')
+        cls.reader = User.objects.create_user(username='ChekhovAP')
+        cls.group = Group.objects.create(title='Проза', slug='prose')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Глава {number}',
+                                group=cls.group if number % 2 else None)
+            for number in range(5)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(3):
+            Comment.objects.create(post=cls.posts[0], author=cls.reader,
+                                   text=f'Отзыв {number}')
+
+    def setUp(self):
+        cache.clear()
+
+    def pages(self, url, **params):
+        """Ids всех записей, пройденных по курсору next."""
+        ids = []
+        params.update(fields='id', limit=2)
+        while True:
+            data = self.client.get(url, params).json()
+            self.assertEqual(data['fields'], ['id'])
+            ids.extend(row[0] for row in data['results'])
+            if data['next'] is None:
+                return ids
+            params['after'] = data['next']
+
+    def test_feeds(self):
+        """Ленты отдают те же посты и в том же порядке, что и HTML"""
+        newest = [post.id for post in reversed(self.posts)]
+        feeds = {
+            reverse('posts:api_index'): newest,
+            reverse('posts:api_group_list', args=[self.group.slug]): [
+                post.id for post in reversed(self.posts) if post.group_id],
+            reverse('posts:api_profile', args=[self.author.username]): newest,
+        }
+        for url, expected in feeds.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.pages(url), expected)
+        self.client.force_login(self.reader)
+        self.assertEqual(self.pages(reverse('posts:api_follow_index')),
+                         newest)
+
+    def test_compact_rows(self):
+        """Поля перечислены один раз, записи идут массивами"""
+        response = self.client.get(reverse('posts:api_index'),
+                                   {'fields': 'text,author', 'limit': 1})
+        self.assertEqual(response.json(), {
+            'fields': ['text', 'author'],
+            'results': [['Глава 4', 'TolstoyLN']],
+            'next': response.json()['next'],
+        })
+        self.assertNotIn(b': ', response.content)
+
+    def test_post_and_comments(self):
+        post = self.posts[0]
+        response = self.client.get(
+            reverse('posts:api_post_detail', args=[post.id]),
+            {'fields': 'id,author,group,image'})
+        self.assertEqual(response.json(), {
+            'id': post.id, 'author': 'TolstoyLN', 'group': None,
+            'image': None})
+        url = reverse('posts:api_post_comments', args=[post.id])
+        comments = list(post.comments.order_by('created', 'id').values_list(
+            'id', flat=True))
+        self.assertEqual(self.pages(url, comments='old'), comments)
+        self.assertEqual(self.pages(url), comments[::-1])
+
+    def test_errors(self):
+        responses = {
+            self.client.get(reverse('posts:api_index'),
+                            {'fields': 'id,password'}): HTTPStatus.BAD_REQUEST,
+            self.client.get(reverse('posts:api_index'),
+                            {'limit': 'all'}): HTTPStatus.BAD_REQUEST,
+            self.client.get(reverse('posts:api_post_detail',
+                                    args=[0])): HTTPStatus.NOT_FOUND,
+            self.client.get(reverse('posts:api_group_list',
+                                    args=['none'])): HTTPStatus.NOT_FOUND,
+            self.client.get(
+                reverse('posts:api_follow_index')): HTTPStatus.UNAUTHORIZED,
+        }
+        for response, status in responses.items():
+            with self.subTest(url=response.request['PATH_INFO']):
+                self.assertEqual(response.status_code, status)
+                self.assertIn('error', response.json())
+
+    def test_etag(self):
+        """Повторный запрос с ETag получает 304, новый пост его меняет"""
+        urls = (
+            reverse('posts:api_index'),
+            reverse('posts:api_post_detail', args=[self.posts[0].id]),
+        )
+        self.client.force_login(self.reader)
+        for url in urls + (reverse('posts:api_follow_index'),):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+        etag = self.client.get(urls[0])['ETag']
+        with committed():
+            Post.objects.create(author=self.author, text='Эпилог')
+        response = self.client.get(urls[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+@override_settings(FOLLOW_TIMELINE=True)
+class ModerationAdminTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username='moderator', email='mod@example.com', password='pass')
+        self.spammer = User.objects.create_user(username='spammer')
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Спам', slug='spam')
+        self.other = Group.objects.create(title='Проза', slug='prose')
+        Follow.objects.create(user=self.author, author=self.spammer)
+        self.spam = [
+            Post.objects.create(author=self.spammer, group=self.group,
+                                text=f'Дешёвые часы {number}')
+            for number in range(3)
+        ]
+        Comment.objects.create(post=self.spam[0], author=self.author,
+                               text='Спам')
+        self.post = Post.objects.create(author=self.author, text='Рассказ',
+                                        group=self.group)
+        self.old = Post.objects.create(author=self.author, text='Старый')
+        Post.objects.filter(pk=self.old.pk).update(
+            pub_date=self.old.pub_date.replace(year=2000))
+        self.url = reverse('admin:posts_post_changelist')
+        self.client.force_login(self.admin)
+
+    def act(self, action, posts, **data):
+        return self.client.post(self.url, {
+            'action': action,
+            '_selected_action': [post.pk for post in posts],
+            'apply': '1',
+            **data,
+        })
+
+    def test_actions_ask_for_confirmation(self):
+        """Действие без подтверждения показывает форму и ничего не
+        меняет"""
+        for action in ('move_to_group', 'delete_by_author', 'purge_by_date'):
+            with self.subTest(action=action):
+                response = self.client.post(self.url, {
+                    'action': action, '_selected_action': [self.post.pk]})
+                self.assertTemplateUsed(response,
+                                        'admin/posts/post/moderation.html')
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 4)
+
+    def test_move_to_group(self):
+        """Перенос в группу одним UPDATE со счётчиками и кэшем лент"""
+        url = reverse('posts:index')
+        prose = reverse('posts:group_list', args=['prose'])
+        self.client.get(url)
+        with committed():
+            with CaptureQueriesContext(connection) as queries:
+                self.act('move_to_group', self.spam, group=self.other.pk)
+            self.assertEqual(
+                sum(query['sql'].startswith('UPDATE "posts_post"')
+                    for query in queries.captured_queries), 1)
+            # до коммита кэш не сбрасывается
+            self.assertNotContains(self.client.get(url), prose)
+        self.assertEqual(
+            set(Post.objects.filter(group=self.other)), set(self.spam))
+        self.assertEqual(list(find_mismatches()), [])
+        self.assertContains(self.client.get(url), prose)
+
+    def test_delete_by_author(self):
+        """Удаляются все посты авторов выбранных постов и их каскад"""
+        self.client.get(reverse('posts:index'))
+        with committed():
+            response = self.act('delete_by_author', self.spam[:1])
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertEqual(set(Post.objects.all()), {self.post, self.old})
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(search_posts('часы', 10), ([], None))
+        self.assertEqual(list(find_mismatches()), [])
+        self.assertNotContains(self.client.get(reverse('posts:index')),
+                               'Дешёвые часы')
+
+    def test_purge_by_date(self):
+        """Из выбранных удаляются только посты за период"""
+        self.act('purge_by_date', [self.post], select_across='1',
+                 start='1999-01-01', end='2000-12-31')
+        self.assertFalse(Post.objects.filter(pk=self.old.pk).exists())
+        self.assertEqual(Post.objects.count(), 4)
+        response = self.act('purge_by_date', [self.post],
+                            start='2001-01-01', end='2000-01-01')
+        self.assertFormError(response, 'form', None,
+                             'Начало диапазона позже конца')
+
+    def test_cascade_models_have_no_dependents(self):
+        """Каскад удаляется без Collector: на зависимые от поста модели
+        ничто не ссылается"""
+        for relation in Post._meta.related_objects:
+            with self.subTest(model=relation.related_model.__name__):
+                self.assertEqual(
+                    relation.related_model._meta.related_objects, ())
+
+    def test_changelist_queries_do_not_grow(self):
+        """Автор, группа и выбор группы в list_editable не дают запросов
+        на строку"""
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(self.url)
+            return len(queries)
+
+        before = count_queries()
+        for number in range(5):
+            author = User.objects.create_user(username=f'writer{number}')
+            group = Group.objects.create(title=f'Группа {number}',
+                                         slug=f'group-{number}')
+            Post.objects.create(author=author, group=group, text='Пост')
+        self.assertEqual(count_queries(), before)
+
+    def test_estimated_count(self):
+        """Без фильтров число постов берётся из статистики базы"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        Post.objects.create(author=self.author, text='Новый')
+        with mock.patch('posts.utils.ESTIMATED_COUNT_FROM', 1):
+            response = self.client.get(self.url)
+            self.assertEqual(response.context['cl'].result_count, 5)
+            response = self.client.get(self.url, {'q': 'часы'})
+            self.assertEqual(response.context['cl'].result_count, 3)
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['cl'].result_count, 6)
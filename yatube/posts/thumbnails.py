@@ -0,0 +1,80 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from sorl.thumbnail import get_thumbnail
+
+from .cards import invalidate_posts
+from .models import THUMBNAIL_PENDING, Post
+
+POST_THUMBNAIL = '960x339'
+POST_THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+VARIANT_QUALITY = 80
+
+logger = logging.getLogger(__name__)
+
+
+def pending():
+    """Очередь: посты с картинкой, для которых ещё нет миниатюры."""
+    return Post.objects.filter(THUMBNAIL_PENDING).order_by('id')
+
+
+def variant_geometry(width):
+    """Геометрия варианта с пропорциями POST_THUMBNAIL."""
+    full_width, full_height = map(int, POST_THUMBNAIL.split('x'))
+    return f'{width}x{round(width * full_height / full_width)}'
+
+
+def make_variants(post):
+    """Варианты картинки по форматам: списки [ширина, высота, имя]."""
+    variants = {}
+    for image_format in settings.IMAGE_VARIANT_FORMATS:
+        variants[image_format] = []
+        for width in sorted(settings.IMAGE_VARIANT_WIDTHS):
+            image = get_thumbnail(
+                post.image, variant_geometry(width), format=image_format,
+                quality=VARIANT_QUALITY, **POST_THUMBNAIL_OPTIONS)
+            variants[image_format].append(
+                [image.width, image.height, image.name])
+    return variants
+
+
+def make_thumbnail(post):
+    """Имя миниатюры и варианты картинки в JSON. Если картинку не удалось
+    обработать, миниатюрой становится оригинал, чтобы пост не вставал
+    в очередь снова."""
+    try:
+        variants = make_variants(post)
+        thumbnail = get_thumbnail(post.image, POST_THUMBNAIL,
+                                  **POST_THUMBNAIL_OPTIONS).name
+    except Exception:
+        logger.exception('Не удалось сделать миниатюру поста %s', post.id)
+        return post.image.name, ''
+    return thumbnail, json.dumps(variants, separators=(',', ':'))
+
+
+def make_thumbnail_in_thread(post):
+    try:
+        return make_thumbnail(post)
+    finally:
+        connection.close()
+
+
+def process_batch(batch_size, workers):
+    """Делает миниатюры для очередной пачки постов, возвращает её размер."""
+    posts = list(pending().only('id', 'image')[:batch_size])
+    if not posts:
+        return 0
+    if workers > 1:
+        with ThreadPoolExecutor(workers) as executor:
+            results = list(executor.map(make_thumbnail_in_thread, posts))
+    else:
+        results = [make_thumbnail(post) for post in posts]
+    for post, (thumbnail, variants) in zip(posts, results):
+        Post.objects.filter(
+            pk=post.pk, image=post.image.name, thumbnail=''
+        ).update(thumbnail=thumbnail, image_variants=variants)
+    invalidate_posts(Post.objects.filter(pk__in=[post.pk for post in posts]))
+    return len(posts)
@@ -0,0 +1,102 @@
+import random
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+
+from .models import Follow, Post, Profile, TimelineEntry, User
+
+BATCH_SIZE = 1000
+# пользователей на один DELETE при обрезке: условие растёт с каждым
+TRIM_BATCH_SIZE = 100
+
+
+def fans_out(author_id):
+    """Раскладываются ли посты автора по лентам подписчиков при записи.
+
+    Посты авторов, у которых подписчиков больше порога, не копируются
+    в ленты, а подмешиваются при чтении.
+    """
+    return not Profile.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.FOLLOW_TIMELINE_FANOUT_LIMIT,
+    ).exists()
+
+
+def fan_out(post):
+    """Кладёт пост в ленты подписчиков автора.
+
+    Ленты обрезаются выборочно: каждая с вероятностью
+    1 / FOLLOW_TIMELINE_TRIM_EVERY, так что в среднем лента переходит
+    предел не больше чем на столько записей, а запрос автора обрезает
+    лишь долю лент подписчиков. Остальное досчищает rebuild_timelines
+    --trim.
+    """
+    if not fans_out(post.author_id):
+        return
+    followers = list(Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True))
+    chance = 1 / settings.FOLLOW_TIMELINE_TRIM_EVERY
+    with transaction.atomic():
+        TimelineEntry.objects.bulk_create(
+            (TimelineEntry(user_id=user_id, post=post)
+             for user_id in followers),
+            ignore_conflicts=True)
+        trim([user_id for user_id in followers if random.random() < chance])
+
+
+def backfill(follow):
+    if not fans_out(follow.author_id):
+        return
+    posts = Post.objects.filter(author_id=follow.author_id).order_by(
+        '-pub_date', '-id').values_list('pk', flat=True)
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=follow.user_id, post_id=post_id)
+         for post_id in posts[:settings.FOLLOW_TIMELINE_LENGTH]),
+        ignore_conflicts=True)
+
+
+def prune(follow):
+    TimelineEntry.objects.filter(
+        user_id=follow.user_id, post__author_id=follow.author_id).delete()
+
+
+def trim(user_ids):
+    """Оставляет в лентах пользователей FOLLOW_TIMELINE_LENGTH новых постов.
+
+    Порядок тот же, что у ленты, — (pub_date, id) поста. Одним запросом
+    находится первая лишняя запись каждой ленты, удаляются записи
+    только тех лент, что длиннее предела.
+    """
+    length = settings.FOLLOW_TIMELINE_LENGTH
+    entries = TimelineEntry.objects.filter(user_id=OuterRef('pk')).order_by(
+        '-post__pub_date', '-post_id')[length:length + 1]
+    overflown = list(User.objects.filter(pk__in=user_ids).annotate(
+        cutoff_date=Subquery(entries.values('post__pub_date')),
+        cutoff_post=Subquery(entries.values('post_id')),
+    ).filter(cutoff_post__isnull=False).values_list(
+        'pk', 'cutoff_date', 'cutoff_post'))
+    for start in range(0, len(overflown), TRIM_BATCH_SIZE):
+        TimelineEntry.objects.filter(reduce(or_, (
+            Q(user_id=user_id) & (
+                Q(post__pub_date__lt=moment)
+                | Q(post__pub_date=moment, post_id__lte=post_id))
+            for user_id, moment, post_id
+            in overflown[start:start + TRIM_BATCH_SIZE]
+        ))).delete()
+
+
+def followed_posts(user):
+    if not settings.FOLLOW_TIMELINE:
+        return Post.objects.filter(author__following__user=user)
+    popular = list(Follow.objects.filter(
+        user=user,
+        author__profile__followers_count__gt=(
+            settings.FOLLOW_TIMELINE_FANOUT_LIMIT),
+    ).values_list('author_id', flat=True))
+    if not popular:
+        return Post.objects.filter(timeline_entries__user=user)
+    entries = TimelineEntry.objects.filter(user=user).values('post')
+    return Post.objects.filter(Q(pk__in=entries) | Q(author__in=popular))
@@ -1,9 +1,150 @@
-from django.core.paginator import Paginator
+from datetime import datetime, timedelta
+
+from django.core.paginator import Page, Paginator
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from core.db import estimated_count
 
 SEARCH_POSTS = 10
+COMMENTS_PER_PAGE = 20
+FEED_ORDERING = ('-pub_date', '-id')
+# порядок комментариев из ?comments=: сначала новые или сначала старые
+COMMENT_ORDERINGS = {
+    'new': ('-created', '-id'),
+    'old': ('created', 'id'),
+}
+# меньшие таблицы дешевле посчитать точно
+ESTIMATED_COUNT_FROM = 100000
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def make_cursor(moment, pk):
+    """Курсор: микросекунды даты и id через подчёркивание."""
+    return f'{(moment - EPOCH) // MICROSECOND}_{pk}'
+
+
+def encode_cursor(obj, field='pub_date'):
+    return make_cursor(getattr(obj, field), obj.id)
+
+
+def decode_cursor(cursor):
+    try:
+        micros, post_id = cursor.split('_')
+        return EPOCH + timedelta(microseconds=int(micros)), int(post_id)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def keyset_after(queryset, field, cursor, descending=True):
+    """Записи, идущие после курсора в порядке (field, id)."""
+    moment, pk = cursor
+    if descending:
+        return queryset.filter(**{f'{field}__lte': moment}).exclude(
+            **{field: moment, 'id__gte': pk})
+    return queryset.filter(**{f'{field}__gte': moment}).exclude(
+        **{field: moment, 'id__lte': pk})
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинатор по паре (pub_date, id).
+
+    Не выполняет COUNT(*): о наличии следующей страницы узнаёт,
+    запрашивая на одну запись больше, чем помещается на страницу.
+    Номер страницы без курсора обрабатывается через OFFSET, чтобы
+    старые ссылки вида ?page=N продолжали работать.
+    """
+
+    def __init__(self, object_list, per_page, **kwargs):
+        super().__init__(object_list.order_by(*FEED_ORDERING),
+                         per_page, **kwargs)
+        self._num_pages = 1
+
+    @property
+    def num_pages(self):
+        return self._num_pages
+
+    def get_page(self, number, after=None, before=None):
+        try:
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            number = 1
+        after, before = decode_cursor(after), decode_cursor(before)
+        if after:
+            rows = list(self._after(*after)[:self.per_page + 1])
+            has_next, has_previous = len(rows) > self.per_page, True
+            rows = rows[:self.per_page]
+        elif before:
+            rows = list(self._before(*before)[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            offset = (number - 1) * self.per_page
+            rows = list(self.object_list[offset:offset + self.per_page + 1])
+            has_next, has_previous = len(rows) > self.per_page, number > 1
+            rows = rows[:self.per_page]
+        if not has_previous:
+            number = 1
+        elif number == 1:
+            number = 2
+        self._num_pages = number + 1 if has_next else number
+        page = Page(rows, number, self)
+        page.next_cursor = encode_cursor(rows[-1]) if has_next else None
+        page.previous_cursor = (
+            encode_cursor(rows[0]) if has_previous and rows else None)
+        return page
+
+    def _after(self, pub_date, post_id):
+        return keyset_after(self.object_list, 'pub_date', (pub_date, post_id))
+
+    def _before(self, pub_date, post_id):
+        return keyset_after(self.object_list, 'pub_date', (pub_date, post_id),
+                            descending=False).order_by('pub_date', 'id')
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, который без фильтров не считает строки COUNT(*).
+
+    Для выборки без WHERE с оценкой не меньше ESTIMATED_COUNT_FROM
+    число строк берётся из статистики базы: список админки открывается
+    за время одной страницы, а число страниц в нём примерное.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_FROM:
+                return estimate
+        return super().count
 
 
 def paginate_posts(request, posts):
-    paginator = Paginator(posts, SEARCH_POSTS)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    paginator = CursorPaginator(posts, SEARCH_POSTS)
+    return paginator.get_page(request.GET.get('page'),
+                              after=request.GET.get('after'),
+                              before=request.GET.get('before'))
+
+
+def paginate_comments(comments, order='new', after=None):
+    """Порция из COMMENTS_PER_PAGE комментариев после курсора after.
+
+    Keyset по паре (created, id) идёт по индексу comment_post_created_idx,
+    поэтому цена порции не зависит от числа комментариев к посту.
+    Возвращает комментарии и курсор следующей порции или None.
+    """
+    ordering = COMMENT_ORDERINGS.get(order, COMMENT_ORDERINGS['new'])
+    comments = comments.order_by(*ordering)
+    cursor = decode_cursor(after)
+    if cursor:
+        comments = keyset_after(comments, 'created', cursor,
+                                descending=ordering[0].startswith('-'))
+    rows = list(comments[:COMMENTS_PER_PAGE + 1])
+    next_cursor = None
+    if len(rows) > COMMENTS_PER_PAGE:
+        rows = rows[:COMMENTS_PER_PAGE]
+        next_cursor = encode_cursor(rows[-1], 'created')
+    return rows, next_cursor
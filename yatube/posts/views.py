@@ -1,24 +1,90 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db.models import Exists, OuterRef
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from core.routers import use_primary
+
+from .cards import attach_cards
+from .decorators import INDEX_FEED, cache_feed, conditional_feed
 from .forms import CommentForm, PostForm
 from .models import Comment, Follow, Group, Post, User
-from .utils import paginate_posts
+from .search import search_posts
+from .timeline import followed_posts
+from .utils import (COMMENT_ORDERINGS, SEARCH_POSTS, paginate_comments,
+                    paginate_posts)
+
+
+def index_feed_names(request):
+    return [INDEX_FEED]
+
+
+def page_object(request, queryset, **lookup):
+    """Объект, из которого собрана страница, или None.
+
+    ETag и сама view нуждаются в одном и том же объекте: он читается
+    одним запросом и запоминается в request.
+    """
+    if not hasattr(request, '_page_object'):
+        request._page_object = queryset.filter(**lookup).first()
+    return request._page_object
+
+
+def page_group(request, slug):
+    return page_object(request, Group.objects.all(), slug=slug)
+
+
+def page_author(request, username):
+    """Автор вместе с профилем и признаком подписки читателя на него."""
+    authors = User.objects.select_related('profile')
+    if request.user.is_authenticated:
+        authors = authors.annotate(is_followed=Exists(Follow.objects.filter(
+            user=request.user, author=OuterRef('pk'))))
+    return page_object(request, authors, username=username)
+
+
+def page_post(request, post_id):
+    return page_object(
+        request, Post.objects.select_related('author__profile', 'group'),
+        id=post_id)
+
 
+def group_feed_names(request, slug):
+    group = page_group(request, slug)
+    return None if group is None else [f'group:{group.id}']
 
-@cache_page(20, key_prefix='index_page')
+
+def profile_feed_names(request, username):
+    author = page_author(request, username)
+    return None if author is None else [f'profile:{author.id}']
+
+
+def post_feed_names(request, post_id):
+    post = page_post(request, post_id)
+    if post is None:
+        return None
+    return [f'post:{post_id}', f'profile:{post.author_id}']
+
+
+@conditional_feed(index_feed_names)
+@cache_feed(settings.INDEX_CACHE_TIMEOUT, INDEX_FEED)
 def index(request):
-    posts = Post.objects.select_related('group')
+    posts = Post.objects.for_feed()
     page_obj = paginate_posts(request, posts)
+    attach_cards(page_obj)
     context = {'page_obj': page_obj, }
     return render(request, 'posts/index.html', context)
 
 
+@conditional_feed(group_feed_names)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    group = page_group(request, slug)
+    if group is None:
+        raise Http404
+    posts = group.posts.for_feed()
     page_obj = paginate_posts(request, posts)
+    attach_cards(page_obj)
     context = {
         'group': group,
         'posts': posts,
@@ -27,28 +93,54 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_feed(profile_feed_names)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    author = page_author(request, username)
+    if author is None:
+        raise Http404
+    posts = author.posts.for_feed()
     page_obj = paginate_posts(request, posts)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user, author=author).exists()
+    attach_cards(page_obj)
+    following = getattr(author, 'is_followed', False)
     context = {'author': author, 'page_obj': page_obj, 'following': following}
     return render(request, 'posts/profile.html', context)
 
 
+@conditional_feed(post_feed_names)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    comments = Comment.objects.filter(post_id=post.id)
-    form = CommentForm()
-    context = {'post': post, 'comments': comments, 'form': form}
+    post = page_post(request, post_id)
+    if post is None:
+        raise Http404
+    context = comments_context(request, post.id)
+    context.update(post=post, form=CommentForm())
     return render(request, 'posts/post_detail.html', context)
 
 
+def comments_context(request, post_id):
+    order = request.GET.get('comments')
+    if order not in COMMENT_ORDERINGS:
+        order = 'new'
+    comments, next_cursor = paginate_comments(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        order, request.GET.get('after'))
+    return {'post_id': post_id, 'comments': comments,
+            'comments_order': order, 'next_cursor': next_cursor}
+
+
+@conditional_feed(post_feed_names)
+def post_comments(request, post_id):
+    """Следующая порция комментариев для кнопки «Показать ещё»."""
+    if page_post(request, post_id) is None:
+        raise Http404
+    return render(request, 'posts/includes/comments.html',
+                  comments_context(request, post_id))
+
+
 @login_required
+@use_primary
 def post_create(request):
     if request.method == 'POST':
-        form = PostForm(request.POST)
+        form = PostForm(request.POST, files=request.FILES or None)
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
@@ -60,6 +152,7 @@ def post_create(request):
 
 
 @login_required
+@use_primary
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     if request.user != post.author:
@@ -74,6 +167,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@use_primary
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -87,28 +181,46 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(
-        author__following__user=request.user)
+    posts = followed_posts(request.user).for_feed()
     page_obj = paginate_posts(request, posts)
+    attach_cards(page_obj)
     return render(request, 'posts/follow.html', {'page_obj': page_obj})
 
 
 @login_required
+@use_primary
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if (Follow.objects.filter(author=author, user=request.user).exists()
-            or request.user == author):
-        return redirect('posts:profile', username=username)
-    Follow.objects.create(author=author, user=request.user)
+    if request.user != author:
+        Follow.objects.get_or_create(author=author, user=request.user)
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@use_primary
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    if (Follow.objects.filter(author=author, user=request.user).exists()
-            and request.user != author):
-        following = Follow.objects.get(author=author, user=request.user)
-        following.delete()
-        return redirect('posts:profile', username=username)
+    Follow.objects.filter(author=author, user=request.user).delete()
     return redirect('posts:profile', username=username)
+
+
+def search(request):
+    query = request.GET.get('q', '')
+    rows, next_cursor = search_posts(query, SEARCH_POSTS,
+                                     request.GET.get('after'))
+    found = Post.objects.for_feed().in_bulk([post_id for post_id, _ in rows])
+    posts = [found[post_id] for post_id, _ in rows if post_id in found]
+    attach_cards(posts)
+    context = {'query': query, 'posts': posts, 'next_cursor': next_cursor}
+    return render(request, 'posts/search.html', context)
+
+
+def search_api(request):
+    rows, next_cursor = search_posts(request.GET.get('q', ''), SEARCH_POSTS,
+                                     request.GET.get('after'))
+    found = {post['id']: post for post in Post.objects.filter(
+        pk__in=[post_id for post_id, _ in rows]
+    ).values('id', 'text', 'pub_date', 'author__username', 'group__slug')}
+    results = [dict(found[post_id], score=score)
+               for post_id, score in rows if post_id in found]
+    return JsonResponse({'results': results, 'next': next_cursor})
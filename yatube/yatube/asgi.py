@@ -0,0 +1,57 @@
+"""ASGI-вход для uvicorn/daphne: uvicorn yatube.asgi:application.
+
+Django 2.2 не умеет ASGI сам (а Django 3+ здесь нельзя), поэтому
+WSGI-приложение оборачивается в asgiref.WsgiToAsgi. Тело запроса
+целиком читается в событийном цикле и только потом отдаётся view,
+так что медленный клиент или долгая загрузка картинки не держат
+поток с Django.
+
+WsgiToAsgi из asgiref выполняет приложение через sync_to_async с
+thread_sensitive=True, то есть все запросы процесса — в одном общем
+потоке по очереди. ThreadPoolWsgiToAsgi выполняет их в пуле из
+ASGI_THREADS потоков, как воркер gunicorn с --threads.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from yatube.worker import prepare_environment
+
+prepare_environment()
+
+from asgiref.sync import SyncToAsync  # noqa: E402
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+
+class ThreadPoolWsgiToAsgiInstance(WsgiToAsgiInstance):
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        # в базовом классе метод обёрнут в sync_to_async; берётся
+        # исходная синхронная функция
+        run_wsgi_app = WsgiToAsgiInstance.__dict__['run_wsgi_app'].func
+        await SyncToAsync(run_wsgi_app, thread_sensitive=False,
+                          executor=self.executor)(self, body)
+
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi, который выполняет запросы в своём пуле потоков."""
+
+    def __init__(self, wsgi_application, threads):
+        super().__init__(wsgi_application)
+        self.executor = ThreadPoolExecutor(
+            threads, thread_name_prefix='yatube-asgi')
+
+    async def __call__(self, scope, receive, send):
+        await ThreadPoolWsgiToAsgiInstance(
+            self.wsgi_application, self.executor)(scope, receive, send)
+
+
+application = ThreadPoolWsgiToAsgi(get_wsgi_application(),
+                                   settings.ASGI_THREADS)
+
+from core.warmup import warm_worker  # noqa: E402
+
+warm_worker()
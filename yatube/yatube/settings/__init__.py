@@ -0,0 +1,22 @@
+"""Настройки проекта по профилям.
+
+base — общее, dev — разработка (по умолчанию), prod — боевые воркеры,
+bench — prod с данными и ключом для замеров. Профиль выбирается
+переменной окружения YATUBE_ENV или прямо через
+DJANGO_SETTINGS_MODULE=yatube.settings.<профиль>.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILE = os.environ.get('YATUBE_ENV', 'dev')
+
+if PROFILE == 'dev':
+    from .dev import *  # noqa: F401,F403
+elif PROFILE == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif PROFILE == 'bench':
+    from .bench import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured(
+        f'YATUBE_ENV={PROFILE}: ожидается dev, prod или bench')
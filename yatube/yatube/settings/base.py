@@ -0,0 +1,224 @@
+"""Общие настройки всех профилей.
+
+Профили dev, prod и bench импортируют этот модуль и меняют только
+отличающееся; значения, которые зависят от окружения, читаются из
+переменных YATUBE_*.
+"""
+import os
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Один ключ на все воркеры: с ключом на процесс сессии и подписанные
+# cookie одного воркера не проходят проверку в другом
+SECRET_KEY = os.environ.get('YATUBE_SECRET_KEY')
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'core.apps.CoreConfig',
+    'about.apps.AboutConfig',
+    'posts.apps.PostsConfig',
+    'users.apps.UsersConfig',
+]
+# sorl нужен процессу миниатюр (manage.py process_thumbnails) и
+# миграциям; веб-воркеры (yatube.wsgi, yatube.asgi) стартуют без него
+if os.environ.get('YATUBE_THUMBNAILS', '1') == '1':
+    INSTALLED_APPS.append('sorl.thumbnail')
+
+MIDDLEWARE = [
+    'core.middleware.RequestTimingMiddleware',
+    'core.middleware.ReplicaMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+# С CACHED_TEMPLATES шаблоны разбираются один раз на процесс (cached
+# loader) и заранее, при старте воркера в yatube/wsgi.py и
+# yatube/asgi.py; включается профилем prod
+CACHED_TEMPLATES = False
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+# Соединение живёт CONN_MAX_AGE секунд и проверяется перед каждым
+# запросом (core.db.check_connections). Для PostgreSQL замените ENGINE,
+# NAME и добавьте USER, PASSWORD, HOST.
+CONN_MAX_AGE = int(os.environ.get('YATUBE_CONN_MAX_AGE', 60))
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('YATUBE_DB',
+                               os.path.join(BASE_DIR, 'db.sqlite3')),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+# Реплики для чтения (core.routers.ReplicaRouter). Локально: путь к
+# второму файлу SQLite в YATUBE_REPLICA_DB, данные в него копирует
+# manage.py sync_replica.
+if os.environ.get('YATUBE_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['YATUBE_REPLICA_DB'],
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    }
+# PRAGMA каждого нового соединения SQLite (core.db.configure_sqlite);
+# manage.py optimize_sqlite раз в час обновляет статистику и
+# сбрасывает журнал WAL в файл базы
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # отрицательное значение — размер в КиБ
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Сколько секунд после записи клиент читает из основной базы
+REPLICA_STICKY_SECONDS = 10
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+LANGUAGE_CODE = "ru"
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# default читает из небольшого LRU процесса ('local') и общего для всех
+# процессов хранилища ('shared'). При нескольких воркерах в 'shared'
+# ставится FileBasedCache, DatabaseCache (SQLite) или MemcachedCache.
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TieredCache',
+        'OPTIONS': {
+            'LOCAL': 'local',
+            'SHARED': 'shared',
+            'LOCAL_TIMEOUT': 5,
+            'CHECK_INTERVAL': 1,
+        },
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'local',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+    },
+}
+# Материализованная лента подписок (fan-out при записи)
+FOLLOW_TIMELINE = False
+FOLLOW_TIMELINE_LENGTH = 1000
+FOLLOW_TIMELINE_FANOUT_LIMIT = 10000
+# Лента подписчика обрезается в среднем раз на столько раскладок
+FOLLOW_TIMELINE_TRIM_EVERY = 100
+# Время жизни HTML карточек постов; актуальность держит версия карточки
+POST_CARD_TIMEOUT = 60 * 60 * 24
+# Счётчики попаданий в кэш карточек (manage.py card_cache_stats)
+POST_CARD_STATS = True
+# Страница index сбрасывается при записи, а не по таймауту
+INDEX_CACHE_TIMEOUT = 60 * 60 * 6
+# Потоки воркера миниатюр (manage.py process_thumbnails)
+THUMBNAIL_WORKERS = 4
+# Потоки, в которых yatube.asgi выполняет WSGI-приложение
+ASGI_THREADS = int(os.environ.get('YATUBE_ASGI_THREADS', 8))
+# Ширины вариантов картинки поста для srcset и их форматы
+IMAGE_VARIANT_WIDTHS = (320, 480, 720, 960)
+IMAGE_VARIANT_FORMATS = ('WEBP', 'JPEG')
+# Поиск: прибавка к BM25 для свежих постов и срок, за который она вдвое
+# уменьшается
+SEARCH_RECENCY_BOOST = 1.0
+SEARCH_RECENCY_DAYS = 30
+# Замеры запросов (core.middleware.RequestTimingMiddleware): доля
+# запросов с заголовком Server-Timing и пороги журнала медленных запросов
+REQUEST_TIMING_SAMPLE_RATE = 1.0
+SLOW_REQUEST_MS = 500
+SLOW_REQUEST_QUERIES = 50
+SLOW_REQUEST_DUPLICATES = 10
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yatube.slow_requests': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
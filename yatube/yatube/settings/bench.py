@@ -0,0 +1,14 @@
+"""Замеры в условиях prod: тот же DEBUG, шаблоны и middleware, но ключ
+и хосты известны заранее, а кэш в памяти процесса."""
+import os
+
+os.environ.setdefault('YATUBE_SECRET_KEY', 'django-insecure-yatube-bench')
+
+from .base import CACHES as BASE_CACHES  # noqa: E402
+from .prod import *  # noqa: E402,F401,F403
+from .prod import INSTALLED_APPS  # noqa: E402
+
+ALLOWED_HOSTS = ['localhost', '127.0.0.1', 'testserver']
+CACHES = BASE_CACHES
+SESSION_COOKIE_SECURE = CSRF_COOKIE_SECURE = False
+INSTALLED_APPS = INSTALLED_APPS + ['benchmarks.apps.BenchmarksConfig']
@@ -0,0 +1,14 @@
+"""Разработка: DEBUG, шаблоны перечитываются с диска."""
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import INSTALLED_APPS
+
+# команды замеров не нужны боевым воркерам
+INSTALLED_APPS = INSTALLED_APPS + ['benchmarks.apps.BenchmarksConfig']
+
+DEBUG = os.environ.get('YATUBE_DEBUG', '1') == '1'
+
+# постоянный ключ, чтобы сессии переживали перезапуск runserver
+SECRET_KEY = os.environ.get(
+    'YATUBE_SECRET_KEY', 'django-insecure-yatube-dev-only')
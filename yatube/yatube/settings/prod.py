@@ -0,0 +1,73 @@
+"""Боевые воркеры.
+
+DEBUG выключен: с ним Django хранит текст каждого SQL-запроса в
+connection.queries. Шаблоны разбираются один раз на процесс, соединения
+с базой переиспользуются между запросами, Server-Timing получает лишь
+доля запросов. Ключ (YATUBE_SECRET_KEY) и хосты задаются окружением:
+без ключа Django не запустится.
+"""
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import (CACHES, DATABASE_REPLICAS, DATABASES,
+                   MIDDLEWARE, TEMPLATE_LOADERS, TEMPLATES)
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.environ.get('YATUBE_ALLOWED_HOSTS', '').split(',')
+
+CACHED_TEMPLATES = True
+TEMPLATES = [dict(TEMPLATES[0], OPTIONS=dict(
+    TEMPLATES[0]['OPTIONS'],
+    loaders=[('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)],
+    context_processors=[
+        processor for processor in TEMPLATES[0]['OPTIONS'][
+            'context_processors']
+        # добавляет контекст только при DEBUG
+        if processor != 'django.template.context_processors.debug'
+    ],
+))]
+
+CONN_MAX_AGE = int(os.environ.get('YATUBE_CONN_MAX_AGE', 600))
+DATABASES = {alias: dict(database, CONN_MAX_AGE=CONN_MAX_AGE)
+             for alias, database in DATABASES.items()}
+
+# без реплик ReplicaMiddleware только тратит время на каждый запрос
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE
+    if DATABASE_REPLICAS or middleware != 'core.middleware.ReplicaMiddleware'
+]
+REQUEST_TIMING_SAMPLE_RATE = float(
+    os.environ.get('YATUBE_TIMING_SAMPLE_RATE', 0.01))
+
+# Общий для воркеров кэш: LocMemCache у каждого процесса свой. По
+# умолчанию memcached (пакет python-memcached): на его атомарном incr
+# держатся журнал удалений TieredCache и счётчики карточек.
+# FileBasedCache из YATUBE_CACHE_DIR годится для одной машины и
+# небольшого кэша: каждая запись перечисляет весь каталог, чтобы решить,
+# пора ли вытеснять, а incr в нём — неатомарные чтение и запись, поэтому
+# счётчики карточек с ним выключены.
+if os.environ.get('YATUBE_CACHE_DIR'):
+    CACHES = dict(CACHES, shared={
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['YATUBE_CACHE_DIR'],
+        'OPTIONS': {
+            'MAX_ENTRIES': int(
+                os.environ.get('YATUBE_CACHE_MAX_ENTRIES', 100000)),
+            'CULL_FREQUENCY': 10,
+        },
+    })
+    POST_CARD_STATS = False
+else:
+    CACHES = dict(CACHES, shared={
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.environ.get(
+            'YATUBE_MEMCACHED', '127.0.0.1:11211').split(','),
+    })
+
+# secure-cookie включаются, когда сайт отдаётся по HTTPS: по HTTP с ними
+# браузер не вернёт сессию и CSRF-токен
+SESSION_COOKIE_SECURE = os.environ.get('YATUBE_HTTPS') == '1'
+CSRF_COOKIE_SECURE = SESSION_COOKIE_SECURE
+SECURE_CONTENT_TYPE_NOSNIFF = True
+X_FRAME_OPTIONS = 'DENY'
@@ -0,0 +1,20 @@
+"""Окружение веб-воркера.
+
+yatube.wsgi и yatube.asgi вызывают prepare_environment до импорта
+Django: настройки читают переменные окружения при импорте. Заданные
+вручную значения не меняются.
+
+Django 2.2 при импорте берёт distutils, а прослойка setuptools подменяет
+его своей копией вместе с pkg_resources. Прослойка ставится при запуске
+интерпретатора, поэтому SETUPTOOLS_USE_DISTUTILS=stdlib задаётся в
+окружении воркера (unit systemd, Dockerfile), а не здесь; до Python 3.12
+distutils есть в стандартной библиотеке.
+"""
+import os
+
+
+def prepare_environment():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    # Веб-воркер миниатюр не делает, а пакет sorl при импорте тянет
+    # pkg_resources ради номера своей версии — ~0,1 с на старт
+    os.environ.setdefault('YATUBE_THUMBNAILS', '0')
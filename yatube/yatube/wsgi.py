@@ -1,7 +1,11 @@
-import os
+from yatube.worker import prepare_environment
 
-from django.core.wsgi import get_wsgi_application
+prepare_environment()
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+from django.core.wsgi import get_wsgi_application  # noqa: E402
 
 application = get_wsgi_application()
+
+from core.warmup import warm_worker  # noqa: E402
+
+warm_worker()